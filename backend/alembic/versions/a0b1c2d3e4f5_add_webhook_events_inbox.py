@@ -0,0 +1,63 @@
+"""Add webhook_events inbox table.
+
+Revision ID: a0b1c2d3e4f5
+Revises: f9a0b1c2d3e4
+Create Date: 2026-03-11 16:40:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a0b1c2d3e4f5"
+down_revision: Union[str, None] = "f9a0b1c2d3e4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(inspector: sa.Inspector, table_name: str) -> bool:
+    return table_name in inspector.get_table_names()
+
+
+def _index_exists(inspector: sa.Inspector, table_name: str, index_name: str) -> bool:
+    if not _table_exists(inspector, table_name):
+        return False
+    return index_name in {idx["name"] for idx in inspector.get_indexes(table_name)}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not _table_exists(inspector, "webhook_events"):
+        op.create_table(
+            "webhook_events",
+            sa.Column("id", sa.UUID(), nullable=False),
+            sa.Column("provider", sa.String(), nullable=False),
+            sa.Column("event_id", sa.String(), nullable=True),
+            sa.Column("topic", sa.String(), nullable=True),
+            sa.Column("account_key", sa.String(), nullable=True),
+            sa.Column("payload", sa.Text(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False, server_default="pending"),
+            sa.Column("attempt_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("latest_error", sa.Text(), nullable=True),
+            sa.Column("received_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    inspector = sa.inspect(bind)
+    if not _index_exists(inspector, "webhook_events", "ix_webhook_events_status_received_at"):
+        op.create_index(
+            "ix_webhook_events_status_received_at",
+            "webhook_events",
+            ["status", "received_at"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    raise RuntimeError("Downgrade is blocked for this webhook inbox migration.")
@@ -0,0 +1,63 @@
+"""Add sync_job_outbox for transactional sync job dispatch.
+
+Revision ID: b1c2d3e4f5a6
+Revises: a0b1c2d3e4f5
+Create Date: 2026-03-12 11:05:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b1c2d3e4f5a6"
+down_revision: Union[str, None] = "a0b1c2d3e4f5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(inspector: sa.Inspector, table_name: str) -> bool:
+    return table_name in inspector.get_table_names()
+
+
+def _index_exists(inspector: sa.Inspector, table_name: str, index_name: str) -> bool:
+    if not _table_exists(inspector, table_name):
+        return False
+    return index_name in {idx["name"] for idx in inspector.get_indexes(table_name)}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not _table_exists(inspector, "sync_job_outbox"):
+        op.create_table(
+            "sync_job_outbox",
+            sa.Column("id", sa.UUID(), nullable=False),
+            sa.Column("sync_job_id", sa.UUID(), nullable=False),
+            sa.Column("run_after", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("attempt_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("latest_error", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.Column("dispatched_at", sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(["sync_job_id"], ["sync_jobs.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    inspector = sa.inspect(bind)
+    if not _index_exists(inspector, "sync_job_outbox", "ix_sync_job_outbox_pending"):
+        # Only undispatched rows are indexed, so the dispatcher's scan stays small as history grows.
+        op.create_index(
+            "ix_sync_job_outbox_pending",
+            "sync_job_outbox",
+            ["created_at"],
+            unique=False,
+            postgresql_where=sa.text("dispatched_at IS NULL"),
+            sqlite_where=sa.text("dispatched_at IS NULL"),
+        )
+
+
+def downgrade() -> None:
+    raise RuntimeError("Downgrade is blocked for this sync job outbox migration.")
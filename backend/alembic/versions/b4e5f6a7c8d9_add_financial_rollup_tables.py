@@ -0,0 +1,64 @@
+"""Add weekly/monthly/quarterly/fiscal-year financial rollup tables.
+
+Revision ID: b4e5f6a7c8d9
+Revises: 9c1d2e3f4a5b
+Create Date: 2026-03-02 10:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b4e5f6a7c8d9"
+down_revision: Union[str, None] = "9c1d2e3f4a5b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ROLLUP_TABLES = (
+    "fact_weekly_financials",
+    "fact_monthly_financials",
+    "fact_quarterly_financials",
+    "fact_fiscal_year_financials",
+)
+
+
+def _table_exists(inspector: sa.Inspector, table_name: str) -> bool:
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name in ROLLUP_TABLES:
+        if _table_exists(inspector, table_name):
+            continue
+        op.create_table(
+            table_name,
+            sa.Column("id", sa.UUID(), nullable=False),
+            sa.Column("workspace_id", sa.UUID(), nullable=False),
+            sa.Column("period_start", sa.Date(), nullable=False),
+            sa.Column("period_end", sa.Date(), nullable=False),
+            sa.Column("revenue_gross", sa.Numeric(precision=14, scale=2), nullable=False, server_default="0"),
+            sa.Column("revenue_net", sa.Numeric(precision=14, scale=2), nullable=False, server_default="0"),
+            sa.Column("cost_ads_meta", sa.Numeric(precision=14, scale=2), nullable=False, server_default="0"),
+            sa.Column("cost_ads_google", sa.Numeric(precision=14, scale=2), nullable=False, server_default="0"),
+            sa.Column("cost_transaction_fees", sa.Numeric(precision=14, scale=2), nullable=False, server_default="0"),
+            sa.Column("cost_fixed_allocated", sa.Numeric(precision=14, scale=2), nullable=False, server_default="0"),
+            sa.Column("cost_variable", sa.Numeric(precision=14, scale=2), nullable=False, server_default="0"),
+            sa.Column("transactions_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("days_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.ForeignKeyConstraint(["workspace_id"], ["workspaces.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+            # Doubles as the (workspace_id, period_start) range-scan index.
+            sa.UniqueConstraint("workspace_id", "period_start", name=f"uq_{table_name}_workspace_period"),
+        )
+
+
+def downgrade() -> None:
+    raise RuntimeError("Downgrade is blocked for this rollup migration.")
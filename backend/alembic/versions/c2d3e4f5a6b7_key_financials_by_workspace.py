@@ -0,0 +1,46 @@
+"""Key fact_daily_financials by (workspace_id, user_id, date).
+
+The model has declared idx_financials_workspace_user_date_unique since the
+multi-tenant migration, but databases built from migrations still carry the
+initial (user_id, date) constraint. Bulk upserts target the workspace key.
+
+Revision ID: c2d3e4f5a6b7
+Revises: b1c2d3e4f5a6
+Create Date: 2026-03-13 10:20:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c2d3e4f5a6b7"
+down_revision: Union[str, None] = "b1c2d3e4f5a6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _unique_exists(inspector: sa.Inspector, table_name: str, constraint_name: str) -> bool:
+    return constraint_name in {constraint["name"] for constraint in inspector.get_unique_constraints(table_name)}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not _unique_exists(inspector, "fact_daily_financials", "idx_financials_workspace_user_date_unique"):
+        # The old key was stricter, so existing rows cannot violate this one.
+        op.create_unique_constraint(
+            "idx_financials_workspace_user_date_unique",
+            "fact_daily_financials",
+            ["workspace_id", "user_id", "date"],
+        )
+    if _unique_exists(inspector, "fact_daily_financials", "idx_financials_user_date_unique"):
+        # One user can hold rows for the same day in several workspaces.
+        op.drop_constraint("idx_financials_user_date_unique", "fact_daily_financials", type_="unique")
+
+
+def downgrade() -> None:
+    raise RuntimeError("Downgrade is blocked for this financials key migration.")
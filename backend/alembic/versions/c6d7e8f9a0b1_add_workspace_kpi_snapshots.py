@@ -0,0 +1,42 @@
+"""Add per-workspace KPI snapshot table.
+
+Revision ID: c6d7e8f9a0b1
+Revises: b4e5f6a7c8d9
+Create Date: 2026-03-04 09:30:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c6d7e8f9a0b1"
+down_revision: Union[str, None] = "b4e5f6a7c8d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(inspector: sa.Inspector, table_name: str) -> bool:
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not _table_exists(inspector, "workspace_kpi_snapshots"):
+        op.create_table(
+            "workspace_kpi_snapshots",
+            sa.Column("workspace_id", sa.UUID(), nullable=False),
+            sa.Column("as_of", sa.Date(), nullable=False),
+            sa.Column("payload", sa.JSON(), nullable=False),
+            sa.Column("computed_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.ForeignKeyConstraint(["workspace_id"], ["workspaces.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("workspace_id"),
+        )
+
+
+def downgrade() -> None:
+    raise RuntimeError("Downgrade is blocked for this KPI snapshot migration.")
@@ -0,0 +1,47 @@
+"""Covering index for the latest-sync-job-per-integration lookup.
+
+Revision ID: d7e8f9a0b1c2
+Revises: c6d7e8f9a0b1
+Create Date: 2026-03-06 14:10:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d7e8f9a0b1c2"
+down_revision: Union[str, None] = "c6d7e8f9a0b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _index_exists(inspector: sa.Inspector, table_name: str, index_name: str) -> bool:
+    return index_name in {idx["name"] for idx in inspector.get_indexes(table_name)}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # INCLUDE columns are Postgres-only; ix_sync_jobs_integration_requested_at already serves SQLite.
+        return
+
+    inspector = sa.inspect(bind)
+    if not _index_exists(inspector, "sync_jobs", "ix_sync_jobs_integration_requested_at_cover"):
+        # Same key as ix_sync_jobs_integration_requested_at, ordered for the
+        # row_number() window, carrying id so the ranking is an index-only scan.
+        op.create_index(
+            "ix_sync_jobs_integration_requested_at_cover",
+            "sync_jobs",
+            ["integration_id", sa.text("requested_at DESC")],
+            unique=False,
+            postgresql_include=["id"],
+        )
+    if _index_exists(inspector, "sync_jobs", "ix_sync_jobs_integration_requested_at"):
+        op.drop_index("ix_sync_jobs_integration_requested_at", table_name="sync_jobs")
+
+
+def downgrade() -> None:
+    raise RuntimeError("Downgrade is blocked for this sync job index migration.")
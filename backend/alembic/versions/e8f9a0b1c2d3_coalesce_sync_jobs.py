@@ -0,0 +1,74 @@
+"""Track coalesced triggers on sync jobs and allow one running sync per integration.
+
+Revision ID: e8f9a0b1c2d3
+Revises: d7e8f9a0b1c2
+Create Date: 2026-03-09 10:30:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e8f9a0b1c2d3"
+down_revision: Union[str, None] = "d7e8f9a0b1c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _column_exists(inspector: sa.Inspector, table_name: str, column_name: str) -> bool:
+    return column_name in {column["name"] for column in inspector.get_columns(table_name)}
+
+
+def _index_exists(inspector: sa.Inspector, table_name: str, index_name: str) -> bool:
+    return index_name in {idx["name"] for idx in inspector.get_indexes(table_name)}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not _column_exists(inspector, "sync_jobs", "trigger_count"):
+        op.add_column(
+            "sync_jobs",
+            sa.Column("trigger_count", sa.Integer(), nullable=False, server_default="1"),
+        )
+
+    if not _index_exists(inspector, "sync_jobs", "ux_sync_jobs_integration_running"):
+        # Jobs left "running" by a crashed worker would block the index; fail all but the newest.
+        op.execute(
+            """
+            UPDATE sync_jobs SET status = 'failed', latest_error = 'Superseded by a newer running sync'
+            WHERE status = 'running'
+              AND id NOT IN (
+                  SELECT DISTINCT ON (integration_id) id FROM sync_jobs
+                  WHERE status = 'running'
+                  ORDER BY integration_id, started_at DESC NULLS LAST
+              )
+            """
+            if bind.dialect.name == "postgresql"
+            else """
+            UPDATE sync_jobs SET status = 'failed', latest_error = 'Superseded by a newer running sync'
+            WHERE status = 'running'
+              AND EXISTS (
+                  SELECT 1 FROM sync_jobs AS newer
+                  WHERE newer.integration_id = sync_jobs.integration_id
+                    AND newer.status = 'running'
+                    AND newer.started_at > sync_jobs.started_at
+              )
+            """
+        )
+        op.create_index(
+            "ux_sync_jobs_integration_running",
+            "sync_jobs",
+            ["integration_id"],
+            unique=True,
+            postgresql_where=sa.text("status = 'running'"),
+            sqlite_where=sa.text("status = 'running'"),
+        )
+
+
+def downgrade() -> None:
+    raise RuntimeError("Downgrade is blocked for this sync job coalescing migration.")
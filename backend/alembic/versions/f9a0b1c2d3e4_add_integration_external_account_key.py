@@ -0,0 +1,79 @@
+"""Indexed webhook routing key on integrations.
+
+Revision ID: f9a0b1c2d3e4
+Revises: e8f9a0b1c2d3
+Create Date: 2026-03-10 09:15:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f9a0b1c2d3e4"
+down_revision: Union[str, None] = "e8f9a0b1c2d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _column_exists(inspector: sa.Inspector, table_name: str, column_name: str) -> bool:
+    return column_name in {column["name"] for column in inspector.get_columns(table_name)}
+
+
+def _index_exists(inspector: sa.Inspector, table_name: str, index_name: str) -> bool:
+    return index_name in {idx["name"] for idx in inspector.get_indexes(table_name)}
+
+
+def _routing_key(platform: str, account_id: str | None, shop_domain: str | None) -> str | None:
+    # Frozen copy of oauth_service.external_account_key as of this revision.
+    if platform == "shopify":
+        key = (shop_domain or account_id or "").strip().lower()
+        for scheme in ("https://", "http://"):
+            if key.startswith(scheme):
+                key = key[len(scheme) :]
+        key = key.split("/")[0]
+    else:
+        key = (account_id or "").strip()
+    return key or None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not _column_exists(inspector, "integrations", "external_account_key"):
+        op.add_column("integrations", sa.Column("external_account_key", sa.String(), nullable=True))
+
+    integrations = sa.table(
+        "integrations",
+        sa.column("id", sa.UUID()),
+        sa.column("platform", sa.String()),
+        sa.column("account_id", sa.String()),
+        sa.column("external_account_key", sa.String()),
+        sa.column("metadata", sa.JSON()),
+    )
+    rows = bind.execute(
+        sa.select(integrations.c.id, integrations.c.platform, integrations.c.account_id, integrations.c.metadata).where(
+            integrations.c.external_account_key.is_(None)
+        )
+    ).all()
+    for row in rows:
+        key = _routing_key(row.platform, row.account_id, (row.metadata or {}).get("shop_domain"))
+        if key is not None:
+            bind.execute(
+                integrations.update().where(integrations.c.id == row.id).values(external_account_key=key)
+            )
+
+    if not _index_exists(inspector, "integrations", "ix_integrations_platform_account_key_status"):
+        op.create_index(
+            "ix_integrations_platform_account_key_status",
+            "integrations",
+            ["platform", "external_account_key", "status"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    raise RuntimeError("Downgrade is blocked for this integration routing key migration.")
@@ -1,20 +1,59 @@
+import asyncio
 from dataclasses import dataclass
-from typing import Optional
+import hashlib
+import hmac
+import time
+from typing import Any, Optional
 import uuid
 
 import httpx
 from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from jose import JWTError, jwt
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app.core import security
+from app.core.cache import TTLCache, redis_get_json, redis_set_json
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import (
+    get_async_analytics_db,
+    get_async_analytics_session_factory,
+    get_async_db,
+    get_async_read_db,
+    get_async_read_session_factory,
+    get_db,
+    get_session_factory,
+)
 from app.models.organization import Organization
 from app.models.user import User
 from app.models.workspace import Workspace
 from app.models.workspace_membership import WorkspaceMembership
 
+# Endpoints take every dependency, database sessions included, from this module.
+__all__ = [
+    "WORKSPACE_ROLES",
+    "WorkspaceContext",
+    "forget_provisioned_user",
+    "get_async_analytics_db",
+    "get_async_analytics_session_factory",
+    "get_async_current_user",
+    "get_async_db",
+    "get_async_read_db",
+    "get_async_read_session_factory",
+    "get_async_workspace_context",
+    "get_current_user",
+    "get_db",
+    "get_session_factory",
+    "get_workspace_context",
+    "identity_cache_stats",
+    "invalidate_workspace_context",
+    "require_internal_token",
+    "reusable_oauth2",
+]
+
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/session",
     auto_error=False,
@@ -22,6 +61,27 @@ reusable_oauth2 = OAuth2PasswordBearer(
 
 WORKSPACE_ROLES = {"owner", "admin", "analyst", "viewer"}
 
+IDENTITY_REDIS_KEY_PREFIX = "profitpulse:auth:identity:"
+
+_identity_cache = TTLCache(
+    max_entries=settings.AUTH_IDENTITY_CACHE_MAX_ENTRIES,
+    default_ttl=settings.AUTH_IDENTITY_CACHE_TTL_SECONDS,
+)
+_identity_redis_stats = {"hits": 0, "misses": 0}
+
+# Values are (workspace, membership, role) where both models are detached copies
+# that never belong to a session; hits are merged into the request session.
+_workspace_context_cache = TTLCache(
+    max_entries=settings.WORKSPACE_CONTEXT_CACHE_MAX_ENTRIES,
+    default_ttl=settings.WORKSPACE_CONTEXT_CACHE_TTL_SECONDS,
+)
+
+# User ids known to own at least one workspace membership.
+_provisioned_users = TTLCache(
+    max_entries=settings.WORKSPACE_CONTEXT_CACHE_MAX_ENTRIES,
+    default_ttl=settings.PROVISIONED_USER_MARKER_TTL_SECONDS,
+)
+
 
 @dataclass
 class WorkspaceContext:
@@ -38,6 +98,16 @@ def _credentials_exception() -> HTTPException:
     )
 
 
+def require_internal_token(
+    x_internal_token: Optional[str] = Header(default=None, alias="X-Internal-Token"),
+) -> None:
+    """Guard for operational endpoints; they 404 unless SYSTEM_METRICS_TOKEN is configured."""
+    if not settings.SYSTEM_METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_internal_token or not hmac.compare_digest(x_internal_token, settings.SYSTEM_METRICS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid internal token")
+
+
 def _get_or_create_dev_user(db: Session) -> User:
     dev_email = "bypass@example.com"
     user = db.query(User).filter(User.email == dev_email).first()
@@ -97,15 +167,123 @@ def _fetch_supabase_identity(token: str) -> dict:
     return payload
 
 
-def _ensure_default_workspace(db: Session, user: User) -> None:
-    existing = (
-        db.query(WorkspaceMembership)
-        .filter(WorkspaceMembership.user_id == user.id)
+def _verify_supabase_token(token: str) -> dict:
+    """Verify a token according to SUPABASE_AUTH_MODE and return identity fields."""
+    mode = settings.SUPABASE_AUTH_MODE.lower()
+    if mode != "remote":
+        try:
+            claims = security.supabase_jwt_verifier.verify(token)
+        except JWTError:
+            raise _credentials_exception()
+        except security.SupabaseKeysUnavailable:
+            if mode == "local":
+                raise _credentials_exception()
+        else:
+            return {
+                "id": claims["sub"],
+                "email": claims.get("email"),
+                "user_metadata": claims.get("user_metadata") or {},
+            }
+
+    payload = _fetch_supabase_identity(token)
+    return {
+        "id": payload["id"],
+        "email": payload.get("email"),
+        "user_metadata": payload.get("user_metadata") or {},
+    }
+
+
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _token_ttl_seconds(token: str) -> float:
+    """Seconds until the token's exp claim; 0 when it cannot be determined."""
+    try:
+        claims = jwt.get_unverified_claims(token)
+    except JWTError:
+        return 0
+    exp = claims.get("exp")
+    if not isinstance(exp, (int, float)):
+        return 0
+    return exp - time.time()
+
+
+def _resolve_identity(token: str) -> dict[str, Any]:
+    """
+    Resolve a bearer token to a Supabase identity, reusing verified results until
+    the configured TTL or the token's own expiry, whichever comes first.
+    """
+    if not settings.AUTH_IDENTITY_CACHE_ENABLED:
+        return _verify_supabase_token(token)
+
+    cache_key = _token_cache_key(token)
+    identity = _identity_cache.get(cache_key)
+    if identity is not None:
+        return identity
+
+    ttl = min(_token_ttl_seconds(token), settings.AUTH_IDENTITY_CACHE_TTL_SECONDS)
+    redis_key = f"{IDENTITY_REDIS_KEY_PREFIX}{cache_key}"
+    if settings.AUTH_IDENTITY_CACHE_REDIS:
+        identity = redis_get_json(redis_key)
+        if identity and identity.get("id"):
+            _identity_redis_stats["hits"] += 1
+            _identity_cache.set(cache_key, identity, ttl)
+            return identity
+        _identity_redis_stats["misses"] += 1
+
+    identity = _verify_supabase_token(token)
+    if ttl > 0:
+        _identity_cache.set(cache_key, identity, ttl)
+        if settings.AUTH_IDENTITY_CACHE_REDIS:
+            redis_set_json(redis_key, identity, ttl)
+    return identity
+
+
+def identity_cache_stats() -> dict[str, Any]:
+    return {
+        **_identity_cache.stats(),
+        "redis_enabled": settings.AUTH_IDENTITY_CACHE_REDIS,
+        "redis_hits": _identity_redis_stats["hits"],
+        "redis_misses": _identity_redis_stats["misses"],
+    }
+
+
+def _has_membership(db: Session, user_id: uuid.UUID) -> bool:
+    return (
+        db.query(WorkspaceMembership.id)
+        .filter(WorkspaceMembership.user_id == user_id)
         .first()
+        is not None
     )
-    if existing:
+
+
+def _provision_first_login(db: Session, user: User) -> None:
+    """
+    Create the default org/workspace/membership for a user that has none.
+
+    Runs at most once per user per marker TTL. Concurrent first logins are
+    serialized on the user row, and the membership check is repeated under
+    that lock so only one of them provisions.
+    """
+    if _provisioned_users.get(user.id):
         return
 
+    if not _has_membership(db, user.id):
+        db.query(User.id).filter(User.id == user.id).with_for_update().first()
+        if not _has_membership(db, user.id):
+            _create_default_workspace(db, user)
+        else:
+            db.commit()
+
+    _provisioned_users.set(user.id, True)
+
+
+def forget_provisioned_user(user_id: uuid.UUID) -> None:
+    _provisioned_users.delete(user_id)
+
+
+def _create_default_workspace(db: Session, user: User) -> None:
     company_or_slug = user.company_name or user.email.split("@")[0]
     organization = Organization(
         name=f"{company_or_slug}'s Org",
@@ -132,18 +310,8 @@ def _ensure_default_workspace(db: Session, user: User) -> None:
     db.commit()
 
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    token: Optional[str] = Depends(reusable_oauth2),
-) -> User:
-    if settings.DEV_BYPASS_AUTH and _is_local_env() and not token:
-        return _get_or_create_dev_user(db)
-
-    if not token:
-        raise _credentials_exception()
-
+def _load_or_create_user(db: Session, identity: dict[str, Any]) -> User:
     try:
-        identity = _fetch_supabase_identity(token)
         user_id = uuid.UUID(identity["id"])
     except ValueError:
         raise _credentials_exception()
@@ -158,44 +326,144 @@ def get_current_user(
             company_name=metadata.get("company_name"),
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
-
-    _ensure_default_workspace(db, user)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent first request for the same identity created the row.
+            db.rollback()
+            user = db.query(User).filter(User.id == user_id).first()
+            if not user:
+                raise _credentials_exception()
+        else:
+            db.refresh(user)
+
+    _provision_first_login(db, user)
     return user
 
 
-def get_workspace_context(
+def get_current_user(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    x_workspace_id: Optional[str] = Header(default=None, alias="X-Workspace-Id"),
-) -> WorkspaceContext:
-    membership_query = db.query(WorkspaceMembership).filter(
-        WorkspaceMembership.user_id == current_user.id
-    )
+    token: Optional[str] = Depends(reusable_oauth2),
+) -> User:
+    if settings.DEV_BYPASS_AUTH and _is_local_env() and not token:
+        return _get_or_create_dev_user(db)
+
+    if not token:
+        raise _credentials_exception()
+
+    return _load_or_create_user(db, _resolve_identity(token))
+
+
+async def _resolve_identity_async(token: str) -> dict[str, Any]:
+    if settings.AUTH_IDENTITY_CACHE_ENABLED:
+        identity = _identity_cache.get(_token_cache_key(token))
+        if identity is not None:
+            return identity
+    # Misses may fetch JWKS or call Supabase over blocking HTTP.
+    return await asyncio.to_thread(_resolve_identity, token)
+
+
+async def get_async_current_user(
+    db: AsyncSession = Depends(get_async_db),
+    token: Optional[str] = Depends(reusable_oauth2),
+) -> User:
+    """get_current_user for async endpoints; same rules, no threadpool slot or sync connection."""
+    if settings.DEV_BYPASS_AUTH and _is_local_env() and not token:
+        return await db.run_sync(_get_or_create_dev_user)
+
+    if not token:
+        raise _credentials_exception()
+
+    identity = await _resolve_identity_async(token)
+    return await db.run_sync(_load_or_create_user, identity)
+
+
+def _detached_copy(instance: Any) -> Any:
+    mapper = sa_inspect(instance).mapper
+    copy = mapper.class_(**{attr.key: getattr(instance, attr.key) for attr in mapper.column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+def invalidate_workspace_context(
+    user_id: Optional[uuid.UUID] = None,
+    workspace_id: Optional[uuid.UUID] = None,
+) -> None:
+    """Drop cached workspace contexts for a user and/or a workspace."""
+
+    def matches(key: Any, value: Any) -> bool:
+        if user_id is not None and key[0] == user_id:
+            return True
+        return workspace_id is not None and value[0].id == workspace_id
 
-    membership: Optional[WorkspaceMembership]
+    _workspace_context_cache.delete_where(matches)
+
+
+def _resolve_workspace_context(
+    db: Session,
+    current_user: User,
+    x_workspace_id: Optional[str],
+) -> WorkspaceContext:
+    workspace_id: Optional[uuid.UUID] = None
     if x_workspace_id:
         try:
             workspace_id = uuid.UUID(x_workspace_id)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid X-Workspace-Id header")
 
-        membership = membership_query.filter(
-            WorkspaceMembership.workspace_id == workspace_id
-        ).first()
-    else:
-        membership = membership_query.order_by(WorkspaceMembership.created_at.asc()).first()
+    cache_key = (current_user.id, workspace_id)
+    cached = _workspace_context_cache.get(cache_key)
+    if cached is not None:
+        workspace, membership, role = cached
+        return WorkspaceContext(
+            workspace=db.merge(workspace, load=False),
+            membership=db.merge(membership, load=False),
+            role=role,
+        )
 
-    if not membership:
+    query = (
+        db.query(WorkspaceMembership, Workspace)
+        .join(Workspace, Workspace.id == WorkspaceMembership.workspace_id)
+        .filter(WorkspaceMembership.user_id == current_user.id)
+    )
+    if workspace_id:
+        query = query.filter(WorkspaceMembership.workspace_id == workspace_id)
+    else:
+        query = query.order_by(WorkspaceMembership.created_at.asc())
+
+    row = query.first()
+    if not row and workspace_id is None and _provisioned_users.get(current_user.id):
+        # The marker is per process, so it can outlive the user's last membership
+        # (e.g. a workspace deleted through another API process); provision again.
+        forget_provisioned_user(current_user.id)
+        _provision_first_login(db, current_user)
+        row = query.first()
+    if not row:
         raise HTTPException(status_code=403, detail="No workspace membership found for user")
-
-    workspace = db.query(Workspace).filter(Workspace.id == membership.workspace_id).first()
-    if not workspace:
-        raise HTTPException(status_code=404, detail="Workspace not found")
+    membership, workspace = row
 
     role = (membership.role or "viewer").lower()
     if role not in WORKSPACE_ROLES:
         role = "viewer"
 
+    _workspace_context_cache.set(
+        cache_key,
+        (_detached_copy(workspace), _detached_copy(membership), role),
+    )
     return WorkspaceContext(workspace=workspace, membership=membership, role=role)
+
+
+def get_workspace_context(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    x_workspace_id: Optional[str] = Header(default=None, alias="X-Workspace-Id"),
+) -> WorkspaceContext:
+    return _resolve_workspace_context(db, current_user, x_workspace_id)
+
+
+async def get_async_workspace_context(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_async_current_user),
+    x_workspace_id: Optional[str] = Header(default=None, alias="X-Workspace-Id"),
+) -> WorkspaceContext:
+    return await db.run_sync(_resolve_workspace_context, current_user, x_workspace_id)
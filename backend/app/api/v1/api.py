@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from app.api.v1.endpoints import (
     analytics,
     auth,
+    bootstrap,
     chat,
     integrations,
     metrics,
@@ -22,4 +23,5 @@ api_router.include_router(user.router, prefix="/user", tags=["user"])
 api_router.include_router(onboarding.router, prefix="/onboarding", tags=["onboarding"])
 api_router.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
 api_router.include_router(analytics.router, tags=["analytics"])
+api_router.include_router(bootstrap.router, prefix="/bootstrap", tags=["bootstrap"])
 api_router.include_router(system.router, prefix="/system", tags=["system"])
@@ -3,7 +3,8 @@ import uuid
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
 from app.models.dashboard import Dashboard
@@ -36,16 +37,16 @@ class DashboardWidgetCreateRequest(BaseModel):
 
 
 @router.get("/saved-queries")
-def list_saved_queries(
-    db: Session = Depends(deps.get_db),
-    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_workspace_context),
+async def list_saved_queries(
+    db: AsyncSession = Depends(deps.get_async_db),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
 ) -> Any:
-    queries = (
-        db.query(SavedQuery)
-        .filter(SavedQuery.workspace_id == workspace_ctx.workspace.id)
+    result = await db.execute(
+        select(SavedQuery)
+        .where(SavedQuery.workspace_id == workspace_ctx.workspace.id)
         .order_by(SavedQuery.created_at.desc())
-        .all()
     )
+    queries = result.scalars().all()
     return [
         {
             "id": str(query.id),
@@ -60,10 +61,10 @@ def list_saved_queries(
 
 
 @router.post("/saved-queries")
-def create_saved_query(
+async def create_saved_query(
     payload: SavedQueryCreateRequest,
-    db: Session = Depends(deps.get_db),
-    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_workspace_context),
+    db: AsyncSession = Depends(deps.get_async_db),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
 ) -> Any:
     saved_query = SavedQuery(
         workspace_id=workspace_ctx.workspace.id,
@@ -74,22 +75,22 @@ def create_saved_query(
         chart_spec=payload.chart_spec,
     )
     db.add(saved_query)
-    db.commit()
-    db.refresh(saved_query)
+    await db.commit()
+    await db.refresh(saved_query)
     return {"id": str(saved_query.id)}
 
 
 @router.get("/dashboards")
-def list_dashboards(
-    db: Session = Depends(deps.get_db),
-    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_workspace_context),
+async def list_dashboards(
+    db: AsyncSession = Depends(deps.get_async_read_db),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
 ) -> Any:
-    dashboards = (
-        db.query(Dashboard)
-        .filter(Dashboard.workspace_id == workspace_ctx.workspace.id)
+    result = await db.execute(
+        select(Dashboard)
+        .where(Dashboard.workspace_id == workspace_ctx.workspace.id)
         .order_by(Dashboard.created_at.desc())
-        .all()
     )
+    dashboards = result.scalars().all()
     return [
         {
             "id": str(dashboard.id),
@@ -101,10 +102,10 @@ def list_dashboards(
 
 
 @router.post("/dashboards")
-def create_dashboard(
+async def create_dashboard(
     payload: DashboardCreateRequest,
-    db: Session = Depends(deps.get_db),
-    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_workspace_context),
+    db: AsyncSession = Depends(deps.get_async_db),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
 ) -> Any:
     dashboard = Dashboard(
         workspace_id=workspace_ctx.workspace.id,
@@ -112,34 +113,37 @@ def create_dashboard(
         name=payload.name,
     )
     db.add(dashboard)
-    db.commit()
-    db.refresh(dashboard)
+    await db.commit()
+    await db.refresh(dashboard)
     return {"id": str(dashboard.id)}
 
 
 @router.get("/dashboards/{dashboard_id}/widgets")
-def list_dashboard_widgets(
+async def list_dashboard_widgets(
     dashboard_id: str,
-    db: Session = Depends(deps.get_db),
-    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_workspace_context),
+    db: AsyncSession = Depends(deps.get_async_db),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
 ) -> Any:
-    dashboard = (
-        db.query(Dashboard)
-        .filter(
-            Dashboard.id == dashboard_id,
+    try:
+        dashboard_uuid = uuid.UUID(dashboard_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid dashboard_id") from exc
+
+    dashboard = await db.scalar(
+        select(Dashboard).where(
+            Dashboard.id == dashboard_uuid,
             Dashboard.workspace_id == workspace_ctx.workspace.id,
         )
-        .first()
     )
     if not dashboard:
         raise HTTPException(status_code=404, detail="Dashboard not found")
 
-    widgets = (
-        db.query(DashboardWidget)
-        .filter(DashboardWidget.dashboard_id == dashboard.id)
+    result = await db.execute(
+        select(DashboardWidget)
+        .where(DashboardWidget.dashboard_id == dashboard.id)
         .order_by(DashboardWidget.position_y.asc(), DashboardWidget.position_x.asc())
-        .all()
     )
+    widgets = result.scalars().all()
     return [
         {
             "id": str(widget.id),
@@ -157,19 +161,22 @@ def list_dashboard_widgets(
 
 
 @router.post("/dashboards/{dashboard_id}/widgets")
-def create_dashboard_widget(
+async def create_dashboard_widget(
     dashboard_id: str,
     payload: DashboardWidgetCreateRequest,
-    db: Session = Depends(deps.get_db),
-    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_workspace_context),
+    db: AsyncSession = Depends(deps.get_async_db),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
 ) -> Any:
-    dashboard = (
-        db.query(Dashboard)
-        .filter(
-            Dashboard.id == dashboard_id,
+    try:
+        dashboard_uuid = uuid.UUID(dashboard_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid dashboard_id") from exc
+
+    dashboard = await db.scalar(
+        select(Dashboard).where(
+            Dashboard.id == dashboard_uuid,
             Dashboard.workspace_id == workspace_ctx.workspace.id,
         )
-        .first()
     )
     if not dashboard:
         raise HTTPException(status_code=404, detail="Dashboard not found")
@@ -180,13 +187,11 @@ def create_dashboard_widget(
             saved_query_uuid = uuid.UUID(payload.saved_query_id)
         except ValueError as exc:
             raise HTTPException(status_code=400, detail="Invalid saved_query_id") from exc
-        saved_query = (
-            db.query(SavedQuery)
-            .filter(
+        saved_query = await db.scalar(
+            select(SavedQuery).where(
                 SavedQuery.id == saved_query_uuid,
                 SavedQuery.workspace_id == workspace_ctx.workspace.id,
             )
-            .first()
         )
         if not saved_query:
             raise HTTPException(status_code=404, detail="Saved query not found")
@@ -204,6 +209,6 @@ def create_dashboard_widget(
         config=payload.config,
     )
     db.add(widget)
-    db.commit()
-    db.refresh(widget)
+    await db.commit()
+    await db.refresh(widget)
     return {"id": str(widget.id)}
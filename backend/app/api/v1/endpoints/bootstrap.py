@@ -0,0 +1,171 @@
+import asyncio
+from datetime import date, timedelta
+import json
+from typing import Any, Awaitable, Callable, Optional
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api import deps
+from app.api.v1.endpoints import auth, integrations, metrics, onboarding, workspaces
+from app.services.metrics_cache import cached_json_body, conditional_json_response
+from app.services.metrics_service import MAX_RANGE_DAYS, resolve_daily_metrics
+
+router = APIRouter()
+
+BOOTSTRAP_SECTIONS = ("session", "workspaces", "summary", "daily", "integrations", "onboarding")
+
+
+def _sync_section(
+    session_factory: sessionmaker,
+    workspace_ctx: deps.WorkspaceContext,
+    handler: Callable[[Session, deps.WorkspaceContext], Any],
+) -> Callable[[], Awaitable[Any]]:
+    """
+    Run a sync handler on its own session in a worker thread. The resolved
+    context is merged into that session so nothing lazy-loads through the
+    request's session from another thread.
+    """
+
+    def run() -> Any:
+        db = session_factory()
+        try:
+            ctx = deps.WorkspaceContext(
+                workspace=db.merge(workspace_ctx.workspace, load=False),
+                membership=db.merge(workspace_ctx.membership, load=False),
+                role=workspace_ctx.role,
+            )
+            return handler(db, ctx)
+        finally:
+            db.close()
+
+    return lambda: asyncio.to_thread(run)
+
+
+def _cached_section(
+    read_session_factory: async_sessionmaker,
+    primary_session_factory: async_sessionmaker,
+    workspace_id: uuid.UUID,
+    endpoint: str,
+    params: dict[str, Any],
+    handler: Callable[[AsyncSession], Awaitable[Any]],
+) -> Callable[[], Awaitable[Any]]:
+    """A metrics section read through the same cache entry as its /metrics endpoint."""
+
+    async def run() -> Any:
+        async with read_session_factory() as read_db, primary_session_factory() as primary_db:
+            body, _ = await cached_json_body(workspace_id, endpoint, params, handler, read_db, primary_db)
+        return json.loads(body)
+
+    return run
+
+
+async def _settle(section: Callable[[], Awaitable[Any]]) -> tuple[Any, Optional[dict[str, Any]]]:
+    try:
+        return await section(), None
+    except HTTPException as exc:
+        return None, {"status_code": exc.status_code, "detail": exc.detail}
+    except Exception:
+        return None, {"status_code": 500, "detail": "Section failed to load"}
+
+
+async def _summary(db: AsyncSession, workspace_id: uuid.UUID, yesterday: date, compare_to: date) -> Any:
+    summary = await metrics.build_summary(
+        db,
+        workspace_id,
+        yesterday,
+        compare_to,
+        [],
+        use_snapshot=True,
+    )
+    return summary.model_dump(mode="json")
+
+
+@router.get("/")
+async def get_bootstrap(
+    request: Request,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated sections to include (default: all): " + ", ".join(BOOTSTRAP_SECTIONS),
+    ),
+    start_date: Optional[date] = Query(None, description="Daily series start (default: 7 days ending yesterday)"),
+    end_date: Optional[date] = Query(None, description="Daily series end (default: yesterday)"),
+    session_factory: sessionmaker = Depends(deps.get_session_factory),
+    read_session_factory: async_sessionmaker = Depends(deps.get_async_read_session_factory),
+    primary_session_factory: async_sessionmaker = Depends(deps.get_async_analytics_session_factory),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
+) -> Any:
+    """
+    Everything the dashboard landing needs in one round trip. Identity and
+    workspace are resolved once; sections load concurrently on separate
+    sessions and fail independently, reported under "errors".
+    """
+    requested = list(dict.fromkeys(name.strip() for name in (fields or "").split(",") if name.strip()))
+    requested = requested or list(BOOTSTRAP_SECTIONS)
+    unknown = sorted(set(requested) - set(BOOTSTRAP_SECTIONS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {', '.join(unknown)}")
+
+    yesterday = date.today() - timedelta(days=1)
+    end_date = end_date or yesterday
+    start_date = start_date or end_date - timedelta(days=6)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be <= end_date")
+    max_days = MAX_RANGE_DAYS["day"]
+    if (end_date - start_date).days > max_days:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {max_days} days")
+
+    workspace_id = workspace_ctx.workspace.id
+    compare_to = yesterday - timedelta(days=1)
+    daily_metrics = resolve_daily_metrics(None)
+    sections: dict[str, Callable[[], Awaitable[Any]]] = {
+        "session": _sync_section(
+            session_factory,
+            workspace_ctx,
+            lambda db, ctx: auth.get_auth_session(db=db, current_user=ctx.membership.user),
+        ),
+        "workspaces": _sync_section(
+            session_factory,
+            workspace_ctx,
+            lambda db, ctx: workspaces.list_workspaces(db=db, current_user=ctx.membership.user),
+        ),
+        "integrations": _sync_section(
+            session_factory,
+            workspace_ctx,
+            lambda db, ctx: integrations.list_integrations(db=db, workspace_ctx=ctx),
+        ),
+        "onboarding": _sync_section(
+            session_factory,
+            workspace_ctx,
+            lambda db, ctx: onboarding.get_onboarding_status(db=db, workspace_ctx=ctx).model_dump(mode="json"),
+        ),
+        "summary": _cached_section(
+            read_session_factory,
+            primary_session_factory,
+            workspace_id,
+            "summary",
+            metrics.summary_cache_params(yesterday, compare_to, []),
+            lambda db: _summary(db, workspace_id, yesterday, compare_to),
+        ),
+        "daily": _cached_section(
+            read_session_factory,
+            primary_session_factory,
+            workspace_id,
+            "daily",
+            metrics.daily_cache_params(start_date, end_date, daily_metrics, "day"),
+            lambda db: metrics.build_daily(db, workspace_id, start_date, end_date, daily_metrics),
+        ),
+    }
+
+    results = await asyncio.gather(*(_settle(sections[name]) for name in requested))
+    payload: dict[str, Any] = {"workspace_id": str(workspace_id), "errors": {}}
+    for name, (data, error) in zip(requested, results):
+        payload[name] = data
+        if error is not None:
+            payload["errors"][name] = error
+    body = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+    return conditional_json_response(request, body)
+
@@ -1,11 +1,12 @@
+import asyncio
 import time
 from typing import Any, Optional
 import uuid
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
 from app.models.chat_history import ChatHistory
@@ -41,8 +42,8 @@ def _build_chart_spec(data: list[dict[str, Any]]) -> Optional[dict[str, Any]]:
     return None
 
 
-def _save_chat_history(
-    db: Session,
+async def _save_chat_history(
+    db: AsyncSession,
     workspace_id: uuid.UUID,
     user_id: uuid.UUID,
     query: str,
@@ -63,17 +64,18 @@ def _save_chat_history(
                 execution_time_ms=execution_ms,
             )
         )
-        db.commit()
+        await db.commit()
     except Exception:
-        db.rollback()
+        await db.rollback()
 
 
 @router.post("/query", response_model=ChatResponse)
-def chat_query(
+async def chat_query(
     request: ChatRequest,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
-    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_workspace_context),
+    db: AsyncSession = Depends(deps.get_async_db),
+    read_db: AsyncSession = Depends(deps.get_async_read_db),
+    current_user: User = Depends(deps.get_async_current_user),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
 ) -> Any:
     question = request.question.strip()
     start_time = time.time()
@@ -82,6 +84,10 @@ def chat_query(
         raise HTTPException(status_code=403, detail="workspace_id does not match selected workspace context")
     workspace_id = request.workspace_id or str(workspace_ctx.workspace.id)
 
+    # Auth and the chat history write share this session; hand its connection back
+    # for the LLM round trip; _save_chat_history checks one out again.
+    await db.close()
+
     # Keep prompt constraints explicit for better SQL generation determinism.
     scoped_question = (
         f"{question}\n"
@@ -90,7 +96,8 @@ def chat_query(
     )
 
     try:
-        sql_query = vn.generate_sql(scoped_question)
+        # LLM round trip is blocking; run it off the event loop.
+        sql_query = await asyncio.to_thread(vn.generate_sql, scoped_question)
         if not sql_query or not sql_query.strip():
             raise HTTPException(status_code=422, detail="Unable to generate SQL for this question.")
 
@@ -100,10 +107,11 @@ def chat_query(
             max_rows=200,
         )
 
-        rows = db.execute(
+        result = await read_db.execute(
             text(validated.sql),
             {"workspace_id": workspace_id},
-        ).mappings().all()
+        )
+        rows = result.mappings().all()
         data_preview = [dict(row) for row in rows]
         execution_ms = int((time.time() - start_time) * 1000)
 
@@ -116,7 +124,7 @@ def chat_query(
         provenance = [f"table:{name}" for name in validated.source_tables]
         confidence = 0.9 if data_preview else 0.75
 
-        _save_chat_history(
+        await _save_chat_history(
             db=db,
             workspace_id=workspace_ctx.workspace.id,
             user_id=current_user.id,
@@ -140,7 +148,7 @@ def chat_query(
     except SQLValidationError as exc:
         execution_ms = int((time.time() - start_time) * 1000)
         message = str(exc)
-        _save_chat_history(
+        await _save_chat_history(
             db=db,
             workspace_id=workspace_ctx.workspace.id,
             user_id=current_user.id,
@@ -162,7 +170,7 @@ def chat_query(
     except Exception as exc:
         execution_ms = int((time.time() - start_time) * 1000)
         message = str(exc)
-        _save_chat_history(
+        await _save_chat_history(
             db=db,
             workspace_id=workspace_ctx.workspace.id,
             user_id=current_user.id,
@@ -197,26 +205,26 @@ class ChatHistoryResponse(BaseModel):
 
 
 @router.get("/history", response_model=ChatHistoryResponse)
-def get_chat_history(
+async def get_chat_history(
     limit: int = 50,
     offset: int = 0,
-    db: Session = Depends(deps.get_db),
-    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_workspace_context),
+    db: AsyncSession = Depends(deps.get_async_read_db),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
 ) -> Any:
-    total = (
-        db.query(ChatHistory)
-        .filter(ChatHistory.workspace_id == workspace_ctx.workspace.id)
-        .count()
-    )
-
-    records = (
-        db.query(ChatHistory)
-        .filter(ChatHistory.workspace_id == workspace_ctx.workspace.id)
+    total = await db.scalar(
+        select(func.count())
+        .select_from(ChatHistory)
+        .where(ChatHistory.workspace_id == workspace_ctx.workspace.id)
+    ) or 0
+
+    result = await db.execute(
+        select(ChatHistory)
+        .where(ChatHistory.workspace_id == workspace_ctx.workspace.id)
         .order_by(ChatHistory.created_at.desc())
         .offset(offset)
         .limit(limit)
-        .all()
     )
+    records = result.scalars().all()
 
     queries = [
         ChatHistoryItem(
@@ -5,8 +5,10 @@ from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from pydantic import BaseModel, HttpUrl
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api import deps
@@ -18,12 +20,26 @@ from app.services.oauth_service import (
     build_authorization_url,
     decode_oauth_state,
     exchange_code_for_token,
+    external_account_key,
     generate_oauth_state,
     verify_shopify_oauth_callback_signature,
     verify_shopify_webhook_signature,
     verify_stripe_webhook_signature,
 )
-from app.services.sync_service import create_sync_job, enqueue_sync_job, get_latest_sync_job
+from app.services.sync_events import (
+    close_subscription,
+    open_subscription,
+    stream_sync_events,
+    sync_event_payload,
+)
+from app.services.sync_service import (
+    create_sync_job,
+    enqueue_sync_job,
+    get_latest_sync_job,
+    get_latest_sync_jobs,
+)
+from app.services.webhook_dedup import claim_webhook_event_async, release_webhook_event_async
+from app.services.webhook_inbox import kick_webhook_inbox, record_webhook_event
 
 router = APIRouter()
 
@@ -67,6 +83,7 @@ def _serialize_sync_job(sync_job: SyncJob | None) -> dict[str, Any] | None:
         "id": str(sync_job.id),
         "status": sync_job.status,
         "trigger_type": sync_job.trigger_type,
+        "trigger_count": sync_job.trigger_count,
         "requested_at": sync_job.requested_at.isoformat() if sync_job.requested_at else None,
         "started_at": sync_job.started_at.isoformat() if sync_job.started_at else None,
         "finished_at": sync_job.finished_at.isoformat() if sync_job.finished_at else None,
@@ -116,9 +133,10 @@ def list_integrations(
         .order_by(Integration.connected_at.desc())
         .all()
     )
+    latest_sync_jobs = get_latest_sync_jobs(db, [integration.id for integration in integrations])
     payload = []
     for integration in integrations:
-        latest_sync_job = get_latest_sync_job(db, integration.id)
+        latest_sync_job = latest_sync_jobs.get(integration.id)
         payload.append(
             {
                 "id": str(integration.id),
@@ -210,7 +228,7 @@ async def oauth_callback(
     code: Optional[str] = Query(default=None),
     shop: Optional[str] = Query(default=None),
     error: Optional[str] = Query(default=None),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
 ) -> Any:
     provider_key = _validate_provider(provider)
 
@@ -221,14 +239,12 @@ async def oauth_callback(
     except (ValueError, KeyError) as exc:
         raise HTTPException(status_code=400, detail="Invalid OAuth state token") from exc
 
-    integration = (
-        db.query(Integration)
-        .filter(
+    integration = await db.scalar(
+        select(Integration).where(
             Integration.id == integration_id,
             Integration.workspace_id == workspace_id,
             Integration.platform == provider_key,
         )
-        .first()
     )
     if not integration:
         raise HTTPException(status_code=404, detail="Integration not found for OAuth callback")
@@ -239,7 +255,7 @@ async def oauth_callback(
             **(integration.metadata_config or {}),
             "oauth_error": f"provider_error:{error}",
         }
-        db.commit()
+        await db.commit()
         redirect_response = _build_oauth_redirect(
             integration,
             provider=provider_key,
@@ -262,7 +278,7 @@ async def oauth_callback(
                 **(integration.metadata_config or {}),
                 "oauth_error": "Invalid Shopify OAuth callback signature",
             }
-            db.commit()
+            await db.commit()
             redirect_response = _build_oauth_redirect(
                 integration,
                 provider=provider_key,
@@ -281,7 +297,7 @@ async def oauth_callback(
             **(integration.metadata_config or {}),
             "oauth_error": "State hash mismatch",
         }
-        db.commit()
+        await db.commit()
         redirect_response = _build_oauth_redirect(
             integration,
             provider=provider_key,
@@ -306,7 +322,7 @@ async def oauth_callback(
             **(integration.metadata_config or {}),
             "oauth_error": str(exc),
         }
-        db.commit()
+        await db.commit()
         redirect_response = _build_oauth_redirect(
             integration,
             provider=provider_key,
@@ -321,6 +337,7 @@ async def oauth_callback(
     integration.refresh_token = token_result.refresh_token
     integration.token_expires_at = token_result.expires_at
     integration.account_id = token_result.account_id
+    integration.external_account_key = external_account_key(provider_key, token_result.account_id, shop_domain)
     integration.status = "active"
     integration.connected_at = datetime.now(timezone.utc)
     integration.metadata_config = {
@@ -330,7 +347,7 @@ async def oauth_callback(
         "oauth_token_response": _sanitize_token_payload(token_result.raw),
         "shop_domain": shop_domain,
     }
-    db.commit()
+    await db.commit()
 
     redirect_response = _build_oauth_redirect(
         integration,
@@ -409,10 +426,7 @@ def trigger_sync(
         requested_by_user_id=workspace_ctx.membership.user_id,
     )
     integration.status = "sync_queued"
-    db.commit()
-    db.refresh(integration)
-    db.refresh(sync_job)
-
+    # The job, its outbox row and the integration status commit together.
     sync_job = enqueue_sync_job(db, sync_job)
     response_status = "sync_started" if sync_job.status != "failed" else "sync_failed"
 
@@ -424,6 +438,45 @@ def trigger_sync(
     }
 
 
+def _current_sync_states(db: Session, workspace_id: uuid.UUID) -> list[dict[str, Any]]:
+    integration_ids = [
+        integration_id
+        for (integration_id,) in db.query(Integration.id).filter(Integration.workspace_id == workspace_id).all()
+    ]
+    return [sync_event_payload(sync_job) for sync_job in get_latest_sync_jobs(db, integration_ids).values()]
+
+
+@router.get("/sync-jobs/stream")
+async def stream_sync_jobs(
+    db: AsyncSession = Depends(deps.get_async_db),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
+) -> Any:
+    """
+    Server-sent events for the workspace's sync jobs: the latest job of each
+    integration first, then every state transition as run_sync_job makes it.
+    """
+    workspace_id = workspace_ctx.workspace.id
+    try:
+        subscription = await open_subscription(workspace_id)
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail="Sync event stream unavailable") from exc
+
+    try:
+        initial = await db.run_sync(_current_sync_states, workspace_id)
+    except Exception:
+        await close_subscription(subscription)
+        raise
+    finally:
+        # The stream outlives the handler; hand the pooled connection back now.
+        await db.close()
+
+    return StreamingResponse(
+        stream_sync_events(subscription, initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/sync-jobs/{sync_job_id}")
 def get_sync_job(
     sync_job_id: str,
@@ -444,10 +497,44 @@ def get_sync_job(
     return _serialize_sync_job(sync_job)
 
 
+# Redeliveries of an event id already claimed are acknowledged so the provider stops retrying.
+_DUPLICATE_WEBHOOK_RESPONSE = {"received": True, "duplicate": True}
+
+
+async def _accept_webhook(
+    db: AsyncSession,
+    provider: str,
+    payload: bytes,
+    event_id: Optional[str],
+    topic: Optional[str],
+    account_key: Optional[str],
+) -> dict[str, Any]:
+    """
+    Persist a verified event to the inbox in one insert and wake the consumer;
+    routing and sync jobs happen in process_webhook_inbox, off the request path.
+    """
+    if not await claim_webhook_event_async(provider, event_id):
+        return _DUPLICATE_WEBHOOK_RESPONSE
+    try:
+        event = await record_webhook_event(
+            db,
+            provider,
+            payload,
+            event_id=event_id,
+            topic=topic,
+            account_key=account_key,
+        )
+    except Exception:
+        await release_webhook_event_async(provider, event_id)
+        raise
+    await kick_webhook_inbox()
+    return {"received": True, "inbox_id": str(event.id)}
+
+
 @router.post("/webhooks/stripe")
 async def stripe_webhook(
     request: Request,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
 ) -> Any:
     payload = await request.body()
     signature = request.headers.get("Stripe-Signature", "")
@@ -458,41 +545,25 @@ async def stripe_webhook(
         raise HTTPException(status_code=400, detail="Invalid Stripe webhook signature")
 
     event = await request.json()
+    # Connect events carry the connected account; platform events fan out to every active integration.
     account = event.get("account")
     if not account:
         account = ((event.get("data") or {}).get("object") or {}).get("account")
 
-    query = db.query(Integration).filter(
-        Integration.platform == "stripe",
-        Integration.status == "active",
+    return await _accept_webhook(
+        db,
+        "stripe",
+        payload,
+        event_id=event.get("id"),
+        topic=event.get("type"),
+        account_key=external_account_key("stripe", account),
     )
-    if account:
-        query = query.filter(Integration.account_id == account)
-    integrations = query.all()
-
-    queued_jobs = []
-    for integration in integrations:
-        if not integration.workspace_id:
-            continue
-        sync_job = create_sync_job(
-            db=db,
-            workspace_id=integration.workspace_id,
-            integration=integration,
-            trigger_type="webhook",
-            requested_by_user_id=None,
-        )
-        db.commit()
-        db.refresh(sync_job)
-        sync_job = enqueue_sync_job(db, sync_job)
-        queued_jobs.append(str(sync_job.id))
-
-    return {"received": True, "queued_jobs": queued_jobs}
 
 
 @router.post("/webhooks/shopify")
 async def shopify_webhook(
     request: Request,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
 ) -> Any:
     payload = await request.body()
     signature = request.headers.get("X-Shopify-Hmac-Sha256", "")
@@ -502,37 +573,15 @@ async def shopify_webhook(
     if not verify_shopify_webhook_signature(payload, signature, secret):
         raise HTTPException(status_code=400, detail="Invalid Shopify webhook signature")
 
-    shop_domain = request.headers.get("X-Shopify-Shop-Domain")
-    integrations = (
-        db.query(Integration)
-        .filter(
-            Integration.platform == "shopify",
-            Integration.status == "active",
-        )
-        .all()
+    return await _accept_webhook(
+        db,
+        "shopify",
+        payload,
+        event_id=request.headers.get("X-Shopify-Webhook-Id"),
+        topic=request.headers.get("X-Shopify-Topic"),
+        account_key=external_account_key("shopify", None, request.headers.get("X-Shopify-Shop-Domain")),
     )
 
-    queued_jobs = []
-    for integration in integrations:
-        metadata = integration.metadata_config or {}
-        if shop_domain and integration.account_id != shop_domain and metadata.get("shop_domain") != shop_domain:
-            continue
-        if not integration.workspace_id:
-            continue
-        sync_job = create_sync_job(
-            db=db,
-            workspace_id=integration.workspace_id,
-            integration=integration,
-            trigger_type="webhook",
-            requested_by_user_id=None,
-        )
-        db.commit()
-        db.refresh(sync_job)
-        sync_job = enqueue_sync_job(db, sync_job)
-        queued_jobs.append(str(sync_job.id))
-
-    return {"received": True, "queued_jobs": queued_jobs}
-
 
 @router.post("/connect/{platform}")
 def legacy_connect_alias(
@@ -638,8 +687,6 @@ def legacy_sync(
         trigger_type="manual",
         requested_by_user_id=workspace_ctx.membership.user_id,
     )
-    db.commit()
-    db.refresh(sync_job)
     sync_job = enqueue_sync_job(db, sync_job)
     response_status = "sync_started" if sync_job.status != "failed" else "sync_failed"
     return {
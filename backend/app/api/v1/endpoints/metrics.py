@@ -1,203 +1,319 @@
 from typing import Any, Optional
 from datetime import date, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
-from app.models.financial_data import FinancialData
+from app.models.kpi_snapshot import WorkspaceKpiSnapshot
+from app.models.workspace import Workspace
+from app.models.workspace_membership import WorkspaceMembership
 from app.schemas.metrics import (
     MetricsSummaryResponse,
     DailyMetricsResponse,
-    DailyMetricRow,
-    DailyMetricsSummary,
-    TopExpense,
+    KpiSnapshotResponse,
+    OrganizationMetricsResponse,
+    PeriodComparisonResponse,
+    SummaryComparison,
+)
+from app.services.kpi_snapshot_service import build_kpi_snapshot
+from app.services.metrics_cache import cached_json_response
+from app.services.metrics_service import (
+    DAILY_METRICS,
+    MAX_PERIODS,
+    MAX_RANGE_DAYS,
+    PERIOD_PRESETS,
+    SUMMARY_COMPARISON_PRESETS,
+    daily_series_payload,
+    daily_source_columns,
+    daily_statement,
+    net_profit_change_pct,
+    organization_series_payload,
+    organization_series_statement,
+    period_ranges,
+    periods_from_rows,
+    periods_statement,
+    resolve_comparison_dates,
+    resolve_daily_metrics,
+    summaries_from_rows,
+    summary_payload,
+    summary_statement,
 )
 
 router = APIRouter()
 
 
-def _compute_summary_for_date(db: Session, workspace_id: str, target_date: date) -> dict:
-    """Compute financial summary for a single date."""
-    record = (
-        db.query(FinancialData)
-        .filter(FinancialData.workspace_id == workspace_id, FinancialData.date == target_date)
-        .first()
-    )
-    if not record:
-        return None
-
-    revenue_gross = float(record.revenue_gross or 0)
-    revenue_net = float(record.revenue_net or 0)
-    cost_ads_meta = float(record.cost_ads_meta or 0)
-    cost_ads_google = float(record.cost_ads_google or 0)
-    cost_transaction_fees = float(record.cost_transaction_fees or 0)
-    cost_fixed_allocated = float(record.cost_fixed_allocated or 0)
-    cost_variable = float(record.cost_variable or 0)
-
-    total_expenses = cost_ads_meta + cost_ads_google + cost_transaction_fees + cost_fixed_allocated + cost_variable
-    net_profit = revenue_net - total_expenses
-    total_ads = cost_ads_meta + cost_ads_google
-    roas = revenue_gross / total_ads if total_ads > 0 else None
-
-    # Determine top expense
-    expenses = {
-        "Meta Ads": cost_ads_meta,
-        "Google Ads": cost_ads_google,
-        "Transaction Fees": cost_transaction_fees,
-        "Fixed Costs": cost_fixed_allocated,
-        "Variable Costs": cost_variable,
-    }
-    top_exp_category = max(expenses, key=expenses.get)
-    top_exp_amount = expenses[top_exp_category]
-
-    return {
-        "date": target_date,
-        "net_profit": round(net_profit, 2),
-        "revenue_gross": round(revenue_gross, 2),
-        "revenue_net": round(revenue_net, 2),
-        "total_expenses": round(total_expenses, 2),
-        "top_expense": TopExpense(category=top_exp_category, amount=round(top_exp_amount, 2)),
-        "roas": round(roas, 2) if roas is not None else None,
-        "transactions_count": record.transactions_count or 0,
-    }
+# Cache parameters are shared with /bootstrap so both read and fill the same entries.
+def summary_cache_params(target_date: date, compare_to: date, extra_comparisons: list[tuple[str, date]]) -> dict[str, Any]:
+    return {"date": target_date, "compare_to": compare_to, "comparisons": extra_comparisons}
+
+
+def daily_cache_params(start_date: date, end_date: date, selected: list[str], granularity: str) -> dict[str, Any]:
+    return {"start_date": start_date, "end_date": end_date, "metrics": selected, "granularity": granularity}
 
 
 @router.get("/summary", response_model=MetricsSummaryResponse)
-def get_metrics_summary(
+async def get_metrics_summary(
+    request: Request,
     target_date: Optional[date] = Query(None, alias="date", description="Date to get summary for (default: yesterday)"),
     compare_to: Optional[date] = Query(None, description="Date to compare against"),
-    db: Session = Depends(deps.get_db),
-    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_workspace_context),
+    comparisons: Optional[str] = Query(
+        None,
+        description=(
+            "Comma-separated extra comparison dates (YYYY-MM-DD) or presets: "
+            + ", ".join(SUMMARY_COMPARISON_PRESETS)
+        ),
+    ),
+    db: AsyncSession = Depends(deps.get_async_read_db),
+    primary_db: AsyncSession = Depends(deps.get_async_analytics_db),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
 ) -> Any:
     """Get daily financial summary with optional comparison."""
+    use_snapshot = target_date is None and compare_to is None and not comparisons
     if target_date is None:
         target_date = date.today() - timedelta(days=1)
 
-    try:
-        summary = _compute_summary_for_date(db, str(workspace_ctx.workspace.id), target_date)
-    except Exception:
-        summary = None
-
-    if summary is None:
-        # Return zeroed-out summary if no data exists for date
-        return MetricsSummaryResponse(
-            date=target_date,
-            net_profit=0,
-            revenue_gross=0,
-            revenue_net=0,
-            total_expenses=0,
-            transactions_count=0,
-            insight="No data available for this date. Connect your integrations to start tracking.",
-        )
-
     # Compute change percentage if compare_to provided (or default to previous day)
     if compare_to is None:
         compare_to = target_date - timedelta(days=1)
 
     try:
-        compare_summary = _compute_summary_for_date(db, str(workspace_ctx.workspace.id), compare_to)
-    except Exception:
-        compare_summary = None
+        extra_comparisons = resolve_comparison_dates(target_date, (comparisons or "").split(","))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid comparisons value: {exc}") from exc
 
-    change_pct = None
-    if compare_summary and compare_summary["net_profit"] != 0:
-        change_pct = round(
-            ((summary["net_profit"] - compare_summary["net_profit"]) / abs(compare_summary["net_profit"])) * 100,
-            1,
+    async def compute(session: AsyncSession) -> Any:
+        summary = await build_summary(
+            session,
+            workspace_ctx.workspace.id,
+            target_date,
+            compare_to,
+            extra_comparisons,
+            use_snapshot,
         )
+        return summary.model_dump(mode="json")
+
+    return await cached_json_response(
+        request,
+        workspace_ctx.workspace.id,
+        "summary",
+        summary_cache_params(target_date, compare_to, extra_comparisons),
+        compute,
+        db,
+        primary_db,
+    )
 
-    # Generate a simple insight
-    insight = None
-    if change_pct is not None:
-        if change_pct > 0:
-            insight = f"Your net profit is up {change_pct}% compared to the previous day. Keep it up!"
-        elif change_pct < 0:
-            top = summary["top_expense"]
-            insight = f"Profit dipped {abs(change_pct)}%. Your largest expense was {top.category} at ${top.amount:,.2f}."
-        else:
-            insight = "Profit is flat compared to the previous day."
+
+async def build_summary(
+    db: AsyncSession,
+    workspace_id: uuid.UUID,
+    target_date: date,
+    compare_to: date,
+    extra_comparisons: list[tuple[str, date]],
+    use_snapshot: bool,
+) -> MetricsSummaryResponse:
+    if use_snapshot:
+        # Default landing view: served from the snapshot written by the last sync.
+        snapshot = await db.get(WorkspaceKpiSnapshot, workspace_id)
+        if snapshot is not None and snapshot.as_of == target_date:
+            return MetricsSummaryResponse(**snapshot.payload["summary"])
+
+    # Target, primary comparison and every extra comparison in one round trip.
+    dates = [target_date, compare_to, *(day for _, day in extra_comparisons)]
+    try:
+        result = await db.execute(summary_statement(workspace_id, dates))
+        summaries = summaries_from_rows(result.all())
+    except Exception:
+        summaries = {}
+
+    summary = summaries.get(target_date)
+    comparison_rows = [
+        SummaryComparison(
+            label=label,
+            date=day,
+            has_data=day in summaries,
+            net_profit=summaries[day]["net_profit"] if day in summaries else None,
+            revenue_net=summaries[day]["revenue_net"] if day in summaries else None,
+            total_expenses=summaries[day]["total_expenses"] if day in summaries else None,
+            net_profit_change_pct=net_profit_change_pct(summary, summaries.get(day)) if summary else None,
+        )
+        for label, day in extra_comparisons
+    ]
 
     return MetricsSummaryResponse(
-        **summary,
-        net_profit_change_pct=change_pct,
-        insight=insight,
+        **summary_payload(target_date, compare_to, summaries),
+        comparisons=comparison_rows,
+    )
+
+
+@router.get("/snapshot", response_model=KpiSnapshotResponse)
+async def get_metrics_snapshot(
+    db: AsyncSession = Depends(deps.get_async_read_db),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
+) -> Any:
+    """Landing KPIs: yesterday's summary plus 7/30/90-day totals, trend and top expense."""
+    yesterday = date.today() - timedelta(days=1)
+    snapshot = await db.get(WorkspaceKpiSnapshot, workspace_ctx.workspace.id)
+    if snapshot is not None and snapshot.as_of == yesterday:
+        return KpiSnapshotResponse(**snapshot.payload, computed_at=snapshot.computed_at)
+
+    # No sync since yesterday closed: compute live without persisting (this may be a replica).
+    payload = await db.run_sync(build_kpi_snapshot, workspace_ctx.workspace.id, yesterday)
+    return KpiSnapshotResponse(**payload)
+
+
+@router.get("/periods", response_model=PeriodComparisonResponse)
+async def get_metrics_periods(
+    request: Request,
+    preset: str = Query("last_7_days", description="Period shape: " + ", ".join(PERIOD_PRESETS)),
+    periods: int = Query(2, ge=1, le=MAX_PERIODS, description="Number of periods, current one included"),
+    as_of: Optional[date] = Query(None, description="Last day of the current period (default: yesterday)"),
+    db: AsyncSession = Depends(deps.get_async_read_db),
+    primary_db: AsyncSession = Depends(deps.get_async_analytics_db),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
+) -> Any:
+    """Period-over-period totals (e.g. last 7 days vs the 7 before), aggregated in one query."""
+    if as_of is None:
+        as_of = date.today() - timedelta(days=1)
+    try:
+        ranges = period_ranges(preset, as_of, periods)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    async def compute(session: AsyncSession) -> Any:
+        try:
+            result = await session.execute(periods_statement(workspace_ctx.workspace.id, ranges))
+            rows = result.all()
+        except Exception:
+            rows = []
+        response = PeriodComparisonResponse(preset=preset, as_of=as_of, periods=periods_from_rows(rows, ranges))
+        return response.model_dump(mode="json")
+
+    return await cached_json_response(
+        request,
+        workspace_ctx.workspace.id,
+        "periods",
+        {"preset": preset, "periods": periods, "as_of": as_of},
+        compute,
+        db,
+        primary_db,
+    )
+
+
+@router.get("/organization", response_model=OrganizationMetricsResponse)
+async def get_organization_metrics(
+    start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
+    granularity: str = Query("day", description="Bucket size: " + ", ".join(MAX_RANGE_DAYS)),
+    organization_id: Optional[str] = Query(None, description="Defaults to the current workspace's organization"),
+    db: AsyncSession = Depends(deps.get_async_read_db),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
+) -> Any:
+    """Per-workspace and combined series across every workspace of an organization the caller belongs to."""
+    if granularity not in MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Unknown granularity: {granularity}")
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be <= end_date")
+    max_days = MAX_RANGE_DAYS[granularity]
+    if (end_date - start_date).days > max_days:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {max_days} days")
+
+    if organization_id is None:
+        organization_uuid = workspace_ctx.workspace.organization_id
+    else:
+        try:
+            organization_uuid = uuid.UUID(organization_id)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail="Invalid organization_id") from exc
+
+    result = await db.execute(
+        select(Workspace.id, Workspace.name)
+        .join(WorkspaceMembership, WorkspaceMembership.workspace_id == Workspace.id)
+        .where(
+            Workspace.organization_id == organization_uuid,
+            WorkspaceMembership.user_id == workspace_ctx.membership.user_id,
+        )
+        .order_by(Workspace.created_at.asc())
+    )
+    workspaces = {workspace_id: name for workspace_id, name in result.all()}
+    if not workspaces:
+        raise HTTPException(status_code=404, detail="Organization not found")
+
+    try:
+        result = await db.execute(organization_series_statement(list(workspaces), start_date, end_date, granularity))
+        rows = result.all()
+    except Exception:
+        rows = []
+
+    return OrganizationMetricsResponse(
+        organization_id=organization_uuid,
+        granularity=granularity,
+        start_date=start_date,
+        end_date=end_date,
+        **organization_series_payload(rows, workspaces),
     )
 
 
 @router.get("/daily", response_model=DailyMetricsResponse)
-def get_metrics_daily(
+async def get_metrics_daily(
+    request: Request,
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
-    metrics: Optional[str] = Query(None, description="Comma-separated metric names to include"),
-    db: Session = Depends(deps.get_db),
-    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_workspace_context),
+    metrics: Optional[str] = Query(
+        None,
+        description="Comma-separated metric names to include: " + ", ".join(DAILY_METRICS),
+    ),
+    granularity: str = Query(
+        "day",
+        description="Bucket size: " + ", ".join(MAX_RANGE_DAYS) + ". Coarser buckets are read from rollup tables.",
+    ),
+    db: AsyncSession = Depends(deps.get_async_read_db),
+    primary_db: AsyncSession = Depends(deps.get_async_analytics_db),
+    workspace_ctx: deps.WorkspaceContext = Depends(deps.get_async_workspace_context),
 ) -> Any:
     """Get time-series financial data for charting."""
+    if granularity not in MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Unknown granularity: {granularity}")
     if start_date > end_date:
         raise HTTPException(status_code=400, detail="start_date must be <= end_date")
-    if (end_date - start_date).days > 366:
-        raise HTTPException(status_code=400, detail="Date range cannot exceed 366 days")
+    max_days = MAX_RANGE_DAYS[granularity]
+    if (end_date - start_date).days > max_days:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {max_days} days")
 
     try:
-        records = (
-            db.query(FinancialData)
-            .filter(
-                FinancialData.workspace_id == workspace_ctx.workspace.id,
-                FinancialData.date >= start_date,
-                FinancialData.date <= end_date,
-            )
-            .order_by(FinancialData.date.asc())
-            .all()
-        )
-    except Exception:
-        records = []
-
-    data = []
-    total_profit = 0.0
-    for r in records:
-        revenue_net = float(r.revenue_net or 0)
-        expenses = sum(
-            float(getattr(r, c) or 0)
-            for c in ["cost_ads_meta", "cost_ads_google", "cost_transaction_fees", "cost_fixed_allocated", "cost_variable"]
-        )
-        np = revenue_net - expenses
-        total_profit += np
-
-        row = DailyMetricRow(
-            date=r.date,
-            net_profit=round(np, 2),
-            revenue_gross=round(float(r.revenue_gross or 0), 2),
-            revenue_net=round(revenue_net, 2),
-            cost_ads_meta=round(float(r.cost_ads_meta or 0), 2),
-            cost_ads_google=round(float(r.cost_ads_google or 0), 2),
-            cost_transaction_fees=round(float(r.cost_transaction_fees or 0), 2),
-            cost_fixed_allocated=round(float(r.cost_fixed_allocated or 0), 2),
-            cost_variable=round(float(r.cost_variable or 0), 2),
-        )
-        data.append(row)
-
-    count = len(data)
-    avg = round(total_profit / count, 2) if count > 0 else 0
-
-    # Determine trend from first vs last half
-    if count >= 2:
-        mid = count // 2
-        first_half_avg = sum(d.net_profit or 0 for d in data[:mid]) / mid
-        second_half_avg = sum(d.net_profit or 0 for d in data[mid:]) / (count - mid)
-        if second_half_avg > first_half_avg * 1.05:
-            trend = "up"
-        elif second_half_avg < first_half_avg * 0.95:
-            trend = "down"
-        else:
-            trend = "flat"
-    else:
-        trend = "flat"
-
-    return DailyMetricsResponse(
-        data=data,
-        summary=DailyMetricsSummary(
-            total_profit=round(total_profit, 2),
-            avg_daily_profit=avg,
-            trend=trend,
-        ),
+        selected = resolve_daily_metrics(metrics)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    async def compute(session: AsyncSession) -> Any:
+        return await build_daily(session, workspace_ctx.workspace.id, start_date, end_date, selected, granularity)
+
+    return await cached_json_response(
+        request,
+        workspace_ctx.workspace.id,
+        "daily",
+        daily_cache_params(start_date, end_date, selected, granularity),
+        compute,
+        db,
+        primary_db,
     )
+
+
+async def build_daily(
+    db: AsyncSession,
+    workspace_id: uuid.UUID,
+    start_date: date,
+    end_date: date,
+    selected: list[str],
+    granularity: str = "day",
+) -> dict[str, Any]:
+    # Only the columns the selected series depend on are read.
+    columns = daily_source_columns(selected)
+    try:
+        result = await db.execute(daily_statement(workspace_id, start_date, end_date, columns, granularity))
+        rows = result.all()
+    except Exception:
+        rows = []
+    # Already JSON-ready; skip per-row response model validation.
+    return daily_series_payload(rows, selected, columns, per_period=granularity != "day")
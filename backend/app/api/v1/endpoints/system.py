@@ -1,8 +1,12 @@
 from datetime import datetime, timezone
 from typing import Any
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from app.api import deps
 from app.core.config import settings
+from app.core.database import pool_metrics, replica_router
+from app.services.metrics_cache import metrics_cache_stats
+from app.services.webhook_dedup import webhook_dedup_stats
 
 router = APIRouter()
 
@@ -16,3 +20,14 @@ def health() -> Any:
         "version": "v1",
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
+
+
+@router.get("/metrics", dependencies=[Depends(deps.require_internal_token)])
+def runtime_metrics() -> Any:
+    return {
+        "auth_identity_cache": deps.identity_cache_stats(),
+        "db_pools": pool_metrics(),
+        "db_replicas": replica_router.status(),
+        "metrics_cache": metrics_cache_stats(),
+        "webhook_dedup": webhook_dedup_stats(),
+    }
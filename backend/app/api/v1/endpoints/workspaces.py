@@ -113,6 +113,7 @@ def update_workspace(
 
     db.commit()
     db.refresh(workspace_ctx.workspace)
+    deps.invalidate_workspace_context(workspace_id=workspace_ctx.workspace.id)
 
     return {
         "id": str(workspace_ctx.workspace.id),
@@ -146,8 +147,17 @@ def delete_workspace(
     workspace = db.query(Workspace).filter(Workspace.id == workspace_uuid).first()
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
+    memberships = db.query(WorkspaceMembership).filter(WorkspaceMembership.workspace_id == workspace_uuid)
+    member_ids = [user_id for (user_id,) in memberships.with_entities(WorkspaceMembership.user_id)]
+    # Removed explicitly: the memberships backref has no delete cascade, so the ORM
+    # would otherwise try to null their non-nullable workspace_id.
+    memberships.delete(synchronize_session=False)
     db.delete(workspace)
     db.commit()
+    deps.invalidate_workspace_context(workspace_id=workspace_uuid)
+    # Any member may have just lost their last workspace.
+    for user_id in member_ids:
+        deps.forget_provisioned_user(user_id)
     return {"deleted": True}
 
 
@@ -209,6 +219,7 @@ def add_workspace_member(
         existing.role = role
         db.commit()
         db.refresh(existing)
+        deps.invalidate_workspace_context(user_id=user_uuid)
         return {"id": str(existing.id), "user_id": str(existing.user_id), "role": existing.role}
 
     membership = WorkspaceMembership(
@@ -219,4 +230,5 @@ def add_workspace_member(
     db.add(membership)
     db.commit()
     db.refresh(membership)
+    deps.invalidate_workspace_context(user_id=user_uuid)
     return {"id": str(membership.id), "user_id": str(membership.user_id), "role": membership.role}
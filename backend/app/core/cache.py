@@ -0,0 +1,136 @@
+"""In-process TTL/LRU cache with an optional shared Redis tier."""
+
+from collections import OrderedDict
+import json
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+from app.core.config import settings
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache where every entry carries its own expiry."""
+
+    def __init__(self, max_entries: int, default_ttl: float) -> None:
+        self.max_entries = max(1, max_entries)
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else min(ttl, self.default_ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        with self._lock:
+            doomed = [key for key, (_, value) in self._entries.items() if predicate(key, value)]
+            for key in doomed:
+                del self._entries[key]
+        return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_redis_client: Any = None
+_redis_lock = threading.Lock()
+
+
+def get_redis() -> Any:
+    """Return a shared Redis client, or None when Redis is not configured."""
+    global _redis_client
+    if not settings.REDIS_URL:
+        return None
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                import redis
+
+                _redis_client = redis.Redis.from_url(
+                    settings.REDIS_URL,
+                    socket_timeout=0.5,
+                    socket_connect_timeout=0.5,
+                )
+    return _redis_client
+
+
+def redis_get_json(key: str) -> Any:
+    """Best-effort JSON read from Redis; any Redis failure reads as a miss."""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        raw = client.get(key)
+    except Exception:
+        return None
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+def redis_set_json(key: str, value: Any, ttl: float) -> None:
+    """Best-effort JSON write to Redis with an expiry in seconds."""
+    client = get_redis()
+    if client is None or ttl < 1:
+        return
+    try:
+        client.set(key, json.dumps(value, default=str), ex=int(ttl))
+    except Exception:
+        return
+
+
+def redis_delete(*keys: str) -> None:
+    client = get_redis()
+    if client is None or not keys:
+        return
+    try:
+        client.delete(*keys)
+    except Exception:
+        return
@@ -20,12 +20,49 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str
+
+    # Connection pools (ignored for SQLite). Each workload gets its own pool so
+    # analytics queries and workers cannot starve auth/CRUD connections.
+    # Per process, at most (size + overflow) connections per pool are open against the
+    # primary, and pools connect lazily. With the defaults an API process can hold 30:
+    # OLTP sync 10 + OLTP async 10 + analytics 10. A Celery worker process uses the
+    # worker pool (10). Each replica in DATABASE_REPLICA_URLS has its own analytics-sized
+    # pool on that replica. Keep (API processes x 30) + (worker processes x 10) below
+    # Postgres max_connections minus its reserved connections.
+    DB_POOL_TIMEOUT_SECONDS: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # 0 pings on every checkout; >0 pings only connections idle longer than this
+    DB_PRE_PING_INTERVAL_SECONDS: int = 0
+    # The OLTP budget is split between sync endpoints and async endpoints
+    DB_OLTP_POOL_SIZE: int = 5
+    DB_OLTP_MAX_OVERFLOW: int = 5
+    DB_OLTP_ASYNC_POOL_SIZE: int = 5
+    DB_OLTP_ASYNC_MAX_OVERFLOW: int = 5
+    DB_ANALYTICS_POOL_SIZE: int = 5
+    DB_ANALYTICS_MAX_OVERFLOW: int = 5
+    DB_WORKER_POOL_SIZE: int = 5
+    DB_WORKER_MAX_OVERFLOW: int = 5
+
+    # Optional comma-separated Postgres read replicas for analytics/metrics reads
+    DATABASE_REPLICA_URLS: str = ""
+    DATABASE_REPLICA_MAX_LAG_SECONDS: float = 10.0
+    DATABASE_REPLICA_LAG_CHECK_SECONDS: float = 5.0
+
+    # Days of daily rows re-rolled into week/month/quarter/fiscal-year tables after an Airbyte sync
+    ROLLUP_REFRESH_LOOKBACK_DAYS: int = 35
+    # Rows per multi-row INSERT ... ON CONFLICT statement when upserting daily financials
+    FINANCIAL_UPSERT_BATCH_SIZE: int = 1000
+    # Loads of at least this many rows go through COPY into a staging table on Postgres
+    FINANCIAL_COPY_THRESHOLD_ROWS: int = 5000
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     DEV_BYPASS_AUTH: bool = False
+    # Shared secret for /system/metrics (X-Internal-Token header); the endpoint is off when unset
+    SYSTEM_METRICS_TOKEN: str | None = None
     
     # External Services
     GEMINI_API_KEY: str | None = None
@@ -60,6 +97,65 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str | None = None
     SUPABASE_ANON_KEY: str | None = None
     SUPABASE_SERVICE_ROLE_KEY: str | None = None
+
+    # Access token verification: "local" (JWT secret/JWKS), "remote" (/auth/v1/user)
+    # or "auto" (local, falling back to remote when no signing key is available)
+    SUPABASE_AUTH_MODE: str = "auto"
+    SUPABASE_JWT_SECRET: str | None = None
+    SUPABASE_JWKS_URL: str | None = None
+    SUPABASE_JWKS_REFRESH_SECONDS: int = 600
+    SUPABASE_JWT_AUDIENCE: str = "authenticated"
+
+    # Verified Supabase identities are cached per token hash, bounded by the token's exp
+    AUTH_IDENTITY_CACHE_ENABLED: bool = True
+    AUTH_IDENTITY_CACHE_TTL_SECONDS: int = 300
+    AUTH_IDENTITY_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_IDENTITY_CACHE_REDIS: bool = False
+
+    # Resolved (user, X-Workspace-Id) -> workspace context, per process
+    WORKSPACE_CONTEXT_CACHE_TTL_SECONDS: int = 30
+    WORKSPACE_CONTEXT_CACHE_MAX_ENTRIES: int = 10000
+    PROVISIONED_USER_MARKER_TTL_SECONDS: int = 86400
+
+    # Metrics responses, invalidated by a per-workspace version in Redis. Both the in-process
+    # and Redis tiers are bypassed without Redis (see app/services/metrics_cache.py)
+    METRICS_CACHE_ENABLED: bool = True
+    METRICS_CACHE_TTL_SECONDS: int = 300
+    METRICS_CACHE_MAX_ENTRIES: int = 5000
+
+    # Sync job status stream (SSE over Redis pub/sub)
+    SYNC_EVENTS_HEARTBEAT_SECONDS: float = 15.0
+
+    # Webhook sync coalescing: new webhook jobs wait SYNC_WEBHOOK_DEBOUNCE_SECONDS before
+    # running, and later webhooks fold into a pending/queued job requested within
+    # SYNC_COALESCE_WINDOW_SECONDS instead of creating another
+    SYNC_WEBHOOK_DEBOUNCE_SECONDS: int = 30
+    SYNC_COALESCE_WINDOW_SECONDS: int = 300
+    # One running sync per integration: a job that finds another running retries after this delay;
+    # a "running" job started longer ago than SYNC_RUNNING_STALE_SECONDS is treated as abandoned
+    SYNC_BUSY_RETRY_SECONDS: int = 30
+    SYNC_RUNNING_STALE_SECONDS: int = 3600
+
+    # Webhook event ids already handled (Redis SET NX EX; per-process cache when Redis is down).
+    # Stripe retries for up to 3 days.
+    WEBHOOK_DEDUP_TTL_SECONDS: int = 259200
+    WEBHOOK_DEDUP_LOCAL_MAX_ENTRIES: int = 50000
+    # Webhook inbox consumer: events per batch, and attempts before an event is marked failed.
+    # A failed batch is retried after WEBHOOK_INBOX_RETRY_BASE_SECONDS, doubling per attempt up to
+    # WEBHOOK_INBOX_RETRY_MAX_SECONDS. `python -m app.workers.inbox_consumer` drains the inbox,
+    # polling every WEBHOOK_INBOX_POLL_SECONDS while idle.
+    WEBHOOK_INBOX_BATCH_SIZE: int = 500
+    WEBHOOK_INBOX_MAX_ATTEMPTS: int = 5
+    WEBHOOK_INBOX_RETRY_BASE_SECONDS: float = 10.0
+    WEBHOOK_INBOX_RETRY_MAX_SECONDS: float = 600.0
+    WEBHOOK_INBOX_POLL_SECONDS: float = 1.0
+
+    # Sync job outbox: rows per dispatch batch and the standalone dispatcher's idle poll.
+    # SYNC_OUTBOX_KICK wakes the dispatch task after each enqueue; it can be turned off
+    # when `python -m app.workers.outbox_dispatcher` is running.
+    SYNC_OUTBOX_BATCH_SIZE: int = 500
+    SYNC_OUTBOX_POLL_SECONDS: float = 0.5
+    SYNC_OUTBOX_KICK: bool = True
     
     class Config:
         case_sensitive = True
@@ -1,21 +1,265 @@
-from sqlalchemy import create_engine
+import itertools
+import threading
+import time
+from typing import Any, Optional
+
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
 
 database_url = settings.DATABASE_URL
 is_sqlite = database_url.startswith("sqlite")
 
-engine_kwargs = {"pool_pre_ping": True}
+
+def to_async_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its asyncio driver (asyncpg / aiosqlite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql":
+        query = dict(parsed.query)
+        if "sslmode" in query:
+            # asyncpg takes "ssl" rather than libpq's "sslmode".
+            query["ssl"] = query.pop("sslmode")
+        parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+        return parsed.render_as_string(hide_password=False)
+    return url
+
+
+class PoolStats:
+    """Checkout wait-time counters for one named pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, waited: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_total": round(self.wait_seconds_total * 1000, 3),
+                "wait_ms_avg": round(self.wait_seconds_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+            }
+
+
+pool_stats: dict[str, PoolStats] = {}
+_pools_by_name: dict[str, Any] = {}
+
+
+def _timed_pool_class(base: type, name: str) -> type:
+    """Subclass a queue pool so every checkout records how long it waited."""
+    stats = pool_stats.setdefault(name, PoolStats())
+
+    class TimedPool(base):  # type: ignore[misc, valid-type]
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            super().__init__(*args, **kwargs)
+            _pools_by_name[name] = self
+
+        def _do_get(self) -> Any:
+            started = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                stats.record(time.perf_counter() - started, timed_out=True)
+                raise
+            stats.record(time.perf_counter() - started, timed_out=False)
+            return connection
+
+    TimedPool.__name__ = f"{base.__name__}[{name}]"
+    return TimedPool
+
+
+def _install_idle_pre_ping(target: Engine, interval: float) -> None:
+    """
+    Ping only connections that sat idle in the pool for longer than `interval`
+    instead of paying a round trip on every checkout.
+    """
+
+    @event.listens_for(target, "checkin")
+    def _on_checkin(dbapi_connection: Any, connection_record: Any) -> None:
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(target, "checkout")
+    def _on_checkout(dbapi_connection: Any, connection_record: Any, connection_proxy: Any) -> None:
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < interval:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception as ping_error:
+            # The pool discards this connection and retries with a fresh one.
+            raise exc.DisconnectionError() from ping_error
+        finally:
+            cursor.close()
+
+
+def _engine_kwargs(name: str, pool_size: int, max_overflow: int, use_async: bool) -> dict[str, Any]:
+    if is_sqlite:
+        # SQLite requires different connect args and no pool sizing/timeout settings.
+        connect_args: dict[str, Any] = {"timeout": 10}
+        if not use_async:
+            connect_args["check_same_thread"] = False
+        return {"pool_pre_ping": True, "connect_args": connect_args}
+
+    base_pool = AsyncAdaptedQueuePool if use_async else QueuePool
+    return {
+        "poolclass": _timed_pool_class(base_pool, name),
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING and settings.DB_PRE_PING_INTERVAL_SECONDS <= 0,
+        "connect_args": {"timeout": 10} if use_async else {"connect_timeout": 10},
+    }
+
+
+def _uses_idle_pre_ping() -> bool:
+    return not is_sqlite and settings.DB_POOL_PRE_PING and settings.DB_PRE_PING_INTERVAL_SECONDS > 0
+
+
+def make_engine(name: str, pool_size: int, max_overflow: int, url: str = database_url) -> Engine:
+    new_engine = create_engine(url, **_engine_kwargs(name, pool_size, max_overflow, use_async=False))
+    if _uses_idle_pre_ping():
+        _install_idle_pre_ping(new_engine, settings.DB_PRE_PING_INTERVAL_SECONDS)
+    return new_engine
+
+
+def make_async_engine(name: str, pool_size: int, max_overflow: int, url: str = database_url) -> AsyncEngine:
+    new_engine = create_async_engine(
+        to_async_url(url),
+        **_engine_kwargs(name, pool_size, max_overflow, use_async=True),
+    )
+    if _uses_idle_pre_ping():
+        _install_idle_pre_ping(new_engine.sync_engine, settings.DB_PRE_PING_INTERVAL_SECONDS)
+    return new_engine
+
+
+def _async_session_factory(bind: AsyncEngine) -> async_sessionmaker:
+    # Sessions keep attribute state after commit so serializing a committed
+    # object never triggers implicit IO on the event loop.
+    return async_sessionmaker(bind=bind, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+# OLTP: auth, workspace resolution and CRUD.
+engine = make_engine("oltp", settings.DB_OLTP_POOL_SIZE, settings.DB_OLTP_MAX_OVERFLOW)
+async_engine = make_async_engine(
+    "oltp_async",
+    settings.DB_OLTP_ASYNC_POOL_SIZE,
+    settings.DB_OLTP_ASYNC_MAX_OVERFLOW,
+)
+
+# Analytics (metrics, chat NL-to-SQL) and Celery workers get their own pools so
+# slow reads or backfills cannot exhaust the connections login depends on.
+# SQLite has no meaningful pooling, so every workload shares one engine there.
 if is_sqlite:
-    # SQLite requires different connect args and no pool timeout setting.
-    engine_kwargs["connect_args"] = {"check_same_thread": False, "timeout": 10}
+    async_analytics_engine = async_engine
+    worker_engine = engine
 else:
-    engine_kwargs["pool_timeout"] = 10
-    engine_kwargs["connect_args"] = {"connect_timeout": 10}
-
-engine = create_engine(database_url, **engine_kwargs)
+    async_analytics_engine = make_async_engine(
+        "analytics_async",
+        settings.DB_ANALYTICS_POOL_SIZE,
+        settings.DB_ANALYTICS_MAX_OVERFLOW,
+    )
+    worker_engine = make_engine("worker", settings.DB_WORKER_POOL_SIZE, settings.DB_WORKER_MAX_OVERFLOW)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+WorkerSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=worker_engine)
+AsyncSessionLocal = _async_session_factory(async_engine)
+AsyncAnalyticsSessionLocal = _async_session_factory(async_analytics_engine)
+
+
+# Zero when the replica has replayed everything it received; otherwise the age of
+# the last replayed transaction. Also zero on a primary (not in recovery).
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class _Replica:
+    def __init__(self, name: str, url: str) -> None:
+        self.name = name
+        self.engine = make_async_engine(
+            name,
+            settings.DB_ANALYTICS_POOL_SIZE,
+            settings.DB_ANALYTICS_MAX_OVERFLOW,
+            url=url,
+        )
+        self.session_factory = _async_session_factory(self.engine)
+        self.lag_seconds: Optional[float] = None
+        self.checked_at = 0.0
+
+
+class ReplicaRouter:
+    """
+    Round-robins read-only sessions across replicas, skipping any replica that
+    is unreachable or lagging more than DATABASE_REPLICA_MAX_LAG_SECONDS and
+    falling back to the primary analytics pool when none qualifies.
+    """
+
+    def __init__(self, urls: list[str], primary: async_sessionmaker) -> None:
+        self.primary = primary
+        self.replicas = [_Replica(f"replica_{index}", url) for index, url in enumerate(urls)]
+        self._next = itertools.count()
+
+    async def _current_lag(self, replica: _Replica) -> Optional[float]:
+        now = time.monotonic()
+        if now - replica.checked_at < settings.DATABASE_REPLICA_LAG_CHECK_SECONDS:
+            return replica.lag_seconds
+        # Claim the check first so concurrent requests keep using the last value.
+        replica.checked_at = now
+        try:
+            async with replica.engine.connect() as conn:
+                lag = await conn.scalar(REPLICA_LAG_SQL)
+            replica.lag_seconds = float(lag or 0)
+        except Exception:
+            replica.lag_seconds = None
+        return replica.lag_seconds
+
+    async def read_session_factory(self) -> async_sessionmaker:
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._next) % len(self.replicas)]
+            lag = await self._current_lag(replica)
+            if lag is not None and lag <= settings.DATABASE_REPLICA_MAX_LAG_SECONDS:
+                return replica.session_factory
+        return self.primary
+
+    def status(self) -> list[dict[str, Any]]:
+        return [
+            {"name": replica.name, "lag_seconds": replica.lag_seconds}
+            for replica in self.replicas
+        ]
+
+
+replica_urls = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+replica_router = ReplicaRouter(
+    [] if is_sqlite else replica_urls,
+    primary=AsyncAnalyticsSessionLocal,
+)
 
 Base = declarative_base()
 
@@ -25,3 +269,50 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_analytics_db():
+    async with AsyncAnalyticsSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """Read-only session on a healthy replica, or the primary analytics pool."""
+    session_factory = await replica_router.read_session_factory()
+    async with session_factory() as db:
+        yield db
+
+
+def get_session_factory() -> sessionmaker:
+    """For handlers that open several sessions, e.g. to run independent reads concurrently."""
+    return SessionLocal
+
+
+async def get_async_read_session_factory() -> async_sessionmaker:
+    return await replica_router.read_session_factory()
+
+
+def get_async_analytics_session_factory() -> async_sessionmaker:
+    return AsyncAnalyticsSessionLocal
+
+
+def pool_metrics() -> dict[str, Any]:
+    metrics: dict[str, Any] = {}
+    for name, stats in pool_stats.items():
+        pool = _pools_by_name.get(name)
+        entry = stats.snapshot()
+        if pool is not None:
+            entry.update(
+                {
+                    "size": pool.size(),
+                    "checked_out": pool.checkedout(),
+                    "overflow": pool.overflow(),
+                }
+            )
+        metrics[name] = entry
+    return metrics
@@ -1,11 +1,18 @@
 from datetime import datetime, timedelta
-from typing import Any, Union
-from jose import jwt
+import threading
+import time
+from typing import Any, Optional, Union
+from jose import JWTError, jwt
 import bcrypt
+import httpx
 from app.core.config import settings
 
 ALGORITHM = settings.ALGORITHM
 
+SUPABASE_JWKS_ALGORITHMS = ["RS256", "ES256"]
+# Minimum spacing between forced JWKS refreshes triggered by an unknown key id.
+JWKS_FORCED_REFRESH_INTERVAL_SECONDS = 30
+
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -28,3 +35,116 @@ def get_password_hash(password: str) -> str:
         bcrypt.gensalt(),
     ).decode("utf-8")
 
+
+
+class SupabaseKeysUnavailable(Exception):
+    """Raised when no local signing key can verify a Supabase access token."""
+
+
+class SupabaseJWTVerifier:
+    """
+    Verifies Supabase access tokens locally against the project's JWT secret
+    (HS256) or its published JWKS (RS256/ES256). The JWKS document is fetched
+    once and then refreshed on a background thread whenever it goes stale.
+    """
+
+    def __init__(self) -> None:
+        self._keys: Optional[list[dict[str, Any]]] = None
+        self._fetched_at = 0.0
+        self._forced_refresh_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def _jwks_url(self) -> Optional[str]:
+        if settings.SUPABASE_JWKS_URL:
+            return settings.SUPABASE_JWKS_URL
+        if settings.SUPABASE_URL:
+            return f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json"
+        return None
+
+    def _fetch_jwks(self) -> Optional[list[dict[str, Any]]]:
+        url = self._jwks_url()
+        if not url:
+            return None
+        api_key = settings.SUPABASE_ANON_KEY or settings.SUPABASE_KEY
+        headers = {"apikey": api_key} if api_key else {}
+        try:
+            response = httpx.get(url, headers=headers, timeout=5.0)
+        except httpx.HTTPError:
+            return None
+        if response.status_code != 200:
+            return None
+        keys = response.json().get("keys")
+        return keys if isinstance(keys, list) else None
+
+    def refresh(self) -> None:
+        keys = self._fetch_jwks()
+        with self._lock:
+            if keys is not None:
+                self._keys = keys
+            self._fetched_at = time.monotonic()
+            self._refreshing = False
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name="supabase-jwks-refresh", daemon=True).start()
+
+    def _signing_keys(self) -> list[dict[str, Any]]:
+        if not self._fetched_at:
+            self.refresh()
+        elif time.monotonic() - self._fetched_at > settings.SUPABASE_JWKS_REFRESH_SECONDS:
+            # Keep serving the current key set while a fresh copy is fetched.
+            self._refresh_in_background()
+        return self._keys or []
+
+    def _find_key(self, kid: Optional[str]) -> Optional[dict[str, Any]]:
+        for key in self._signing_keys():
+            if kid is None or key.get("kid") == kid:
+                return key
+
+        # Unknown kid usually means the project rotated keys since our last fetch.
+        now = time.monotonic()
+        if now - self._forced_refresh_at < JWKS_FORCED_REFRESH_INTERVAL_SECONDS:
+            return None
+        self._forced_refresh_at = now
+        self.refresh()
+        for key in self._keys or []:
+            if kid is None or key.get("kid") == kid:
+                return key
+        return None
+
+    def verify(self, token: str) -> dict[str, Any]:
+        """Return the verified claims, or raise JWTError / SupabaseKeysUnavailable."""
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+        options = {"verify_aud": bool(settings.SUPABASE_JWT_AUDIENCE)}
+
+        if algorithm == "HS256":
+            if not settings.SUPABASE_JWT_SECRET:
+                raise SupabaseKeysUnavailable("SUPABASE_JWT_SECRET is not configured")
+            key: Any = settings.SUPABASE_JWT_SECRET
+            algorithms = ["HS256"]
+        elif algorithm in SUPABASE_JWKS_ALGORITHMS:
+            key = self._find_key(header.get("kid"))
+            if key is None:
+                raise SupabaseKeysUnavailable("No JWKS key matches the token")
+            algorithms = [algorithm]
+        else:
+            raise JWTError(f"Unsupported token algorithm: {algorithm}")
+
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=algorithms,
+            audience=settings.SUPABASE_JWT_AUDIENCE or None,
+            options=options,
+        )
+        if not claims.get("sub"):
+            raise JWTError("Token has no subject")
+        return claims
+
+
+supabase_jwt_verifier = SupabaseJWTVerifier()
@@ -12,3 +12,12 @@ from app.models.dashboard import Dashboard  # noqa: F401
 from app.models.dashboard_widget import DashboardWidget  # noqa: F401
 from app.models.sync_job import SyncJob  # noqa: F401
 from app.models.sync_run import SyncRun  # noqa: F401
+from app.models.sync_job_outbox import SyncJobOutbox  # noqa: F401
+from app.models.financial_rollup import (  # noqa: F401
+    WeeklyFinancials,
+    MonthlyFinancials,
+    QuarterlyFinancials,
+    FiscalYearFinancials,
+)
+from app.models.kpi_snapshot import WorkspaceKpiSnapshot  # noqa: F401
+from app.models.webhook_event import WebhookEvent  # noqa: F401
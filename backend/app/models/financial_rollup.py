@@ -0,0 +1,56 @@
+from sqlalchemy import Column, Date, Numeric, Integer, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import declared_attr
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from app.core.database import Base
+
+
+class FinancialRollupMixin:
+    """
+    Per-workspace sums of fact_daily_financials over one period. period_start is
+    the first day of the period; days_count is how many distinct days had data.
+    """
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False)
+
+    revenue_gross = Column(Numeric(14, 2), nullable=False, default=0)
+    revenue_net = Column(Numeric(14, 2), nullable=False, default=0)
+    cost_ads_meta = Column(Numeric(14, 2), nullable=False, default=0)
+    cost_ads_google = Column(Numeric(14, 2), nullable=False, default=0)
+    cost_transaction_fees = Column(Numeric(14, 2), nullable=False, default=0)
+    cost_fixed_allocated = Column(Numeric(14, 2), nullable=False, default=0)
+    cost_variable = Column(Numeric(14, 2), nullable=False, default=0)
+    transactions_count = Column(Integer, nullable=False, default=0)
+    days_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    @declared_attr
+    def workspace_id(cls):
+        return Column(UUID(as_uuid=True), ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
+
+    @declared_attr
+    def __table_args__(cls):
+        return (UniqueConstraint("workspace_id", "period_start", name=f"uq_{cls.__tablename__}_workspace_period"),)
+
+
+class WeeklyFinancials(FinancialRollupMixin, Base):
+    __tablename__ = "fact_weekly_financials"
+
+
+class MonthlyFinancials(FinancialRollupMixin, Base):
+    __tablename__ = "fact_monthly_financials"
+
+
+class QuarterlyFinancials(FinancialRollupMixin, Base):
+    __tablename__ = "fact_quarterly_financials"
+
+
+class FiscalYearFinancials(FinancialRollupMixin, Base):
+    """Fiscal years begin on the month in the organization owner's User.fiscal_year_start."""
+
+    __tablename__ = "fact_fiscal_year_financials"
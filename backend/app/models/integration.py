@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, JSON
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
@@ -16,6 +16,8 @@ class Integration(Base):
     refresh_token = Column(String, nullable=True)
     token_expires_at = Column(DateTime(timezone=True), nullable=True)
     account_id = Column(String, nullable=True)
+    # Webhook routing key, see oauth_service.external_account_key (shop domain for Shopify)
+    external_account_key = Column(String, nullable=True)
     connected_at = Column(DateTime(timezone=True), server_default=func.now())
     last_sync_at = Column(DateTime(timezone=True), nullable=True)
     status = Column(String, default="active")
@@ -23,3 +25,7 @@ class Integration(Base):
 
     user = relationship("User", backref="integrations")
     workspace = relationship("Workspace", backref="integrations")
+
+    __table_args__ = (
+        Index("ix_integrations_platform_account_key_status", "platform", "external_account_key", "status"),
+    )
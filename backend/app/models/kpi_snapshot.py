@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Date, DateTime, ForeignKey, JSON
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.database import Base
+
+
+class WorkspaceKpiSnapshot(Base):
+    """Precomputed landing KPIs for a workspace, rebuilt after each successful sync."""
+
+    __tablename__ = "workspace_kpi_snapshots"
+
+    workspace_id = Column(UUID(as_uuid=True), ForeignKey("workspaces.id", ondelete="CASCADE"), primary_key=True)
+    as_of = Column(Date, nullable=False)
+    payload = Column(JSON, nullable=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index, Text, text
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -15,6 +15,8 @@ class SyncJob(Base):
     provider = Column(String, nullable=False)
     status = Column(String, nullable=False, default="pending")
     trigger_type = Column(String, nullable=False, default="manual")
+    # Triggers folded into this job while it was pending/queued, including the one that created it.
+    trigger_count = Column(Integer, nullable=False, default=1, server_default="1")
     requested_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     celery_task_id = Column(String, nullable=True)
     attempt_count = Column(Integer, nullable=False, default=0)
@@ -22,3 +24,14 @@ class SyncJob(Base):
     requested_at = Column(DateTime(timezone=True), server_default=func.now())
     started_at = Column(DateTime(timezone=True), nullable=True)
     finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # At most one running sync per integration; run_sync_job defers when it loses this race.
+        Index(
+            "ux_sync_jobs_integration_running",
+            "integration_id",
+            unique=True,
+            postgresql_where=text("status = 'running'"),
+            sqlite_where=text("status = 'running'"),
+        ),
+    )
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Text, text
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from app.core.database import Base
+
+
+class SyncJobOutbox(Base):
+    """
+    A sync job waiting to be published to Celery. Written in the same
+    transaction that queues the job and drained by dispatch_sync_outbox, so a
+    committed job is never lost between the database and the broker.
+    """
+
+    __tablename__ = "sync_job_outbox"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    sync_job_id = Column(UUID(as_uuid=True), ForeignKey("sync_jobs.id", ondelete="CASCADE"), nullable=False)
+    # Celery ETA; NULL runs as soon as a worker is free
+    run_after = Column(DateTime(timezone=True), nullable=True)
+    attempt_count = Column(Integer, nullable=False, default=0, server_default="0")
+    latest_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_sync_job_outbox_pending",
+            "created_at",
+            postgresql_where=text("dispatched_at IS NULL"),
+            sqlite_where=text("dispatched_at IS NULL"),
+        ),
+    )
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from app.core.database import Base
+
+
+class WebhookEvent(Base):
+    """
+    Inbox row for a verified provider webhook. The request handler only inserts;
+    the process_webhook_inbox task and the inbox_consumer loop route pending rows
+    to integrations in batches.
+    """
+
+    __tablename__ = "webhook_events"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    provider = Column(String, nullable=False)
+    event_id = Column(String, nullable=True)
+    topic = Column(String, nullable=True)
+    # Integration.external_account_key the event is for; NULL fans out to every active integration
+    account_key = Column(String, nullable=True)
+    payload = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="pending", server_default="pending")
+    attempt_count = Column(Integer, nullable=False, default=0, server_default="0")
+    latest_error = Column(Text, nullable=True)
+    # Set after a failed batch; the event is not picked up again before this time
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_webhook_events_status_received_at", "status", "received_at"),
+    )
@@ -1,6 +1,7 @@
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel
-from datetime import date
+from datetime import date, datetime
+from uuid import UUID
 
 
 class TopExpense(BaseModel):
@@ -8,6 +9,16 @@ class TopExpense(BaseModel):
     amount: float
 
 
+class SummaryComparison(BaseModel):
+    label: str
+    date: date
+    has_data: bool
+    net_profit: Optional[float] = None
+    revenue_net: Optional[float] = None
+    total_expenses: Optional[float] = None
+    net_profit_change_pct: Optional[float] = None
+
+
 class MetricsSummaryResponse(BaseModel):
     date: date
     net_profit: float
@@ -19,6 +30,86 @@ class MetricsSummaryResponse(BaseModel):
     roas: Optional[float] = None
     transactions_count: int
     insight: Optional[str] = None
+    comparisons: List[SummaryComparison] = []
+
+
+class KpiWindow(BaseModel):
+    start_date: date
+    end_date: date
+    days_with_data: int
+    revenue_gross: float
+    revenue_net: float
+    total_expenses: float
+    net_profit: float
+    avg_daily_profit: float
+    transactions_count: int
+    trend: str  # up / down / flat
+    top_expense: Optional[TopExpense] = None
+
+
+class KpiSnapshotResponse(BaseModel):
+    as_of: date
+    computed_at: Optional[datetime] = None
+    summary: MetricsSummaryResponse
+    windows: Dict[str, KpiWindow]  # "7d", "30d", "90d"
+
+
+class PeriodMetrics(BaseModel):
+    start_date: date
+    end_date: date
+    days_with_data: int
+    revenue_gross: float
+    revenue_net: float
+    total_expenses: float
+    net_profit: float
+    transactions_count: int
+    # Against the next (older) period in the list; absent on the oldest one
+    net_profit_change_pct: Optional[float] = None
+    revenue_net_change_pct: Optional[float] = None
+
+
+class PeriodComparisonResponse(BaseModel):
+    preset: str
+    as_of: date
+    periods: List[PeriodMetrics]  # newest first
+
+
+class SeriesPoint(BaseModel):
+    date: date
+    revenue_gross: float
+    revenue_net: float
+    total_expenses: float
+    net_profit: float
+    transactions_count: int
+
+
+class SeriesTotals(BaseModel):
+    revenue_gross: float
+    revenue_net: float
+    total_expenses: float
+    net_profit: float
+    transactions_count: int
+
+
+class WorkspaceSeries(BaseModel):
+    workspace_id: UUID
+    workspace_name: str
+    data: List[SeriesPoint]
+    totals: SeriesTotals
+
+
+class CombinedSeries(BaseModel):
+    data: List[SeriesPoint]
+    totals: SeriesTotals
+
+
+class OrganizationMetricsResponse(BaseModel):
+    organization_id: UUID
+    granularity: str
+    start_date: date
+    end_date: date
+    workspaces: List[WorkspaceSeries]
+    total: CombinedSeries
 
 
 class DailyMetricRow(BaseModel):
@@ -41,4 +132,5 @@ class DailyMetricsSummary(BaseModel):
 
 class DailyMetricsResponse(BaseModel):
     data: List[DailyMetricRow]
-    summary: DailyMetricsSummary
+    # Present whenever net_profit is part of the requested metrics.
+    summary: Optional[DailyMetricsSummary] = None
@@ -7,6 +7,11 @@ from datetime import date, timedelta
 from sqlalchemy.orm import Session
 from app.models.financial_data import FinancialData
 from app.models.integration import Integration
+from app.services.financial_upsert import load_financial_rows
+from app.services.kpi_snapshot_service import refresh_kpi_snapshot
+from app.services.metrics_cache import bump_workspace_version
+from app.services.oauth_service import external_account_key
+from app.services.rollup_service import refresh_rollups
 
 
 def seed_demo_data(db: Session, user_id: str, workspace_id: str | None = None) -> dict:
@@ -26,7 +31,7 @@ def seed_demo_data(db: Session, user_id: str, workspace_id: str | None = None) -
     if existing > 0:
         return {"status": "already_seeded", "rows": existing}
     
-    rows_created = 0
+    rows = []
     
     # Base values that will vary day to day for realism
     base_revenue = 2500  # ~$2500/day gross
@@ -57,27 +62,33 @@ def seed_demo_data(db: Session, user_id: str, workspace_id: str | None = None) -
         transactions_count = int(random.uniform(15, 80) * daily_noise)
         orders_count = int(transactions_count * random.uniform(0.7, 1.0))
         
-        record = FinancialData(
-            workspace_id=workspace_id,
-            user_id=user_id,
-            date=current_date,
-            revenue_gross=revenue_gross,
-            revenue_net=revenue_net,
-            refunds=refunds,
-            disputes=disputes,
-            cost_ads_meta=cost_ads_meta,
-            cost_ads_google=cost_ads_google,
-            cost_transaction_fees=cost_transaction_fees,
-            cost_fixed_allocated=cost_fixed_allocated,
-            cost_variable=cost_variable,
-            currency="USD",
-            transactions_count=transactions_count,
-            orders_count=orders_count,
-        )
-        db.add(record)
-        rows_created += 1
+        rows.append({
+            "workspace_id": workspace_id,
+            "user_id": user_id,
+            "date": current_date,
+            "revenue_gross": revenue_gross,
+            "revenue_net": revenue_net,
+            "refunds": refunds,
+            "disputes": disputes,
+            "cost_ads_meta": cost_ads_meta,
+            "cost_ads_google": cost_ads_google,
+            "cost_transaction_fees": cost_transaction_fees,
+            "cost_fixed_allocated": cost_fixed_allocated,
+            "cost_variable": cost_variable,
+            "currency": "USD",
+            "transactions_count": transactions_count,
+            "orders_count": orders_count,
+        })
     
+    # One set-based upsert instead of 31 ORM inserts
+    rows_created = load_financial_rows(db, rows).rows
+    if workspace_id:
+        refresh_rollups(db, workspace_id, start_date, today)
+        # Same transaction as the rows, so the version bump below never exposes the old snapshot.
+        refresh_kpi_snapshot(db, workspace_id)
     db.commit()
+    if workspace_id:
+        bump_workspace_version(workspace_id)
     return {"status": "seeded", "rows": rows_created, "date_range": f"{start_date} to {today}"}
 
 
@@ -102,6 +113,7 @@ def seed_integrations(db: Session, user_id: str, workspace_id: str | None = None
             existing.status = "active"
             existing.access_token = p["access_token"]
             existing.account_id = p["account_id"]
+            existing.external_account_key = external_account_key(p["platform"], p["account_id"])
             created.append({"platform": p["platform"], "action": "updated"})
         else:
             new_int = Integration(
@@ -110,6 +122,7 @@ def seed_integrations(db: Session, user_id: str, workspace_id: str | None = None
                 platform=p["platform"],
                 access_token=p["access_token"],
                 account_id=p["account_id"],
+                external_account_key=external_account_key(p["platform"], p["account_id"]),
                 status="active",
                 metadata_config={"demo": True},
             )
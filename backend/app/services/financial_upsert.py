@@ -0,0 +1,252 @@
+"""
+Bulk upsert of fact_daily_financials rows keyed by (workspace_id, user_id, date).
+
+Rows go out as multi-row INSERT ... ON CONFLICT DO UPDATE statements of
+FINANCIAL_UPSERT_BATCH_SIZE rows on Postgres and SQLite. Only the columns the
+caller supplies are overwritten on conflict, so a connector that knows revenue
+does not clear costs written by another.
+
+load_financial_rows is the entry point for ingestion: at or above
+FINANCIAL_COPY_THRESHOLD_ROWS on Postgres (psycopg2) it streams rows into a
+temporary staging table with COPY FROM STDIN and merges them in one
+INSERT ... SELECT ... ON CONFLICT, which is far cheaper for multi-year
+backfills than thousands of bound parameters per statement.
+"""
+import csv
+from dataclasses import dataclass
+import io
+from typing import Any, Iterable, Optional
+import uuid
+
+from sqlalchemy import and_, bindparam, column, func, literal_column, or_, select, table, text, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.financial_data import FinancialData
+
+KEY_COLUMNS = ("workspace_id", "user_id", "date")
+VALUE_COLUMNS = (
+    "revenue_gross",
+    "revenue_net",
+    "refunds",
+    "disputes",
+    "cost_ads_meta",
+    "cost_ads_google",
+    "cost_transaction_fees",
+    "cost_fixed_allocated",
+    "cost_variable",
+    "currency",
+    "transactions_count",
+    "orders_count",
+)
+
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+COPY_NULL = r"\N"
+
+
+@dataclass
+class UpsertResult:
+    inserted: int = 0
+    updated: int = 0
+
+    @property
+    def rows(self) -> int:
+        return self.inserted + self.updated
+
+
+def _normalize(rows: Iterable[dict[str, Any]]) -> tuple[list[dict[str, Any]], list[str]]:
+    """Coerce ids, reject unknown or inconsistent columns, and keep the last row per key."""
+    by_key: dict[tuple, dict[str, Any]] = {}
+    value_columns: Optional[list[str]] = None
+    for row in rows:
+        unknown = set(row) - set(KEY_COLUMNS) - set(VALUE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown financial columns: {', '.join(sorted(unknown))}")
+        columns = [name for name in VALUE_COLUMNS if name in row]
+        if value_columns is None:
+            value_columns = columns
+        elif columns != value_columns:
+            raise ValueError("Every row in an upsert must carry the same columns")
+        workspace_id = row.get("workspace_id")
+        normalized = {
+            **row,
+            "workspace_id": uuid.UUID(str(workspace_id)) if workspace_id is not None else None,
+            "user_id": uuid.UUID(str(row["user_id"])),
+        }
+        by_key[tuple(normalized[name] for name in KEY_COLUMNS)] = normalized
+    return list(by_key.values()), value_columns or []
+
+
+def _on_conflict_batch(db: Session, batch: list[dict[str, Any]], value_columns: list[str]) -> tuple[int, int]:
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        # SQLite has no xmax; writers are serialized, so counting existing keys first is exact.
+        existing = db.execute(
+            select(func.count()).where(
+                tuple_(*(getattr(FinancialData, name) for name in KEY_COLUMNS)).in_(
+                    [tuple(row[name] for name in KEY_COLUMNS) for row in batch]
+                )
+            )
+        ).scalar()
+
+    statement = _DIALECT_INSERTS[dialect](FinancialData).values(
+        [{"id": uuid.uuid4(), **row} for row in batch]
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={
+            **{name: getattr(statement.excluded, name) for name in value_columns},
+            "updated_at": func.now(),
+        },
+    )
+
+    if dialect == "postgresql":
+        # xmax is 0 only for rows this statement inserted.
+        inserted_flags = db.execute(statement.returning(literal_column("xmax = 0"))).scalars().all()
+        inserted = sum(1 for flag in inserted_flags if flag)
+        return inserted, len(inserted_flags) - inserted
+    db.execute(statement)
+    return len(batch) - existing, existing
+
+
+def _workspaceless_batch(db: Session, batch: list[dict[str, Any]], value_columns: list[str]) -> tuple[int, int]:
+    """
+    Rows without a workspace never conflict (NULLs are distinct in the unique
+    key), so match them explicitly: one SELECT, one executemany UPDATE, one INSERT.
+    """
+    existing = {
+        (row_user_id, row_date): row_id
+        for row_id, row_user_id, row_date in db.execute(
+            select(FinancialData.id, FinancialData.user_id, FinancialData.date).where(
+                FinancialData.workspace_id.is_(None),
+                or_(
+                    *(
+                        and_(FinancialData.user_id == row["user_id"], FinancialData.date == row["date"])
+                        for row in batch
+                    )
+                ),
+            )
+        )
+    }
+    updates = [
+        {"row_id": existing[(row["user_id"], row["date"])], **{name: row[name] for name in value_columns}}
+        for row in batch
+        if (row["user_id"], row["date"]) in existing
+    ]
+    inserts = [{"id": uuid.uuid4(), **row} for row in batch if (row["user_id"], row["date"]) not in existing]
+    if updates and value_columns:
+        db.execute(
+            update(FinancialData.__table__)
+            .where(FinancialData.__table__.c.id == bindparam("row_id"))
+            .values(updated_at=func.now()),
+            updates,
+        )
+    if inserts:
+        db.execute(FinancialData.__table__.insert().values(inserts))
+    return len(inserts), len(updates)
+
+
+def _upsert_normalized(
+    db: Session,
+    rows: list[dict[str, Any]],
+    value_columns: list[str],
+    batch_size: Optional[int],
+) -> UpsertResult:
+    batch_size = max(1, batch_size or settings.FINANCIAL_UPSERT_BATCH_SIZE)
+    result = UpsertResult()
+    for workspaceless in (False, True):
+        selected = [row for row in rows if (row["workspace_id"] is None) == workspaceless]
+        write = _workspaceless_batch if workspaceless else _on_conflict_batch
+        for start in range(0, len(selected), batch_size):
+            batch = selected[start : start + batch_size]
+            inserted, updated = write(db, batch, value_columns)
+            result.inserted += inserted
+            result.updated += updated
+    return result
+
+
+def upsert_financial_rows(
+    db: Session,
+    rows: Iterable[dict[str, Any]],
+    batch_size: Optional[int] = None,
+) -> UpsertResult:
+    """
+    Insert or update daily rows keyed by (workspace_id, user_id, date). Each row
+    is a dict of key columns plus any VALUE_COLUMNS, the same set in every row;
+    a later row for the same key wins. Executes but does not commit.
+    """
+    rows, value_columns = _normalize(rows)
+    return _upsert_normalized(db, rows, value_columns, batch_size)
+
+
+def _copy_csv(rows: list[dict[str, Any]], columns: list[str]) -> io.StringIO:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in rows:
+        writer.writerow([COPY_NULL if row[name] is None else row[name] for name in columns])
+    buffer.seek(0)
+    return buffer
+
+
+def _copy_merge(db: Session, rows: list[dict[str, Any]], value_columns: list[str]) -> UpsertResult:
+    """COPY rows into a transaction-scoped staging table, then merge them with one statement."""
+    columns = ["id", *KEY_COLUMNS, *value_columns]
+    stage_name = f"financials_stage_{uuid.uuid4().hex[:12]}"
+    db.execute(
+        text(
+            f"CREATE TEMP TABLE {stage_name} ON COMMIT DROP AS "
+            f"SELECT {', '.join(columns)} FROM {FinancialData.__tablename__} WITH NO DATA"
+        )
+    )
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {stage_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+            _copy_csv([{"id": uuid.uuid4(), **row} for row in rows], columns),
+        )
+    finally:
+        cursor.close()
+
+    stage = table(stage_name, *(column(name) for name in columns))
+    # Columns the caller did not supply take their model defaults on insert.
+    statement = postgresql.insert(FinancialData).from_select(
+        columns, select(*(stage.c[name] for name in columns))
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={
+            **{name: getattr(statement.excluded, name) for name in value_columns},
+            "updated_at": func.now(),
+        },
+    )
+    merged = statement.returning(literal_column("xmax = 0").label("inserted")).cte("merged")
+    inserted, total = db.execute(
+        select(func.count().filter(merged.c.inserted), func.count()).select_from(merged)
+    ).one()
+    return UpsertResult(inserted=inserted, updated=total - inserted)
+
+
+def _can_copy(db: Session) -> bool:
+    dialect = db.get_bind().dialect
+    return dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+
+def load_financial_rows(db: Session, rows: Iterable[dict[str, Any]]) -> UpsertResult:
+    """
+    Upsert daily rows, choosing COPY + set-based merge for loads of at least
+    FINANCIAL_COPY_THRESHOLD_ROWS on Postgres and batched ON CONFLICT otherwise.
+    Same row contract as upsert_financial_rows; does not commit.
+    """
+    rows, value_columns = _normalize(rows)
+    keyed = [row for row in rows if row["workspace_id"] is not None]
+    if len(keyed) < settings.FINANCIAL_COPY_THRESHOLD_ROWS or not _can_copy(db):
+        return _upsert_normalized(db, rows, value_columns, None)
+
+    result = _copy_merge(db, keyed, value_columns)
+    workspaceless = _upsert_normalized(
+        db, [row for row in rows if row["workspace_id"] is None], value_columns, None
+    )
+    result.inserted += workspaceless.inserted
+    result.updated += workspaceless.updated
+    return result
@@ -0,0 +1,111 @@
+"""
+Per-workspace KPI snapshot: yesterday's summary plus 7/30/90-day totals,
+computed once per successful sync and read back with a primary-key lookup.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Optional
+import uuid
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.models.financial_data import FinancialData
+from app.models.kpi_snapshot import WorkspaceKpiSnapshot
+from app.services.metrics_service import (
+    EXPENSE_CATEGORIES,
+    profit_trend,
+    summaries_from_rows,
+    summary_payload,
+    summary_statement,
+)
+
+SNAPSHOT_WINDOWS = (7, 30, 90)
+
+_WINDOW_COLUMNS = (
+    "revenue_gross",
+    "revenue_net",
+    *(column.key for _, column in EXPENSE_CATEGORIES),
+    "transactions_count",
+)
+_COSTS = slice(2, 2 + len(EXPENSE_CATEGORIES))
+
+
+def _window_totals(dates: np.ndarray, values: np.ndarray, as_of: date, days: int) -> dict[str, Any]:
+    start = as_of - timedelta(days=days - 1)
+    window = values[dates >= np.datetime64(start)]
+    sums = window.sum(axis=0) if len(window) else np.zeros(len(_WINDOW_COLUMNS))
+    costs = sums[_COSTS]
+    daily_profit = window[:, 1] - window[:, _COSTS].sum(axis=1)
+    net_profit = float(sums[1] - costs.sum())
+    top_index = int(np.argmax(costs))
+
+    return {
+        "start_date": start.isoformat(),
+        "end_date": as_of.isoformat(),
+        "days_with_data": len(window),
+        "revenue_gross": round(float(sums[0]), 2),
+        "revenue_net": round(float(sums[1]), 2),
+        "total_expenses": round(float(costs.sum()), 2),
+        "net_profit": round(net_profit, 2),
+        "avg_daily_profit": round(net_profit / len(window), 2) if len(window) else 0,
+        "transactions_count": int(sums[-1]),
+        "trend": profit_trend(np.round(daily_profit, 2)),
+        "top_expense": (
+            {"category": EXPENSE_CATEGORIES[top_index][0], "amount": round(float(costs[top_index]), 2)}
+            if costs[top_index] > 0
+            else None
+        ),
+    }
+
+
+def build_kpi_snapshot(db: Session, workspace_id: uuid.UUID, as_of: date) -> dict[str, Any]:
+    previous_day = as_of - timedelta(days=1)
+    summaries = summaries_from_rows(db.execute(summary_statement(workspace_id, [as_of, previous_day])).all())
+
+    first_day = as_of - timedelta(days=max(SNAPSHOT_WINDOWS) - 1)
+    rows = db.execute(
+        select(
+            FinancialData.date,
+            *(cast(func.sum(func.coalesce(getattr(FinancialData, name), 0)), Float) for name in _WINDOW_COLUMNS),
+        )
+        .where(
+            FinancialData.workspace_id == workspace_id,
+            FinancialData.date >= first_day,
+            FinancialData.date <= as_of,
+        )
+        .group_by(FinancialData.date)
+    ).all()
+    dates = np.array([row[0] for row in rows], dtype="datetime64[D]")
+    values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(_WINDOW_COLUMNS))
+
+    return jsonable_encoder(
+        {
+            "as_of": as_of,
+            "summary": summary_payload(as_of, previous_day, summaries),
+            "windows": {f"{days}d": _window_totals(dates, values, as_of, days) for days in SNAPSHOT_WINDOWS},
+        }
+    )
+
+
+def refresh_kpi_snapshot(
+    db: Session,
+    workspace_id: uuid.UUID | str,
+    as_of: Optional[date] = None,
+) -> WorkspaceKpiSnapshot:
+    """Recompute and upsert the workspace snapshot. Flushes but does not commit."""
+    workspace_id = uuid.UUID(str(workspace_id))
+    if as_of is None:
+        as_of = date.today() - timedelta(days=1)
+
+    payload = build_kpi_snapshot(db, workspace_id, as_of)
+    snapshot = db.get(WorkspaceKpiSnapshot, workspace_id)
+    if snapshot is None:
+        snapshot = WorkspaceKpiSnapshot(workspace_id=workspace_id)
+        db.add(snapshot)
+    snapshot.as_of = as_of
+    snapshot.payload = payload
+    snapshot.computed_at = datetime.now(timezone.utc)
+    db.flush()
+    return snapshot
@@ -0,0 +1,198 @@
+"""
+Response cache for the metrics endpoints.
+
+Entries are keyed by workspace, endpoint and normalized parameters, and stamped
+with a per-workspace version held in Redis. Anything that changes a workspace's
+financial data calls bump_workspace_version, so every process stops serving
+older entries immediately. Bodies live in an in-process LRU with Redis as the
+shared second tier.
+
+The version lives only in Redis, so the in-process tier depends on Redis too:
+every lookup, local hits included, reads the version with one Redis GET. A
+per-process version is deliberately not kept. Celery workers write financial
+data and could not bump it, so API processes would serve stale bodies until
+the TTL expired. When Redis is unreachable both tiers are skipped and responses
+are computed live (ETags still apply).
+
+Misses that get stored are computed on the primary. The version is bumped right
+after the writing commit, and a replica up to DATABASE_REPLICA_MAX_LAG_SECONDS
+behind would otherwise cache pre-write data under the new version.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional
+import uuid
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache, get_redis
+from app.core.config import settings
+
+VERSION_KEY_PREFIX = "metrics:version:"
+BODY_KEY_PREFIX = "metrics:body:"
+# After a Redis error, skip Redis for this long instead of paying a timeout per request.
+REDIS_RETRY_AFTER_SECONDS = 5.0
+
+_local_cache = TTLCache(
+    max_entries=settings.METRICS_CACHE_MAX_ENTRIES,
+    default_ttl=settings.METRICS_CACHE_TTL_SECONDS,
+)
+_stats_lock = threading.Lock()
+_stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "bypassed": 0, "not_modified": 0, "version_bumps": 0}
+_redis_down_until = 0.0
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _redis() -> Any:
+    if time.monotonic() < _redis_down_until:
+        return None
+    return get_redis()
+
+
+def _mark_redis_down() -> None:
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + REDIS_RETRY_AFTER_SECONDS
+
+
+def _params_key(endpoint: str, params: dict[str, Any]) -> str:
+    normalized = json.dumps(
+        {name: value for name, value in params.items() if value is not None},
+        sort_keys=True,
+        default=str,
+        separators=(",", ":"),
+    )
+    return f"{endpoint}:{hashlib.sha256(normalized.encode()).hexdigest()[:32]}"
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def _lookup(workspace_id: str, params_key: str) -> tuple[Optional[int], Optional[tuple[bytes, str]]]:
+    """Return (workspace version, cached (body, etag)); version is None when Redis is unavailable."""
+    client = _redis()
+    if client is None:
+        return None, None
+    try:
+        raw_version = client.get(f"{VERSION_KEY_PREFIX}{workspace_id}")
+        version = int(raw_version or 0)
+        local = _local_cache.get((workspace_id, params_key))
+        if local is not None and local[0] == version:
+            _count("local_hits")
+            return version, local[1]
+        raw_body = client.get(f"{BODY_KEY_PREFIX}{workspace_id}:v{version}:{params_key}")
+    except Exception:
+        _mark_redis_down()
+        return None, None
+
+    if raw_body is None:
+        return version, None
+    entry = (raw_body, _etag(raw_body))
+    _local_cache.set((workspace_id, params_key), (version, entry))
+    _count("redis_hits")
+    return version, entry
+
+
+def _store(workspace_id: str, params_key: str, version: int, body: bytes) -> None:
+    _local_cache.set((workspace_id, params_key), (version, (body, _etag(body))))
+    client = _redis()
+    if client is None:
+        return
+    try:
+        client.set(
+            f"{BODY_KEY_PREFIX}{workspace_id}:v{version}:{params_key}",
+            body,
+            ex=settings.METRICS_CACHE_TTL_SECONDS,
+        )
+    except Exception:
+        _mark_redis_down()
+
+
+def bump_workspace_version(workspace_id: uuid.UUID | str) -> None:
+    """Invalidate every cached metrics response for a workspace, in all processes."""
+    workspace_id = str(workspace_id)
+    _local_cache.delete_where(lambda key, _: key[0] == workspace_id)
+    _count("version_bumps")
+    client = _redis()
+    if client is None:
+        return
+    try:
+        client.incr(f"{VERSION_KEY_PREFIX}{workspace_id}")
+    except Exception:
+        _mark_redis_down()
+
+
+async def bump_workspace_version_async(workspace_id: uuid.UUID | str) -> None:
+    await asyncio.to_thread(bump_workspace_version, workspace_id)
+
+
+def conditional_json_response(request: Request, body: bytes, etag: Optional[str] = None) -> Response:
+    """JSON response carrying an ETag, or a 304 when If-None-Match already has it."""
+    etag = etag or _etag(body)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}:
+        _count("not_modified")
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def cached_json_body(
+    workspace_id: uuid.UUID,
+    endpoint: str,
+    params: dict[str, Any],
+    compute: Callable[[AsyncSession], Awaitable[Any]],
+    read_db: AsyncSession,
+    primary_db: AsyncSession,
+) -> tuple[bytes, str]:
+    """
+    Return the serialized `compute(session)` result and its ETag, from cache
+    when the workspace version matches. Misses run on `primary_db`; `read_db`
+    (possibly a replica) is used only when the cache is bypassed and nothing is
+    stored.
+    """
+    workspace_key = str(workspace_id)
+    params_key = _params_key(endpoint, params)
+
+    version: Optional[int] = None
+    if settings.METRICS_CACHE_ENABLED:
+        # Redis calls are blocking; one thread hop covers the version and body reads.
+        version, entry = await asyncio.to_thread(_lookup, workspace_key, params_key)
+        if entry is not None:
+            return entry
+
+    session = read_db if version is None else primary_db
+    body = json.dumps(await compute(session), separators=(",", ":")).encode()
+    if version is None:
+        _count("bypassed")
+    else:
+        _count("misses")
+        await asyncio.to_thread(_store, workspace_key, params_key, version, body)
+    return body, _etag(body)
+
+
+async def cached_json_response(
+    request: Request,
+    workspace_id: uuid.UUID,
+    endpoint: str,
+    params: dict[str, Any],
+    compute: Callable[[AsyncSession], Awaitable[Any]],
+    read_db: AsyncSession,
+    primary_db: AsyncSession,
+) -> Response:
+    """cached_json_body as a response, honoring If-None-Match with a 304."""
+    body, etag = await cached_json_body(workspace_id, endpoint, params, compute, read_db, primary_db)
+    return conditional_json_response(request, body, etag)
+
+
+def metrics_cache_stats() -> dict[str, Any]:
+    with _stats_lock:
+        counters = dict(_stats)
+    return {**_local_cache.stats(), **counters, "enabled": settings.METRICS_CACHE_ENABLED}
@@ -0,0 +1,531 @@
+"""
+SQL-side financial aggregations shared by the metrics endpoints.
+
+Statements are built here and executed by callers, so the same query works
+from async endpoints and from sync Celery workers.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import reduce
+import operator
+from typing import Any, Callable, Iterable, Optional, Sequence
+import uuid
+
+import numpy as np
+from sqlalchemy import Float, Select, Subquery, and_, case, cast, func, or_, select, union_all
+
+from app.models.financial_data import FinancialData
+from app.services.rollup_service import ROLLUP_MODELS, ROLLUP_SUM_COLUMNS, add_months
+
+# Display order doubles as the tie-break order for the top expense.
+EXPENSE_CATEGORIES = (
+    ("Meta Ads", FinancialData.cost_ads_meta),
+    ("Google Ads", FinancialData.cost_ads_google),
+    ("Transaction Fees", FinancialData.cost_transaction_fees),
+    ("Fixed Costs", FinancialData.cost_fixed_allocated),
+    ("Variable Costs", FinancialData.cost_variable),
+)
+
+
+def _shift_years(value: date, years: int) -> date:
+    try:
+        return value.replace(year=value.year + years)
+    except ValueError:
+        # Feb 29 maps to Feb 28 in non-leap years.
+        return value.replace(year=value.year + years, day=28)
+
+
+SUMMARY_COMPARISON_PRESETS = {
+    "previous_day": lambda target: target - timedelta(days=1),
+    "same_weekday_last_week": lambda target: target - timedelta(days=7),
+    "same_day_last_year": lambda target: _shift_years(target, -1),
+}
+
+
+def resolve_comparison_dates(target_date: date, tokens: Iterable[str]) -> list[tuple[str, date]]:
+    """
+    Turn preset names or ISO dates into (label, date) pairs.
+    Raises ValueError for anything that is neither.
+    """
+    resolved: list[tuple[str, date]] = []
+    for token in tokens:
+        token = token.strip()
+        if not token:
+            continue
+        preset = SUMMARY_COMPARISON_PRESETS.get(token)
+        if preset is not None:
+            resolved.append((token, preset(target_date)))
+        else:
+            resolved.append((token, date.fromisoformat(token)))
+    return resolved
+
+
+def _coalesced(column: Any) -> Any:
+    return func.coalesce(column, 0)
+
+
+def _top_expense_case(values: dict[str, Any], emit_label: bool) -> Any:
+    # First category that is >= every other one, matching max() over an ordered dict.
+    whens = []
+    for label, expression in values.items():
+        others = [other for other_label, other in values.items() if other_label != label]
+        condition = and_(*[expression >= other for other in others])
+        whens.append((condition, label if emit_label else expression))
+    return case(*whens)
+
+
+def summary_statement(workspace_id: uuid.UUID, dates: Iterable[date]) -> Select:
+    """One row per requested date with derived KPIs computed by the database."""
+    costs = {label: _coalesced(column) for label, column in EXPENSE_CATEGORIES}
+    revenue_gross = _coalesced(FinancialData.revenue_gross)
+    revenue_net = _coalesced(FinancialData.revenue_net)
+    total_expenses = reduce(operator.add, costs.values())
+    total_ads = costs["Meta Ads"] + costs["Google Ads"]
+
+    return select(
+        FinancialData.date,
+        revenue_gross.label("revenue_gross"),
+        revenue_net.label("revenue_net"),
+        total_expenses.label("total_expenses"),
+        (revenue_net - total_expenses).label("net_profit"),
+        case(
+            (total_ads > 0, cast(revenue_gross, Float) / cast(total_ads, Float)),
+            else_=None,
+        ).label("roas"),
+        _top_expense_case(costs, emit_label=True).label("top_expense_category"),
+        _top_expense_case(costs, emit_label=False).label("top_expense_amount"),
+        _coalesced(FinancialData.transactions_count).label("transactions_count"),
+    ).where(
+        FinancialData.workspace_id == workspace_id,
+        FinancialData.date.in_(sorted(set(dates))),
+    )
+
+
+def summaries_from_rows(rows: Iterable[Any]) -> dict[date, dict[str, Any]]:
+    summaries: dict[date, dict[str, Any]] = {}
+    for row in rows:
+        summaries[row.date] = {
+            "date": row.date,
+            "net_profit": round(float(row.net_profit), 2),
+            "revenue_gross": round(float(row.revenue_gross), 2),
+            "revenue_net": round(float(row.revenue_net), 2),
+            "total_expenses": round(float(row.total_expenses), 2),
+            "top_expense": {
+                "category": row.top_expense_category,
+                "amount": round(float(row.top_expense_amount), 2),
+            },
+            "roas": round(float(row.roas), 2) if row.roas is not None else None,
+            "transactions_count": int(row.transactions_count),
+        }
+    return summaries
+
+
+def net_profit_change_pct(current: dict[str, Any], previous: Optional[dict[str, Any]]) -> Optional[float]:
+    if not previous or previous["net_profit"] == 0:
+        return None
+    return round(
+        ((current["net_profit"] - previous["net_profit"]) / abs(previous["net_profit"])) * 100,
+        1,
+    )
+
+
+def summary_payload(target_date: date, compare_to: date, summaries: dict[date, dict[str, Any]]) -> dict[str, Any]:
+    """MetricsSummaryResponse fields for `target_date`, including change and insight."""
+    summary = summaries.get(target_date)
+    if summary is None:
+        # Zeroed-out summary if no data exists for date
+        return {
+            "date": target_date,
+            "net_profit": 0,
+            "revenue_gross": 0,
+            "revenue_net": 0,
+            "total_expenses": 0,
+            "transactions_count": 0,
+            "insight": "No data available for this date. Connect your integrations to start tracking.",
+        }
+
+    change_pct = net_profit_change_pct(summary, summaries.get(compare_to))
+
+    # Generate a simple insight
+    insight = None
+    if change_pct is not None:
+        if change_pct > 0:
+            insight = f"Your net profit is up {change_pct}% compared to the previous day. Keep it up!"
+        elif change_pct < 0:
+            top = summary["top_expense"]
+            insight = f"Profit dipped {abs(change_pct)}%. Your largest expense was {top['category']} at ${top['amount']:,.2f}."
+        else:
+            insight = "Profit is flat compared to the previous day."
+
+    return {**summary, "net_profit_change_pct": change_pct, "insight": insight}
+
+
+_COST_COLUMNS = tuple(column.key for _, column in EXPENSE_CATEGORIES)
+
+
+@dataclass(frozen=True)
+class DailyMetric:
+    """A /daily series: either a raw column or derived from other columns."""
+
+    name: str
+    sources: tuple[str, ...]
+    derive: Optional[Callable[[dict[str, np.ndarray]], np.ndarray]] = None
+
+
+def _net_profit(columns: dict[str, np.ndarray]) -> np.ndarray:
+    return columns["revenue_net"] - sum(columns[name] for name in _COST_COLUMNS)
+
+
+# Registry order is the field order of DailyMetricRow.
+DAILY_METRICS = {
+    metric.name: metric
+    for metric in (
+        DailyMetric("net_profit", ("revenue_net", *_COST_COLUMNS), _net_profit),
+        DailyMetric("revenue_gross", ("revenue_gross",)),
+        DailyMetric("revenue_net", ("revenue_net",)),
+        *(DailyMetric(name, (name,)) for name in _COST_COLUMNS),
+    )
+}
+
+
+def resolve_daily_metrics(requested: Optional[str]) -> list[str]:
+    """
+    Validate a comma-separated metric list against DAILY_METRICS, in registry
+    order. None or blank selects every metric. Raises ValueError on unknown names.
+    """
+    names = {name.strip() for name in (requested or "").split(",") if name.strip()}
+    if not names:
+        return list(DAILY_METRICS)
+    unknown = sorted(names - DAILY_METRICS.keys())
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+    return [name for name in DAILY_METRICS if name in names]
+
+
+def daily_source_columns(metrics: Iterable[str]) -> list[str]:
+    """Physical columns needed to produce `metrics`, each listed once."""
+    columns: list[str] = []
+    for name in metrics:
+        for source in DAILY_METRICS[name].sources:
+            if source not in columns:
+                columns.append(source)
+    return columns
+
+
+# Longest start..end span, in days, each granularity may request.
+MAX_RANGE_DAYS = {
+    "day": 366,
+    "week": 366 * 5,
+    "month": 366 * 20,
+    "quarter": 366 * 20,
+    "fiscal_year": 366 * 20,
+}
+
+
+def _clipped_periods(
+    workspace_ids: Sequence[uuid.UUID],
+    start_date: date,
+    end_date: date,
+    granularity: str,
+) -> Subquery:
+    """
+    Rollup rows clipped to [start_date, end_date]: periods fully inside the range
+    come straight from the rollup table; the (at most two per workspace) edge
+    periods the range only partly covers are re-summed from their in-range daily
+    rows, so totals match the day granularity over the same range.
+    """
+    model = ROLLUP_MODELS[granularity]
+    covered = select(
+        model.workspace_id,
+        model.period_start,
+        *(getattr(model, name) for name in ROLLUP_SUM_COLUMNS),
+        model.days_count,
+    ).where(
+        model.workspace_id.in_(list(workspace_ids)),
+        model.period_start >= start_date,
+        model.period_end <= end_date,
+    )
+    edges = (
+        select(
+            model.workspace_id,
+            model.period_start,
+            *(_coalesced(func.sum(getattr(FinancialData, name))).label(name) for name in ROLLUP_SUM_COLUMNS),
+            func.count(FinancialData.id).label("days_count"),
+        )
+        .join(
+            FinancialData,
+            and_(
+                FinancialData.workspace_id == model.workspace_id,
+                FinancialData.date >= model.period_start,
+                FinancialData.date <= model.period_end,
+            ),
+        )
+        .where(
+            model.workspace_id.in_(list(workspace_ids)),
+            model.period_end >= start_date,
+            model.period_start <= end_date,
+            or_(model.period_start < start_date, model.period_end > end_date),
+            FinancialData.date >= start_date,
+            FinancialData.date <= end_date,
+        )
+        .group_by(model.workspace_id, model.period_start)
+    )
+    return union_all(covered, edges).subquery("periods")
+
+
+def daily_statement(
+    workspace_id: uuid.UUID,
+    start_date: date,
+    end_date: date,
+    columns: Sequence[str],
+    granularity: str = "day",
+) -> Select:
+    """
+    Date plus only the requested source columns, as floats so rows load straight
+    into an array. Coarser granularities read the matching rollup table, with
+    the edge periods clipped to the range, and append a days_count column.
+    """
+    if granularity == "day":
+        return (
+            select(
+                FinancialData.date,
+                *(cast(_coalesced(getattr(FinancialData, name)), Float).label(name) for name in columns),
+            )
+            .where(
+                FinancialData.workspace_id == workspace_id,
+                FinancialData.date >= start_date,
+                FinancialData.date <= end_date,
+            )
+            .order_by(FinancialData.date.asc())
+        )
+
+    periods = _clipped_periods([workspace_id], start_date, end_date, granularity)
+    return select(
+        periods.c.period_start,
+        *(cast(periods.c[name], Float).label(name) for name in columns),
+        periods.c.days_count,
+    ).order_by(periods.c.period_start.asc())
+
+
+def profit_trend(net_profit: np.ndarray) -> str:
+    # Compare the mean of the first half against the second half.
+    count = net_profit.size
+    if count < 2:
+        return "flat"
+    mid = count // 2
+    first_half_avg = net_profit[:mid].mean()
+    second_half_avg = net_profit[mid:].mean()
+    if second_half_avg > first_half_avg * 1.05:
+        return "up"
+    if second_half_avg < first_half_avg * 0.95:
+        return "down"
+    return "flat"
+
+
+def daily_series_payload(
+    rows: Sequence[Any],
+    metrics: Sequence[str],
+    columns: Sequence[str],
+    per_period: bool = False,
+) -> dict[str, Any]:
+    """
+    Build the /daily response body column-wise: one float matrix for all rows,
+    derived series as vector ops, and plain lists for JSON serialization.
+
+    The profit summary is included only when net_profit is among `metrics`.
+    Rollup rows carry a trailing days_count so the average stays per day.
+    """
+    width = len(columns) + (1 if per_period else 0)
+    dates = [row[0].isoformat() for row in rows]
+    values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), width)
+    source = {name: values[:, index] for index, name in enumerate(columns)}
+
+    series: dict[str, np.ndarray] = {}
+    for name in metrics:
+        metric = DAILY_METRICS[name]
+        series[name] = metric.derive(source) if metric.derive else source[name]
+
+    rounded = {name: np.round(column, 2).tolist() for name, column in series.items()}
+    data = [
+        {"date": day, **dict(zip(rounded, row_values))}
+        for day, row_values in zip(dates, zip(*rounded.values()))
+    ]
+
+    summary = None
+    if "net_profit" in series:
+        total_profit = float(series["net_profit"].sum())
+        count = int(values[:, -1].sum()) if per_period else len(rows)
+        summary = {
+            "total_profit": round(total_profit, 2),
+            "avg_daily_profit": round(total_profit / count, 2) if count > 0 else 0,
+            "trend": profit_trend(np.round(series["net_profit"], 2)),
+        }
+    return {"data": data, "summary": summary}
+
+
+def _month_to_date(as_of: date, months_back: int) -> tuple[date, date]:
+    start = add_months(as_of.replace(day=1), -months_back)
+    # Clamp the day so Mar 31 compares against Feb 28/29.
+    end_day = min(as_of.day, (add_months(start, 1) - timedelta(days=1)).day)
+    return start, start.replace(day=end_day)
+
+
+def _year_to_date(as_of: date, years_back: int) -> tuple[date, date]:
+    end = _shift_years(as_of, -years_back)
+    return end.replace(month=1, day=1), end
+
+
+# Each preset maps (as_of, periods back) to an inclusive date range.
+PERIOD_PRESETS = {
+    "last_7_days": lambda as_of, back: (as_of - timedelta(days=7 * back + 6), as_of - timedelta(days=7 * back)),
+    "last_30_days": lambda as_of, back: (as_of - timedelta(days=30 * back + 29), as_of - timedelta(days=30 * back)),
+    "month_to_date": _month_to_date,
+    "year_to_date": _year_to_date,
+}
+MAX_PERIODS = 24
+
+
+def period_ranges(preset: str, as_of: date, count: int) -> list[tuple[date, date]]:
+    """The current period first, then `count - 1` earlier ones. Raises ValueError on an unknown preset."""
+    if preset not in PERIOD_PRESETS:
+        raise ValueError(f"Unknown period preset: {preset}")
+    return [PERIOD_PRESETS[preset](as_of, back) for back in range(count)]
+
+
+def periods_statement(workspace_id: uuid.UUID, ranges: Sequence[tuple[date, date]]) -> Select:
+    """
+    Sum every period in one scan: a CASE expression buckets each daily row into
+    its period index and the database aggregates per bucket.
+    """
+    costs = [_coalesced(func.sum(column)) for _, column in EXPENSE_CATEGORIES]
+    in_range = [FinancialData.date.between(start, end) for start, end in ranges]
+    period_index = case(*((condition, index) for index, condition in enumerate(in_range))).label("period_index")
+    return (
+        select(
+            period_index,
+            func.count(func.distinct(FinancialData.date)).label("days_with_data"),
+            _coalesced(func.sum(FinancialData.revenue_gross)).label("revenue_gross"),
+            _coalesced(func.sum(FinancialData.revenue_net)).label("revenue_net"),
+            reduce(operator.add, costs).label("total_expenses"),
+            _coalesced(func.sum(FinancialData.transactions_count)).label("transactions_count"),
+        )
+        .where(FinancialData.workspace_id == workspace_id, or_(*in_range))
+        .group_by(period_index)
+    )
+
+
+def _pct_change(current: float, previous: Optional[float]) -> Optional[float]:
+    if not previous:
+        return None
+    return round((current - previous) / abs(previous) * 100, 1)
+
+
+def periods_from_rows(rows: Iterable[Any], ranges: Sequence[tuple[date, date]]) -> list[dict[str, Any]]:
+    """One entry per range, zero-filled, each compared against the period before it."""
+    by_index = {row.period_index: row for row in rows}
+    periods: list[dict[str, Any]] = []
+    for index, (start, end) in enumerate(ranges):
+        row = by_index.get(index)
+        revenue_net = round(float(row.revenue_net), 2) if row else 0.0
+        total_expenses = round(float(row.total_expenses), 2) if row else 0.0
+        periods.append(
+            {
+                "start_date": start,
+                "end_date": end,
+                "days_with_data": int(row.days_with_data) if row else 0,
+                "revenue_gross": round(float(row.revenue_gross), 2) if row else 0.0,
+                "revenue_net": revenue_net,
+                "total_expenses": total_expenses,
+                "net_profit": round(revenue_net - total_expenses, 2),
+                "transactions_count": int(row.transactions_count) if row else 0,
+            }
+        )
+    for current, previous in zip(periods, periods[1:]):
+        current["net_profit_change_pct"] = _pct_change(current["net_profit"], previous["net_profit"])
+        current["revenue_net_change_pct"] = _pct_change(current["revenue_net"], previous["revenue_net"])
+    return periods
+
+
+def organization_series_statement(
+    workspace_ids: Sequence[uuid.UUID],
+    start_date: date,
+    end_date: date,
+    granularity: str = "day",
+) -> Select:
+    """
+    (workspace_id, date, totals...) for many workspaces in one grouped query,
+    read from the rollup table (edge periods clipped to the range) when the
+    granularity has one.
+    """
+    if granularity == "day":
+        source = FinancialData.__table__.c
+        bucket = FinancialData.date
+    else:
+        source = _clipped_periods(workspace_ids, start_date, end_date, granularity).c
+        bucket = source.period_start
+    costs = [_coalesced(func.sum(source[column.key])) for _, column in EXPENSE_CATEGORIES]
+    statement = select(
+        source.workspace_id,
+        bucket.label("date"),
+        cast(_coalesced(func.sum(source.revenue_gross)), Float).label("revenue_gross"),
+        cast(_coalesced(func.sum(source.revenue_net)), Float).label("revenue_net"),
+        cast(reduce(operator.add, costs), Float).label("total_expenses"),
+        _coalesced(func.sum(source.transactions_count)).label("transactions_count"),
+    )
+    if granularity == "day":
+        statement = statement.where(
+            FinancialData.workspace_id.in_(list(workspace_ids)),
+            FinancialData.date >= start_date,
+            FinancialData.date <= end_date,
+        )
+    return statement.group_by(source.workspace_id, bucket).order_by(bucket.asc())
+
+
+def _series_point(day: Any, revenue_gross: float, revenue_net: float, expenses: float, transactions: int) -> dict[str, Any]:
+    return {
+        "date": day,
+        "revenue_gross": round(revenue_gross, 2),
+        "revenue_net": round(revenue_net, 2),
+        "total_expenses": round(expenses, 2),
+        "net_profit": round(revenue_net - expenses, 2),
+        "transactions_count": int(transactions),
+    }
+
+
+def organization_series_payload(rows: Sequence[Any], workspaces: dict[uuid.UUID, str]) -> dict[str, Any]:
+    """Per-workspace series and totals plus the organization-wide series, from one result set."""
+    per_workspace: dict[uuid.UUID, list[Any]] = {workspace_id: [] for workspace_id in workspaces}
+    combined: dict[Any, list[float]] = {}
+    for row in rows:
+        per_workspace[row.workspace_id].append(row)
+        sums = combined.setdefault(row.date, [0.0, 0.0, 0.0, 0])
+        sums[0] += row.revenue_gross
+        sums[1] += row.revenue_net
+        sums[2] += row.total_expenses
+        sums[3] += row.transactions_count
+
+    def totals(points: list[dict[str, Any]]) -> dict[str, Any]:
+        revenue_net = sum(point["revenue_net"] for point in points)
+        expenses = sum(point["total_expenses"] for point in points)
+        return {
+            "revenue_gross": round(sum(point["revenue_gross"] for point in points), 2),
+            "revenue_net": round(revenue_net, 2),
+            "total_expenses": round(expenses, 2),
+            "net_profit": round(revenue_net - expenses, 2),
+            "transactions_count": sum(point["transactions_count"] for point in points),
+        }
+
+    workspace_series = []
+    for workspace_id, name in workspaces.items():
+        points = [
+            _series_point(row.date, row.revenue_gross, row.revenue_net, row.total_expenses, row.transactions_count)
+            for row in per_workspace[workspace_id]
+        ]
+        workspace_series.append(
+            {"workspace_id": workspace_id, "workspace_name": name, "data": points, "totals": totals(points)}
+        )
+    combined_points = [_series_point(day, *sums) for day, sums in sorted(combined.items())]
+    return {
+        "workspaces": workspace_series,
+        "total": {"data": combined_points, "totals": totals(combined_points)},
+    }
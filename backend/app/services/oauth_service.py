@@ -80,20 +80,40 @@ def _ensure_provider(provider: str) -> str:
     return key
 
 
-def _normalize_shop_domain(shop_domain: Optional[str]) -> str:
-    if not shop_domain:
-        raise ValueError("shop_domain is required for Shopify OAuth.")
+def _bare_shop_domain(shop_domain: str) -> str:
     domain = shop_domain.strip().lower()
     if domain.startswith("https://"):
         domain = domain[len("https://") :]
     if domain.startswith("http://"):
         domain = domain[len("http://") :]
-    domain = domain.split("/")[0]
+    return domain.split("/")[0]
+
+
+def _normalize_shop_domain(shop_domain: Optional[str]) -> str:
+    if not shop_domain:
+        raise ValueError("shop_domain is required for Shopify OAuth.")
+    domain = _bare_shop_domain(shop_domain)
     if not domain.endswith(".myshopify.com"):
         raise ValueError("Shopify shop_domain must end with .myshopify.com")
     return domain
 
 
+def external_account_key(
+    provider: str,
+    account_id: Optional[str],
+    shop_domain: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Normalized key webhooks are routed by: the bare, lower-cased shop domain
+    for Shopify, the provider account id (e.g. Stripe acct_...) otherwise.
+    """
+    if provider == "shopify":
+        key = _bare_shop_domain(shop_domain or account_id or "")
+    else:
+        key = (account_id or "").strip()
+    return key or None
+
+
 def build_provider_config(provider: str, shop_domain: Optional[str] = None) -> OAuthProviderConfig:
     provider_key = _ensure_provider(provider)
     client_id, client_secret = _get_client_credentials(provider_key)
@@ -0,0 +1,168 @@
+"""
+Incremental maintenance of the week/month/quarter/fiscal-year rollups of
+fact_daily_financials.
+
+Writers call refresh_rollups with the date range they touched, inside their own
+transaction; every period overlapping that range is recomputed from the daily
+rows and replaced.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Optional
+import uuid
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.financial_data import FinancialData
+from app.models.financial_rollup import (
+    FiscalYearFinancials,
+    MonthlyFinancials,
+    QuarterlyFinancials,
+    WeeklyFinancials,
+)
+from app.models.organization import Organization
+from app.models.user import User
+from app.models.workspace import Workspace
+
+ROLLUP_MODELS: dict[str, Any] = {
+    "week": WeeklyFinancials,
+    "month": MonthlyFinancials,
+    "quarter": QuarterlyFinancials,
+    "fiscal_year": FiscalYearFinancials,
+}
+
+ROLLUP_SUM_COLUMNS = (
+    "revenue_gross",
+    "revenue_net",
+    "cost_ads_meta",
+    "cost_ads_google",
+    "cost_transaction_fees",
+    "cost_fixed_allocated",
+    "cost_variable",
+    "transactions_count",
+)
+
+_PERIOD_MONTHS = {"month": 1, "quarter": 3, "fiscal_year": 12}
+
+
+def add_months(value: date, months: int) -> date:
+    month_index = value.month - 1 + months
+    return value.replace(year=value.year + month_index // 12, month=month_index % 12 + 1)
+
+
+def period_start(day: date, granularity: str, fiscal_year_start: int = 1) -> date:
+    """First day of the `granularity` period containing `day`. Weeks start on Monday."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "quarter":
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    if granularity == "fiscal_year":
+        start = day.replace(month=fiscal_year_start, day=1)
+        return start if day >= start else start.replace(year=day.year - 1)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def period_end(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=6)
+    return add_months(start, _PERIOD_MONTHS[granularity]) - timedelta(days=1)
+
+
+def workspace_fiscal_year_start(db: Session, workspace_id: uuid.UUID) -> int:
+    """Month (1-12) the workspace's fiscal year starts in, from the organization owner."""
+    month = db.execute(
+        select(User.fiscal_year_start)
+        .join(Organization, Organization.owner_user_id == User.id)
+        .join(Workspace, Workspace.organization_id == Organization.id)
+        .where(Workspace.id == workspace_id)
+    ).scalar()
+    return month if month in range(1, 13) else 1
+
+
+def refresh_rollups(
+    db: Session,
+    workspace_id: uuid.UUID | str,
+    start_date: date,
+    end_date: date,
+    fiscal_year_start: Optional[int] = None,
+) -> None:
+    """
+    Recompute every rollup period overlapping [start_date, end_date] for one
+    workspace. Flushes but does not commit.
+    """
+    workspace_id = uuid.UUID(str(workspace_id))
+    if fiscal_year_start is None:
+        fiscal_year_start = workspace_fiscal_year_start(db, workspace_id)
+
+    windows = {}
+    for granularity in ROLLUP_MODELS:
+        first = period_start(start_date, granularity, fiscal_year_start)
+        last = period_start(end_date, granularity, fiscal_year_start)
+        windows[granularity] = (first, period_end(last, granularity))
+    scan_start = min(first for first, _ in windows.values())
+    scan_end = max(last for _, last in windows.values())
+
+    # One pass over the daily rows, collapsed across users per date.
+    daily_rows = db.execute(
+        select(
+            FinancialData.date,
+            *(func.sum(func.coalesce(getattr(FinancialData, name), 0)).label(name) for name in ROLLUP_SUM_COLUMNS),
+        )
+        .where(
+            FinancialData.workspace_id == workspace_id,
+            FinancialData.date >= scan_start,
+            FinancialData.date <= scan_end,
+        )
+        .group_by(FinancialData.date)
+    ).all()
+
+    for granularity, model in ROLLUP_MODELS.items():
+        window_start, window_end = windows[granularity]
+        buckets: dict[date, dict[str, Any]] = {}
+        for row in daily_rows:
+            if not window_start <= row.date <= window_end:
+                continue
+            start = period_start(row.date, granularity, fiscal_year_start)
+            bucket = buckets.setdefault(
+                start,
+                {name: Decimal(0) for name in ROLLUP_SUM_COLUMNS} | {"days_count": 0},
+            )
+            for name in ROLLUP_SUM_COLUMNS:
+                bucket[name] += Decimal(str(getattr(row, name) or 0))
+            bucket["days_count"] += 1
+
+        db.execute(
+            delete(model).where(
+                model.workspace_id == workspace_id,
+                model.period_start >= window_start,
+                model.period_start <= window_end,
+            )
+        )
+        db.add_all(
+            model(
+                workspace_id=workspace_id,
+                period_start=start,
+                period_end=period_end(start, granularity),
+                **{**bucket, "transactions_count": int(bucket["transactions_count"])},
+            )
+            for start, bucket in buckets.items()
+        )
+    db.flush()
+
+
+def rebuild_rollups(db: Session, workspace_id: uuid.UUID | str) -> None:
+    """Recompute all rollups for a workspace, e.g. after a fiscal year change or for backfill."""
+    workspace_id = uuid.UUID(str(workspace_id))
+    first_day, last_day = db.execute(
+        select(func.min(FinancialData.date), func.max(FinancialData.date)).where(
+            FinancialData.workspace_id == workspace_id
+        )
+    ).one()
+    for model in ROLLUP_MODELS.values():
+        db.execute(delete(model).where(model.workspace_id == workspace_id))
+    if first_day is not None:
+        refresh_rollups(db, workspace_id, first_day, last_day)
+    db.flush()
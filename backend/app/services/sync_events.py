@@ -0,0 +1,140 @@
+"""
+Sync job state transitions fanned out over Redis pub/sub, one channel per
+workspace, so any API worker can stream them to a connected client.
+"""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Iterable, Optional
+import uuid
+
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.models.sync_job import SyncJob
+from app.models.sync_run import SyncRun
+
+CHANNEL_PREFIX = "sync-events:"
+# After a Redis error, skip publishing for this long instead of paying a timeout per transition.
+REDIS_RETRY_AFTER_SECONDS = 5.0
+
+_redis_down_until = 0.0
+
+
+def channel_for(workspace_id: uuid.UUID | str) -> str:
+    return f"{CHANNEL_PREFIX}{workspace_id}"
+
+
+def _redis() -> Any:
+    if time.monotonic() < _redis_down_until:
+        return None
+    return get_redis()
+
+
+def _mark_redis_down() -> None:
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + REDIS_RETRY_AFTER_SECONDS
+
+
+def _isoformat(value: Any) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def sync_event_payload(sync_job: SyncJob, sync_run: Optional[SyncRun] = None) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "sync_job_id": str(sync_job.id),
+        "integration_id": str(sync_job.integration_id),
+        "provider": sync_job.provider,
+        "status": sync_job.status,
+        "trigger_type": sync_job.trigger_type,
+        "trigger_count": sync_job.trigger_count,
+        "attempt_count": sync_job.attempt_count,
+        "latest_error": sync_job.latest_error,
+        "requested_at": _isoformat(sync_job.requested_at),
+        "started_at": _isoformat(sync_job.started_at),
+        "finished_at": _isoformat(sync_job.finished_at),
+        "run": None,
+    }
+    if sync_run is not None:
+        payload["run"] = {
+            "id": str(sync_run.id),
+            "status": sync_run.status,
+            "attempt_number": sync_run.attempt_number,
+            "error_message": sync_run.error_message,
+            "started_at": _isoformat(sync_run.started_at),
+            "finished_at": _isoformat(sync_run.finished_at),
+        }
+    return payload
+
+
+def publish_sync_payload(workspace_id: Optional[uuid.UUID], payload: dict[str, Any]) -> None:
+    """Best-effort publish of a committed state; subscribers that miss it see the next one."""
+    client = _redis()
+    if client is None or workspace_id is None:
+        return
+    try:
+        client.publish(channel_for(workspace_id), json.dumps(payload))
+    except Exception:
+        _mark_redis_down()
+
+
+def publish_sync_event(sync_job: SyncJob, sync_run: Optional[SyncRun] = None) -> None:
+    publish_sync_payload(sync_job.workspace_id, sync_event_payload(sync_job, sync_run))
+
+
+async def publish_sync_event_async(sync_job: SyncJob, sync_run: Optional[SyncRun] = None) -> None:
+    # Serialize on the loop (attribute access), publish off it (blocking socket IO).
+    client = _redis()
+    if client is None or sync_job.workspace_id is None:
+        return
+    message = json.dumps(sync_event_payload(sync_job, sync_run))
+    try:
+        await asyncio.to_thread(client.publish, channel_for(sync_job.workspace_id), message)
+    except Exception:
+        _mark_redis_down()
+
+
+def format_sse(data: str, event: str = "sync_job") -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def open_subscription(workspace_id: uuid.UUID) -> Any:
+    """
+    Subscribe before the caller reads current state, so no transition can fall
+    between the snapshot and the live stream. Raises if Redis is unreachable.
+    """
+    import redis.asyncio as aioredis
+
+    client = aioredis.Redis.from_url(settings.REDIS_URL, socket_connect_timeout=0.5)
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(channel_for(workspace_id))
+    except Exception:
+        await close_subscription((client, pubsub))
+        raise
+    return client, pubsub
+
+
+async def close_subscription(subscription: Any) -> None:
+    client, pubsub = subscription
+    await pubsub.aclose()
+    await client.aclose()
+
+
+async def stream_sync_events(subscription: Any, initial: Iterable[dict[str, Any]]) -> AsyncIterator[str]:
+    """SSE frames: the initial job states, then live transitions, with keep-alive comments."""
+    _, pubsub = subscription
+    try:
+        for payload in initial:
+            yield format_sse(json.dumps(payload))
+        while True:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=settings.SYNC_EVENTS_HEARTBEAT_SECONDS,
+            )
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+            data = message["data"]
+            yield format_sse(data.decode() if isinstance(data, bytes) else data)
+    finally:
+        await close_subscription(subscription)
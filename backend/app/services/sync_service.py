@@ -1,11 +1,24 @@
-from datetime import datetime, timezone
+import asyncio
+from datetime import datetime, timedelta, timezone
 import uuid
 
+from sqlalchemy import case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.models.integration import Integration
 from app.models.sync_job import SyncJob
-from app.workers.tasks import run_sync_job
+from app.models.sync_job_outbox import SyncJobOutbox
+from app.services.sync_events import (
+    publish_sync_event_async,
+    publish_sync_payload,
+    sync_event_payload,
+)
+from app.workers.tasks import dispatch_sync_job_outbox, run_sync_job
+
+# Jobs that have not started yet, so a sync they trigger still covers a new event.
+COALESCIBLE_STATUSES = ("pending", "queued")
 
 
 def create_sync_job(
@@ -29,19 +42,207 @@ def create_sync_job(
     return sync_job
 
 
-def enqueue_sync_job(db: Session, sync_job: SyncJob) -> SyncJob:
-    try:
-        async_result = run_sync_job.delay(str(sync_job.id))
-        sync_job.celery_task_id = async_result.id
+async def create_sync_job_async(
+    db: AsyncSession,
+    workspace_id: uuid.UUID,
+    integration: Integration,
+    trigger_type: str = "manual",
+    requested_by_user_id: uuid.UUID | None = None,
+) -> SyncJob:
+    return await db.run_sync(
+        create_sync_job,
+        workspace_id,
+        integration,
+        trigger_type,
+        requested_by_user_id,
+    )
+
+
+def coalesce_sync_jobs(
+    db: Session,
+    integrations: list[Integration],
+    trigger_counts: dict[uuid.UUID, int] | None = None,
+    trigger_type: str = "webhook",
+) -> tuple[list[SyncJob], list[SyncJob]]:
+    """
+    Fold triggers into each integration's pending/queued job requested within
+    SYNC_COALESCE_WINDOW_SECONDS, creating jobs for the rest, in a fixed number
+    of statements. trigger_counts defaults to one trigger per integration.
+    Returns (created, coalesced); flushes but does not commit.
+    """
+    integrations = [integration for integration in integrations if integration.workspace_id]
+    if not integrations:
+        return [], []
+    counts = {integration.id: (trigger_counts or {}).get(integration.id, 1) for integration in integrations}
+
+    # Serialize concurrent triggers per integration on its row (no-op on SQLite,
+    # whose writers are serialized anyway). Sorted so batches lock in one order.
+    db.execute(select(Integration.id).where(Integration.id.in_(sorted(counts))).with_for_update())
+    window_start = datetime.now(timezone.utc) - timedelta(seconds=settings.SYNC_COALESCE_WINDOW_SECONDS)
+    ranked = (
+        select(
+            SyncJob.id,
+            func.row_number()
+            .over(partition_by=SyncJob.integration_id, order_by=SyncJob.requested_at.desc())
+            .label("position"),
+        )
+        .where(
+            SyncJob.integration_id.in_(counts),
+            SyncJob.status.in_(COALESCIBLE_STATUSES),
+            SyncJob.requested_at >= window_start,
+        )
+        .subquery()
+    )
+    candidates = db.execute(
+        select(SyncJob.id, SyncJob.integration_id).join(ranked, ranked.c.id == SyncJob.id).where(ranked.c.position == 1)
+    ).all()
+
+    coalesced: list[SyncJob] = []
+    if candidates:
+        # The status check is repeated on the updated rows so a job a worker has
+        # just claimed is not counted as covering these triggers.
+        folded_ids = db.execute(
+            update(SyncJob)
+            .where(SyncJob.id.in_([job_id for job_id, _ in candidates]), SyncJob.status.in_(COALESCIBLE_STATUSES))
+            .values(
+                trigger_count=SyncJob.trigger_count
+                + case({job_id: counts[integration_id] for job_id, integration_id in candidates}, value=SyncJob.id)
+            )
+            .returning(SyncJob.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        if folded_ids:
+            coalesced = list(
+                db.execute(
+                    select(SyncJob).where(SyncJob.id.in_(folded_ids)).execution_options(populate_existing=True)
+                ).scalars()
+            )
+
+    covered = {sync_job.integration_id for sync_job in coalesced}
+    now = datetime.now(timezone.utc)
+    created = [
+        SyncJob(
+            workspace_id=integration.workspace_id,
+            integration_id=integration.id,
+            provider=integration.platform,
+            status="pending",
+            trigger_type=trigger_type,
+            trigger_count=counts[integration.id],
+            requested_at=now,
+        )
+        for integration in integrations
+        if integration.id not in covered
+    ]
+    db.add_all(created)
+    db.flush()
+    return created, coalesced
+
+
+def _write_outbox(db: Session, sync_jobs: list[SyncJob], countdown: int | None) -> None:
+    run_after = datetime.now(timezone.utc) + timedelta(seconds=countdown) if countdown else None
+    for sync_job in sync_jobs:
         sync_job.status = "queued"
-    except Exception as exc:
-        sync_job.status = "failed"
-        sync_job.latest_error = f"Unable to enqueue sync job: {exc}"
+        # Chosen up front so dispatch never has to write back to the job row.
+        sync_job.celery_task_id = str(uuid.uuid4())
+        db.add(SyncJobOutbox(sync_job_id=sync_job.id, run_after=run_after))
+
+
+def _kick_dispatcher() -> None:
+    """Best-effort wake-up; rows a failed kick leaves behind go out with the next dispatch."""
+    if not settings.SYNC_OUTBOX_KICK:
+        return
+    try:
+        dispatch_sync_job_outbox.delay()
+    except Exception:
+        return
+
+
+def enqueue_sync_jobs(db: Session, sync_jobs: list[SyncJob], countdown: int | None = None) -> list[SyncJob]:
+    """
+    Queue jobs by writing their outbox rows in the caller's transaction and
+    committing once; dispatch_sync_outbox publishes them to Celery.
+    """
+    _write_outbox(db, sync_jobs, countdown)
+    # Serialized before the commit expires the jobs, so publishing costs no reloads.
+    events = [(sync_job.workspace_id, sync_event_payload(sync_job)) for sync_job in sync_jobs]
     db.commit()
-    db.refresh(sync_job)
+    for workspace_id, payload in events:
+        publish_sync_payload(workspace_id, payload)
+    if sync_jobs:
+        _kick_dispatcher()
+    return sync_jobs
+
+
+def enqueue_sync_job(db: Session, sync_job: SyncJob, countdown: int | None = None) -> SyncJob:
+    enqueue_sync_jobs(db, [sync_job], countdown)
     return sync_job
 
 
+async def enqueue_sync_job_async(
+    db: AsyncSession,
+    sync_job: SyncJob,
+    countdown: int | None = None,
+) -> SyncJob:
+    await db.run_sync(_write_outbox, [sync_job], countdown)
+    await db.commit()
+    await publish_sync_event_async(sync_job)
+    # The broker publish is blocking network IO; keep it off the event loop.
+    await asyncio.to_thread(_kick_dispatcher)
+    return sync_job
+
+
+def dispatch_sync_outbox(db: Session, limit: int) -> int:
+    """
+    Publish up to `limit` undispatched outbox rows to Celery over one producer
+    connection, then mark the sent rows in one UPDATE. Delivery is at least
+    once; run_sync_job ignores a job that is no longer queued. Concurrent
+    dispatchers skip each other's rows on Postgres.
+    """
+    rows = db.execute(
+        select(SyncJobOutbox.id, SyncJobOutbox.run_after, SyncJob.id, SyncJob.celery_task_id)
+        .join(SyncJob, SyncJob.id == SyncJobOutbox.sync_job_id)
+        .where(SyncJobOutbox.dispatched_at.is_(None))
+        .order_by(SyncJobOutbox.created_at)
+        .limit(limit)
+        .with_for_update(of=SyncJobOutbox, skip_locked=True)
+    ).all()
+    if not rows:
+        return 0
+
+    sent: list[uuid.UUID] = []
+    error: Exception | None = None
+    try:
+        with run_sync_job.app.producer_or_acquire() as producer:
+            for outbox_id, run_after, sync_job_id, task_id in rows:
+                run_sync_job.apply_async(
+                    args=[str(sync_job_id)],
+                    task_id=task_id,
+                    eta=run_after,
+                    producer=producer,
+                )
+                sent.append(outbox_id)
+    except Exception as exc:
+        error = exc
+
+    if sent:
+        db.execute(
+            update(SyncJobOutbox)
+            .where(SyncJobOutbox.id.in_(sent))
+            .values(dispatched_at=datetime.now(timezone.utc))
+        )
+    if error is not None:
+        db.execute(
+            update(SyncJobOutbox)
+            .where(SyncJobOutbox.id.in_([row[0] for row in rows[len(sent):]]))
+            .values(
+                attempt_count=SyncJobOutbox.attempt_count + 1,
+                latest_error=f"{type(error).__name__}: {error}",
+            )
+        )
+    db.commit()
+    return len(sent)
+
+
 def get_latest_sync_job(db: Session, integration_id: uuid.UUID) -> SyncJob | None:
     return (
         db.query(SyncJob)
@@ -49,3 +250,30 @@ def get_latest_sync_job(db: Session, integration_id: uuid.UUID) -> SyncJob | Non
         .order_by(SyncJob.requested_at.desc())
         .first()
     )
+
+
+def get_latest_sync_jobs(db: Session, integration_ids: list[uuid.UUID]) -> dict[uuid.UUID, SyncJob]:
+    """
+    Latest job per integration in one query. The window runs over the
+    (integration_id, requested_at DESC) INCLUDE (id) index, so only the winning
+    rows are fetched from the table.
+    """
+    if not integration_ids:
+        return {}
+    ranked = (
+        select(
+            SyncJob.id,
+            func.row_number()
+            .over(partition_by=SyncJob.integration_id, order_by=SyncJob.requested_at.desc())
+            .label("position"),
+        )
+        .where(SyncJob.integration_id.in_(integration_ids))
+        .subquery()
+    )
+    latest = (
+        db.query(SyncJob)
+        .join(ranked, ranked.c.id == SyncJob.id)
+        .filter(ranked.c.position == 1)
+        .all()
+    )
+    return {sync_job.integration_id: sync_job for sync_job in latest}
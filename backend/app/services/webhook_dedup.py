@@ -0,0 +1,112 @@
+"""
+Provider webhook event-id deduplication.
+
+Stripe and Shopify redeliver events until they see a 2xx, so the same event id
+can arrive several times. The first delivery claims the id with a Redis
+SET NX EX; later deliveries are acknowledged without touching the database.
+When Redis is unreachable an in-process cache stands in, which still catches
+retries that land on the same API process.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Optional
+
+from app.core.cache import TTLCache, get_redis
+from app.core.config import settings
+
+EVENT_KEY_PREFIX = "webhook:event:"
+# After a Redis error, use the local cache for this long instead of paying a timeout per delivery.
+REDIS_RETRY_AFTER_SECONDS = 5.0
+
+_local_claims = TTLCache(
+    max_entries=settings.WEBHOOK_DEDUP_LOCAL_MAX_ENTRIES,
+    default_ttl=settings.WEBHOOK_DEDUP_TTL_SECONDS,
+)
+_local_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"claimed": 0, "duplicates": 0, "released": 0, "local_fallbacks": 0}
+_redis_down_until = 0.0
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _redis() -> Any:
+    if time.monotonic() < _redis_down_until:
+        return None
+    return get_redis()
+
+
+def _mark_redis_down() -> None:
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + REDIS_RETRY_AFTER_SECONDS
+
+
+def _event_key(provider: str, event_id: str) -> str:
+    return f"{EVENT_KEY_PREFIX}{provider}:{event_id}"
+
+
+def _claim_locally(key: str) -> bool:
+    _count("local_fallbacks")
+    with _local_lock:
+        if _local_claims.get(key) is not None:
+            return False
+        _local_claims.set(key, True)
+        return True
+
+
+def claim_webhook_event(provider: str, event_id: Optional[str]) -> bool:
+    """
+    True for the first delivery of an event id within WEBHOOK_DEDUP_TTL_SECONDS,
+    False for a duplicate. Events without an id are always processed.
+    """
+    if not event_id:
+        return True
+    key = _event_key(provider, event_id)
+    client = _redis()
+    claimed: Optional[bool] = None
+    if client is not None:
+        try:
+            claimed = bool(client.set(key, b"1", nx=True, ex=settings.WEBHOOK_DEDUP_TTL_SECONDS))
+        except Exception:
+            _mark_redis_down()
+    if claimed is None:
+        claimed = _claim_locally(key)
+    _count("claimed" if claimed else "duplicates")
+    return claimed
+
+
+def release_webhook_event(provider: str, event_id: Optional[str]) -> None:
+    """Forget a claim whose processing failed, so the provider's retry is handled."""
+    if not event_id:
+        return
+    key = _event_key(provider, event_id)
+    _local_claims.delete(key)
+    _count("released")
+    client = _redis()
+    if client is None:
+        return
+    try:
+        client.delete(key)
+    except Exception:
+        _mark_redis_down()
+
+
+async def claim_webhook_event_async(provider: str, event_id: Optional[str]) -> bool:
+    if not event_id:
+        return True
+    return await asyncio.to_thread(claim_webhook_event, provider, event_id)
+
+
+async def release_webhook_event_async(provider: str, event_id: Optional[str]) -> None:
+    if event_id:
+        await asyncio.to_thread(release_webhook_event, provider, event_id)
+
+
+def webhook_dedup_stats() -> dict[str, Any]:
+    with _stats_lock:
+        counters = dict(_stats)
+    return {**counters, "local_size": _local_claims.stats()["size"]}
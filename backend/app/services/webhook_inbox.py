@@ -0,0 +1,179 @@
+"""
+Webhook inbox: handlers persist verified events and return; the
+process_webhook_inbox task drains pending rows in batches, resolves their
+integrations in one query and coalesces/creates sync jobs in bulk.
+
+Handlers kick that task after each insert, but the kick is best effort, so
+app.workers.inbox_consumer also polls for pending rows. A failed batch is
+retried with exponential backoff until WEBHOOK_INBOX_MAX_ATTEMPTS.
+"""
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import and_, bindparam, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.integration import Integration
+from app.models.sync_job import SyncJob
+from app.models.webhook_event import WebhookEvent
+from app.services.metrics_cache import bump_workspace_version
+from app.services.sync_service import coalesce_sync_jobs, enqueue_sync_jobs
+from app.workers.tasks import process_webhook_inbox
+
+
+async def record_webhook_event(
+    db: AsyncSession,
+    provider: str,
+    payload: bytes,
+    event_id: Optional[str] = None,
+    topic: Optional[str] = None,
+    account_key: Optional[str] = None,
+) -> WebhookEvent:
+    event = WebhookEvent(
+        provider=provider,
+        event_id=event_id,
+        topic=topic,
+        account_key=account_key,
+        payload=payload.decode("utf-8", errors="replace"),
+    )
+    db.add(event)
+    await db.commit()
+    return event
+
+
+async def kick_webhook_inbox() -> None:
+    """
+    Best-effort wake-up of the consumer. Rows stay pending if the broker is
+    down and are drained by the next successful kick.
+    """
+    try:
+        await asyncio.to_thread(process_webhook_inbox.delay)
+    except Exception:
+        return
+
+
+def _resolve_integrations(db: Session, events: list[WebhookEvent]) -> dict[WebhookEvent, list[Integration]]:
+    keyed: dict[str, set[str]] = {}
+    fan_out: set[str] = set()
+    for event in events:
+        if event.account_key:
+            keyed.setdefault(event.provider, set()).add(event.account_key)
+        else:
+            fan_out.add(event.provider)
+
+    conditions = [
+        and_(Integration.platform == provider, Integration.external_account_key.in_(keys))
+        for provider, keys in keyed.items()
+    ]
+    if fan_out:
+        conditions.append(Integration.platform.in_(fan_out))
+    integrations = db.execute(
+        select(Integration).where(Integration.status == "active", or_(*conditions))
+    ).scalars().all()
+
+    by_key: dict[tuple[str, Optional[str]], list[Integration]] = {}
+    by_provider: dict[str, list[Integration]] = {}
+    for integration in integrations:
+        by_key.setdefault((integration.platform, integration.external_account_key), []).append(integration)
+        by_provider.setdefault(integration.platform, []).append(integration)
+    return {
+        event: (
+            by_key.get((event.provider, event.account_key), [])
+            if event.account_key
+            else by_provider.get(event.provider, [])
+        )
+        for event in events
+    }
+
+
+def retry_delay_seconds(attempt_count: int) -> float:
+    """Backoff before retrying a batch that has failed `attempt_count` times."""
+    delay = settings.WEBHOOK_INBOX_RETRY_BASE_SECONDS * 2 ** max(attempt_count - 1, 0)
+    return min(delay, settings.WEBHOOK_INBOX_RETRY_MAX_SECONDS)
+
+
+def _record_failure(db: Session, event_ids: list, exc: Exception) -> None:
+    """Count the failed attempt and schedule each event's retry, or fail it for good."""
+    now = datetime.now(timezone.utc)
+    attempts = db.execute(
+        select(WebhookEvent.id, WebhookEvent.attempt_count).where(WebhookEvent.id.in_(event_ids))
+    ).all()
+    db.execute(
+        update(WebhookEvent.__table__)
+        .where(WebhookEvent.__table__.c.id == bindparam("row_id"))
+        .values(
+            attempt_count=bindparam("attempts"),
+            status=bindparam("new_status"),
+            next_attempt_at=bindparam("retry_at"),
+            latest_error=f"{type(exc).__name__}: {exc}",
+        ),
+        [
+            {
+                "row_id": event_id,
+                "attempts": attempt_count + 1,
+                "new_status": "failed" if attempt_count + 1 >= settings.WEBHOOK_INBOX_MAX_ATTEMPTS else "pending",
+                "retry_at": now + timedelta(seconds=retry_delay_seconds(attempt_count + 1)),
+            }
+            for event_id, attempt_count in attempts
+        ],
+    )
+    db.commit()
+
+
+def process_webhook_events(db: Session, limit: int) -> dict[str, Any]:
+    """
+    Drain up to `limit` pending events that are due: one integration lookup, one
+    bulk coalesce, one commit, then dispatch the new jobs. Concurrent consumers
+    skip each other's rows on Postgres. On failure the batch's events are
+    rescheduled (see retry_delay_seconds) and the exception is re-raised.
+    """
+    events = db.execute(
+        select(WebhookEvent)
+        .where(
+            WebhookEvent.status == "pending",
+            or_(
+                WebhookEvent.next_attempt_at.is_(None),
+                WebhookEvent.next_attempt_at <= datetime.now(timezone.utc),
+            ),
+        )
+        .order_by(WebhookEvent.received_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not events:
+        return {"events": 0, "queued_jobs": 0, "coalesced_jobs": 0}
+    event_ids = [event.id for event in events]
+
+    try:
+        targets = _resolve_integrations(db, events)
+        trigger_counts: Counter = Counter()
+        integrations: dict[Any, Integration] = {}
+        for event_targets in targets.values():
+            for integration in event_targets:
+                trigger_counts[integration.id] += 1
+                integrations[integration.id] = integration
+
+        created, coalesced = coalesce_sync_jobs(db, list(integrations.values()), trigger_counts)
+        now = datetime.now(timezone.utc)
+        for event in events:
+            event.status = "processed"
+            event.attempt_count += 1
+            event.processed_at = now
+        created_ids = [sync_job.id for sync_job in created]
+        workspace_ids = {sync_job.workspace_id for sync_job in created}
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        _record_failure(db, event_ids, exc)
+        raise
+
+    # Reload the committed jobs in one query rather than one refresh per job.
+    created = list(db.execute(select(SyncJob).where(SyncJob.id.in_(created_ids))).scalars()) if created_ids else []
+    enqueue_sync_jobs(db, created, countdown=settings.SYNC_WEBHOOK_DEBOUNCE_SECONDS)
+    for workspace_id in workspace_ids:
+        bump_workspace_version(workspace_id)
+    return {"events": len(events), "queued_jobs": len(created), "coalesced_jobs": len(coalesced)}
@@ -0,0 +1,42 @@
+"""
+Standalone webhook inbox consumer:
+
+    python -m app.workers.inbox_consumer
+
+Drains webhook_events in batches, polling every WEBHOOK_INBOX_POLL_SECONDS
+while idle. It picks up events whose best-effort kick never reached a worker
+and batches that are due for a retry. Several can run at once; on Postgres
+they skip each other's rows.
+"""
+import logging
+import time
+
+from app.core.config import settings
+from app.core.database import WorkerSessionLocal
+from app.services.webhook_inbox import process_webhook_events
+
+logger = logging.getLogger(__name__)
+
+
+def drain_once() -> int:
+    """Process one batch; returns the number of events handled (0 after a failure)."""
+    db = WorkerSessionLocal()
+    try:
+        return process_webhook_events(db, settings.WEBHOOK_INBOX_BATCH_SIZE)["events"]
+    except Exception:
+        # process_webhook_events already rescheduled the batch's events.
+        logger.exception("Webhook inbox batch failed")
+        return 0
+    finally:
+        db.close()
+
+
+def run_forever() -> None:
+    while True:
+        if drain_once() < settings.WEBHOOK_INBOX_BATCH_SIZE:
+            time.sleep(settings.WEBHOOK_INBOX_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_forever()
@@ -0,0 +1,37 @@
+"""
+Standalone sync job outbox dispatcher:
+
+    python -m app.workers.outbox_dispatcher
+
+Drains sync_job_outbox to Celery in batches, polling every
+SYNC_OUTBOX_POLL_SECONDS while idle. Several can run at once; on Postgres
+they skip each other's rows.
+"""
+import logging
+import time
+
+from app.core.config import settings
+from app.core.database import WorkerSessionLocal
+from app.services.sync_service import dispatch_sync_outbox
+
+logger = logging.getLogger(__name__)
+
+
+def run_forever() -> None:
+    while True:
+        db = WorkerSessionLocal()
+        try:
+            sent = dispatch_sync_outbox(db, settings.SYNC_OUTBOX_BATCH_SIZE)
+        except Exception:
+            logger.exception("Sync job outbox dispatch failed")
+            db.rollback()
+            sent = 0
+        finally:
+            db.close()
+        if sent < settings.SYNC_OUTBOX_BATCH_SIZE:
+            time.sleep(settings.SYNC_OUTBOX_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_forever()
@@ -5,15 +5,23 @@ from typing import Any
 import uuid
 
 from celery import shared_task
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.core.database import SessionLocal
-from app.models.financial_data import FinancialData
+from app.core.config import settings
+from app.core.database import WorkerSessionLocal
 from app.models.integration import Integration
 from app.models.sync_job import SyncJob
+from app.models.sync_job_outbox import SyncJobOutbox
 from app.models.sync_run import SyncRun
 from app.services.airbyte import airbyte_service
 from app.services.demo_seeder import seed_demo_data
+from app.services.financial_upsert import load_financial_rows
+from app.services.kpi_snapshot_service import refresh_kpi_snapshot
+from app.services.metrics_cache import bump_workspace_version
+from app.services.rollup_service import rebuild_rollups, refresh_rollups
+from app.services.sync_events import publish_sync_event
 
 
 @shared_task
@@ -21,44 +29,35 @@ def ingest_financial_data(user_id: str, integration_id: str) -> str:
     """
     Legacy mock ingestion task retained for compatibility.
     """
-    db: Session = SessionLocal()
+    db: Session = WorkerSessionLocal()
     try:
-        integration = db.query(Integration).filter(Integration.id == integration_id).first()
+        integration = db.query(Integration).filter(Integration.id == uuid.UUID(str(integration_id))).first()
         if not integration:
             return "Integration not found"
 
         start_date = date.today() - timedelta(days=30)
-        records_processed = 0
-
+        rows = []
         for day_offset in range(31):
-            current_date = start_date + timedelta(days=day_offset)
-            record = (
-                db.query(FinancialData)
-                .filter(
-                    FinancialData.user_id == user_id,
-                    FinancialData.workspace_id == integration.workspace_id,
-                    FinancialData.date == current_date,
-                )
-                .first()
-            )
-            if not record:
-                record = FinancialData(
-                    workspace_id=integration.workspace_id,
-                    user_id=user_id,
-                    date=current_date,
-                )
-                db.add(record)
-
             daily_revenue = random.uniform(500, 2000)
-            daily_ads = random.uniform(50, 300)
-
-            record.revenue_gross = daily_revenue
-            record.revenue_net = daily_revenue * 0.95
-            record.cost_ads_meta = daily_ads
-            record.transactions_count = int(daily_revenue / 50)
-            records_processed += 1
+            rows.append(
+                {
+                    "workspace_id": integration.workspace_id,
+                    "user_id": user_id,
+                    "date": start_date + timedelta(days=day_offset),
+                    "revenue_gross": daily_revenue,
+                    "revenue_net": daily_revenue * 0.95,
+                    "cost_ads_meta": random.uniform(50, 300),
+                    "transactions_count": int(daily_revenue / 50),
+                }
+            )
+        records_processed = load_financial_rows(db, rows).rows
 
+        if integration.workspace_id:
+            refresh_rollups(db, integration.workspace_id, start_date, date.today())
         db.commit()
+        if integration.workspace_id:
+            _refresh_kpi_snapshot(db, integration.workspace_id)
+            bump_workspace_version(integration.workspace_id)
         return f"Successfully processed {records_processed} days of data for user {user_id}"
     except Exception as exc:
         db.rollback()
@@ -67,6 +66,58 @@ def ingest_financial_data(user_id: str, integration_id: str) -> str:
         db.close()
 
 
+def _refresh_kpi_snapshot(db: Session, workspace_id: uuid.UUID) -> None:
+    """
+    Best-effort: a snapshot failure must not fail an otherwise successful sync;
+    readers fall back to live queries when the snapshot is stale.
+    """
+    try:
+        refresh_kpi_snapshot(db, workspace_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+
+
+def _integration_busy(db: Session, sync_job: SyncJob) -> bool:
+    """
+    True when another job for the same integration is running. A "running" job
+    older than SYNC_RUNNING_STALE_SECONDS is assumed abandoned by a dead worker
+    and failed so it stops blocking the integration.
+    """
+    now = datetime.now(timezone.utc)
+    others = db.query(SyncJob).filter(
+        SyncJob.integration_id == sync_job.integration_id,
+        SyncJob.status == "running",
+        SyncJob.id != sync_job.id,
+    )
+    others.filter(SyncJob.started_at < now - timedelta(seconds=settings.SYNC_RUNNING_STALE_SECONDS)).update(
+        {"status": "failed", "latest_error": "Abandoned: no result before the stale timeout", "finished_at": now},
+        synchronize_session=False,
+    )
+    return db.query(others.exists()).scalar()
+
+
+def _defer_sync_job(db: Session, sync_job: SyncJob) -> str:
+    """
+    Leave the job queued (later webhooks keep folding into it) and retry after a
+    delay, through the outbox like any other enqueue.
+    """
+    from app.services.sync_service import _kick_dispatcher
+
+    sync_job.celery_task_id = str(uuid.uuid4())
+    db.add(
+        SyncJobOutbox(
+            sync_job_id=sync_job.id,
+            run_after=datetime.now(timezone.utc) + timedelta(seconds=settings.SYNC_BUSY_RETRY_SECONDS),
+        )
+    )
+    db.commit()
+    # Best-effort like every enqueue: the outbox row is committed, so a broker error
+    # must not fail the job.
+    _kick_dispatcher()
+    return f"Sync job {sync_job.id} deferred: integration has a running sync"
+
+
 def _mark_job_failed(db: Session, sync_job: SyncJob, sync_run: SyncRun | None, error_message: str) -> None:
     now = datetime.now(timezone.utc)
     if sync_run:
@@ -82,13 +133,14 @@ def _mark_job_failed(db: Session, sync_job: SyncJob, sync_run: SyncRun | None, e
     if integration:
         integration.status = "error"
     db.commit()
+    publish_sync_event(sync_job, sync_run)
 
 
 def _mark_job_failed_by_id(sync_job_id: uuid.UUID, error_message: str) -> None:
     """
     Best-effort fallback state transition used when an exception escapes normal flow.
     """
-    db: Session = SessionLocal()
+    db: Session = WorkerSessionLocal()
     try:
         sync_job = db.query(SyncJob).filter(SyncJob.id == sync_job_id).first()
         if not sync_job:
@@ -108,7 +160,7 @@ def _mark_job_failed_by_id(sync_job_id: uuid.UUID, error_message: str) -> None:
 
 @shared_task(bind=True)
 def run_sync_job(self, sync_job_id: str) -> str:
-    db: Session = SessionLocal()
+    db: Session = WorkerSessionLocal()
     sync_job_uuid: uuid.UUID | None = None
     sync_run: SyncRun | None = None
     try:
@@ -120,6 +172,9 @@ def run_sync_job(self, sync_job_id: str) -> str:
         sync_job = db.query(SyncJob).filter(SyncJob.id == sync_job_uuid).first()
         if not sync_job:
             return "Sync job not found"
+        if sync_job.status not in ("pending", "queued"):
+            # Outbox delivery is at least once; a redelivered job has already run.
+            return f"Sync job {sync_job_id} skipped: already {sync_job.status}"
 
         integration = db.query(Integration).filter(Integration.id == sync_job.integration_id).first()
         if not integration:
@@ -127,12 +182,30 @@ def run_sync_job(self, sync_job_id: str) -> str:
             sync_job.latest_error = "Integration not found for sync job"
             sync_job.finished_at = datetime.now(timezone.utc)
             db.commit()
+            publish_sync_event(sync_job)
             return "Integration not found"
 
+        if _integration_busy(db, sync_job):
+            return _defer_sync_job(db, sync_job)
+
         now = datetime.now(timezone.utc)
-        sync_job.status = "running"
-        sync_job.started_at = now
-        sync_job.attempt_count = (sync_job.attempt_count or 0) + 1
+        # The status check above is only a fast path: two deliveries can both pass it,
+        # so the transition to running is a conditional UPDATE that one of them wins.
+        try:
+            claimed = db.execute(
+                update(SyncJob)
+                .where(SyncJob.id == sync_job.id, SyncJob.status.in_(("pending", "queued")))
+                .values(status="running", started_at=now, attempt_count=SyncJob.attempt_count + 1)
+                .returning(SyncJob.id)
+                .execution_options(synchronize_session="fetch")
+            ).first()
+        except IntegrityError:
+            # Lost the race for ux_sync_jobs_integration_running to another worker.
+            db.rollback()
+            return _defer_sync_job(db, db.get(SyncJob, sync_job_uuid))
+        if claimed is None:
+            db.rollback()
+            return f"Sync job {sync_job_id} skipped: claimed by another delivery"
 
         sync_run = SyncRun(
             sync_job_id=sync_job.id,
@@ -146,6 +219,7 @@ def run_sync_job(self, sync_job_id: str) -> str:
 
         integration.status = "syncing"
         db.commit()
+        publish_sync_event(sync_job, sync_run)
 
         metadata = integration.metadata_config or {}
         connection_id = metadata.get("airbyte_connection_id")
@@ -162,6 +236,16 @@ def run_sync_job(self, sync_job_id: str) -> str:
                 "triggered": True,
             }
             sync_run.external_job_id = str(connection_id)
+            if integration.workspace_id:
+                # Airbyte lands rows asynchronously; re-roll the trailing window so
+                # data from earlier runs is reflected.
+                today = date.today()
+                refresh_rollups(
+                    db,
+                    integration.workspace_id,
+                    today - timedelta(days=settings.ROLLUP_REFRESH_LOOKBACK_DAYS),
+                    today,
+                )
         else:
             # Temporary ingestion fallback while all connectors are being wired.
             result_payload = seed_demo_data(
@@ -183,6 +267,11 @@ def run_sync_job(self, sync_job_id: str) -> str:
         integration.status = "active"
         integration.last_sync_at = done_at
         db.commit()
+        publish_sync_event(sync_job, sync_run)
+
+        if sync_job.workspace_id:
+            _refresh_kpi_snapshot(db, sync_job.workspace_id)
+            bump_workspace_version(sync_job.workspace_id)
         return f"Sync job {sync_job_id} completed"
     except Exception as exc:
         db.rollback()
@@ -205,3 +294,57 @@ def run_sync_job(self, sync_job_id: str) -> str:
         return f"Sync job failed: {error_message}"
     finally:
         db.close()
+
+
+@shared_task
+def rebuild_financial_rollups(workspace_id: str) -> str:
+    """Backfill or fully recompute one workspace's rollup tables."""
+    db: Session = WorkerSessionLocal()
+    try:
+        rebuild_rollups(db, workspace_id)
+        db.commit()
+        return f"Rebuilt rollups for workspace {workspace_id}"
+    except Exception as exc:
+        db.rollback()
+        return f"Error rebuilding rollups: {exc}"
+    finally:
+        db.close()
+
+
+@shared_task(bind=True, max_retries=settings.WEBHOOK_INBOX_MAX_ATTEMPTS)
+def process_webhook_inbox(self) -> str:
+    # Imported here: webhook_inbox reaches this module through sync_service.
+    from app.services.webhook_inbox import process_webhook_events, retry_delay_seconds
+
+    db: Session = WorkerSessionLocal()
+    try:
+        result = process_webhook_events(db, settings.WEBHOOK_INBOX_BATCH_SIZE)
+    except Exception as exc:
+        # The failed events were rescheduled with the same backoff; come back when they are due.
+        raise self.retry(exc=exc, countdown=retry_delay_seconds(self.request.retries + 1))
+    finally:
+        db.close()
+    if result["events"] >= settings.WEBHOOK_INBOX_BATCH_SIZE:
+        # A full batch means more may be waiting.
+        process_webhook_inbox.delay()
+    return (
+        f"Processed {result['events']} webhook events: "
+        f"{result['queued_jobs']} jobs queued, {result['coalesced_jobs']} coalesced"
+    )
+
+
+@shared_task
+def dispatch_sync_job_outbox() -> str:
+    # Imported here: sync_service imports run_sync_job from this module.
+    from app.services.sync_service import dispatch_sync_outbox
+
+    db: Session = WorkerSessionLocal()
+    try:
+        total = 0
+        while True:
+            sent = dispatch_sync_outbox(db, settings.SYNC_OUTBOX_BATCH_SIZE)
+            total += sent
+            if sent < settings.SYNC_OUTBOX_BATCH_SIZE:
+                return f"Dispatched {total} sync jobs"
+    finally:
+        db.close()
@@ -1,3 +1,4 @@
+import asyncio
 import base64
 from datetime import datetime, timedelta, timezone
 import hashlib
@@ -9,19 +10,24 @@ import uuid
 from fastapi.testclient import TestClient
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from app.api import deps
 from app.api.v1.endpoints import integrations as integrations_endpoint
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.database import Base
 from app.main import app
 from app.models.integration import Integration
 from app.models.organization import Organization
+from app.models.sync_job import SyncJob
 from app.models.user import User
+from app.models.webhook_event import WebhookEvent
 from app.models.workspace import Workspace
 from app.models.workspace_membership import WorkspaceMembership
+from app.services import webhook_dedup
 from app.services.oauth_service import OAuthTokenResult, generate_oauth_state
 
 
@@ -37,13 +43,16 @@ def _set_provider_credentials(monkeypatch: pytest.MonkeyPatch) -> None:
 
 
 @pytest.fixture()
-def integration_test_context(monkeypatch: pytest.MonkeyPatch):
+def integration_test_context(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    # File-backed so the sync and async engines see the same database.
+    db_path = tmp_path / "integrations.db"
     engine = create_engine(
-        "sqlite://",
+        f"sqlite:///{db_path}",
         connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
     )
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
     Base.metadata.create_all(bind=engine)
 
     db: Session = TestingSessionLocal()
@@ -98,7 +107,18 @@ def integration_test_context(monkeypatch: pytest.MonkeyPatch):
         finally:
             local_db.close()
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as local_db:
+            yield local_db
+
+    async def no_kick():
+        return None
+
+    # Keep webhook tests off the Celery broker; the inbox consumer is tested directly.
+    monkeypatch.setattr(integrations_endpoint, "kick_webhook_inbox", no_kick)
+
     app.dependency_overrides[deps.get_db] = override_get_db
+    app.dependency_overrides[deps.get_async_db] = override_get_async_db
     app.dependency_overrides[deps.get_workspace_context] = lambda: context
 
     with TestClient(app) as client:
@@ -113,6 +133,7 @@ def integration_test_context(monkeypatch: pytest.MonkeyPatch):
     db.close()
     Base.metadata.drop_all(bind=engine)
     engine.dispose()
+    asyncio.run(async_engine.dispose())
 
 
 async def _fake_exchange_code_for_token(
@@ -217,6 +238,7 @@ def test_oauth_start_and_callback_smoke_for_each_provider(
         assert updated is not None
         assert updated.status == "active"
         assert updated.access_token is not None
+        assert updated.external_account_key == (shop_domain or f"{provider}-account")
         token_payload = (updated.metadata_config or {}).get("oauth_token_response") or {}
         assert "access_token" not in token_payload
         assert "refresh_token" not in token_payload
@@ -327,3 +349,81 @@ def test_shopify_webhook_signature_validation(
     assert valid_response.status_code == 200
     body = valid_response.json()
     assert body["received"] is True
+
+
+def test_webhook_redeliveries_are_acknowledged_once(
+    integration_test_context: dict[str, Any],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(settings, "STRIPE_WEBHOOK_SECRET", "whsec_test_value")
+    monkeypatch.setattr(webhook_dedup, "get_redis", lambda: None)
+    monkeypatch.setattr(webhook_dedup, "_local_claims", TTLCache(max_entries=100, default_ttl=60))
+    client: TestClient = integration_test_context["client"]
+    payload = f'{{"id":"evt_{uuid.uuid4().hex}","type":"charge.succeeded"}}'.encode("utf-8")
+    timestamp = str(int(datetime.now(timezone.utc).timestamp()))
+    signed_payload = f"{timestamp}.".encode("utf-8") + payload
+    signature = hmac.new(settings.STRIPE_WEBHOOK_SECRET.encode("utf-8"), signed_payload, hashlib.sha256).hexdigest()
+    duplicates_before = webhook_dedup.webhook_dedup_stats()["duplicates"]
+
+    responses = [
+        client.post(
+            "/api/v1/integrations/webhooks/stripe",
+            data=payload,
+            headers={
+                "Stripe-Signature": f"t={timestamp},v1={signature}",
+                "Content-Type": "application/json",
+            },
+        )
+        for _ in range(3)
+    ]
+
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert "duplicate" not in responses[0].json()
+    assert all(response.json()["duplicate"] is True for response in responses[1:])
+    assert webhook_dedup.webhook_dedup_stats()["duplicates"] == duplicates_before + 2
+
+
+def test_shopify_webhook_is_acknowledged_from_the_inbox(
+    integration_test_context: dict[str, Any],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(settings, "SHOPIFY_WEBHOOK_SECRET", "shopify_test_secret")
+    monkeypatch.setattr(webhook_dedup, "get_redis", lambda: None)
+    kicks = []
+
+    async def _fake_kick():
+        kicks.append(True)
+
+    monkeypatch.setattr(integrations_endpoint, "kick_webhook_inbox", _fake_kick)
+    client: TestClient = integration_test_context["client"]
+    session_factory = integration_test_context["session_factory"]
+
+    payload = b'{"id":456}'
+    digest = hmac.new(settings.SHOPIFY_WEBHOOK_SECRET.encode("utf-8"), payload, hashlib.sha256).digest()
+    webhook_id = str(uuid.uuid4())
+    response = client.post(
+        "/api/v1/integrations/webhooks/shopify",
+        data=payload,
+        headers={
+            "X-Shopify-Hmac-Sha256": base64.b64encode(digest).decode("utf-8"),
+            "X-Shopify-Shop-Domain": "Demo-Store.myshopify.com",
+            "X-Shopify-Topic": "orders/create",
+            "X-Shopify-Webhook-Id": webhook_id,
+            "Content-Type": "application/json",
+        },
+    )
+
+    assert response.status_code == 200
+    assert kicks == [True]
+    with session_factory() as db:
+        assert db.query(SyncJob).count() == 0
+        event = db.query(WebhookEvent).one()
+    assert response.json() == {"received": True, "inbox_id": str(event.id)}
+    assert (event.provider, event.event_id, event.topic, event.account_key, event.status) == (
+        "shopify",
+        webhook_id,
+        "orders/create",
+        "demo-store.myshopify.com",
+        "pending",
+    )
+    assert event.payload == payload.decode("utf-8")
@@ -0,0 +1,393 @@
+import asyncio
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any
+import uuid
+
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.api import deps
+from app.core.cache import TTLCache
+from app.core.database import Base
+from app.main import app
+from app.models.financial_data import FinancialData
+from app.models.organization import Organization
+from app.models.user import User
+from app.models.workspace import Workspace
+from app.models.workspace_membership import WorkspaceMembership
+from app.services import metrics_cache
+from app.services.kpi_snapshot_service import refresh_kpi_snapshot
+from app.services.rollup_service import refresh_rollups
+
+TARGET_DATE = date(2026, 3, 10)
+
+
+def _financial_row(workspace_id: uuid.UUID, user_id: uuid.UUID, day: date, revenue: int, **costs: Any) -> FinancialData:
+    return FinancialData(
+        workspace_id=workspace_id,
+        user_id=user_id,
+        date=day,
+        revenue_gross=Decimal(revenue) + Decimal("50.00"),
+        revenue_net=Decimal(revenue),
+        cost_ads_meta=Decimal(costs.get("meta", 100)),
+        cost_ads_google=Decimal(costs.get("google", 50)),
+        cost_transaction_fees=Decimal(costs.get("fees", 25)),
+        cost_fixed_allocated=Decimal(costs.get("fixed", 10)),
+        cost_variable=Decimal(costs.get("variable", 15)),
+        transactions_count=costs.get("transactions", 20),
+    )
+
+
+@pytest.fixture()
+def metrics_test_context(tmp_path):
+    db_path = tmp_path / "metrics.db"
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    db: Session = TestingSessionLocal()
+    user = User(id=uuid.uuid4(), email="metrics@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    org = Organization(id=uuid.uuid4(), name="Metrics Org", owner_user_id=user.id)
+    db.add(org)
+    db.flush()
+    workspace = Workspace(id=uuid.uuid4(), organization_id=org.id, name="Metrics", slug="metrics")
+    db.add(workspace)
+    db.flush()
+    membership = WorkspaceMembership(workspace_id=workspace.id, user_id=user.id, role="owner")
+    db.add(membership)
+
+    # Target day: net = 1000 - 200 = 800. Previous day: net = 600 - 200 = 400.
+    db.add(_financial_row(workspace.id, user.id, TARGET_DATE, 1000, meta=100, google=50))
+    db.add(_financial_row(workspace.id, user.id, TARGET_DATE - timedelta(days=1), 600))
+    db.add(_financial_row(workspace.id, user.id, TARGET_DATE - timedelta(days=7), 200, fees=120, meta=5))
+    db.commit()
+    db.refresh(workspace)
+    db.refresh(membership)
+    db.refresh(user)
+
+    context = deps.WorkspaceContext(workspace=workspace, membership=membership, role="owner")
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as local_db:
+            yield local_db
+
+    def override_get_db():
+        local_db = TestingSessionLocal()
+        try:
+            yield local_db
+        finally:
+            local_db.close()
+
+    app.dependency_overrides[deps.get_db] = override_get_db
+    app.dependency_overrides[deps.get_async_db] = override_get_async_db
+    app.dependency_overrides[deps.get_async_read_db] = override_get_async_db
+    app.dependency_overrides[deps.get_async_analytics_db] = override_get_async_db
+    app.dependency_overrides[deps.get_session_factory] = lambda: TestingSessionLocal
+    app.dependency_overrides[deps.get_async_read_session_factory] = lambda: TestingAsyncSessionLocal
+    app.dependency_overrides[deps.get_async_analytics_session_factory] = lambda: TestingAsyncSessionLocal
+    app.dependency_overrides[deps.get_workspace_context] = lambda: context
+    app.dependency_overrides[deps.get_async_workspace_context] = lambda: context
+    app.dependency_overrides[deps.get_current_user] = lambda: user
+    app.dependency_overrides[deps.get_async_current_user] = lambda: user
+
+    with TestClient(app) as client:
+        yield {
+            "client": client,
+            "session_factory": TestingSessionLocal,
+            "workspace_id": workspace.id,
+            "organization_id": org.id,
+            "user_id": user.id,
+        }
+
+    app.dependency_overrides.clear()
+    db.close()
+    engine.dispose()
+    asyncio.run(async_engine.dispose())
+
+
+def test_summary_computes_kpis_and_comparisons_in_one_query(metrics_test_context: dict[str, Any]):
+    client: TestClient = metrics_test_context["client"]
+
+    response = client.get(
+        "/api/v1/metrics/summary",
+        params={
+            "date": TARGET_DATE.isoformat(),
+            "comparisons": "same_weekday_last_week,same_day_last_year",
+        },
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["net_profit"] == 800.0
+    assert body["total_expenses"] == 200.0
+    assert body["roas"] == 7.0
+    assert body["top_expense"] == {"category": "Meta Ads", "amount": 100.0}
+    assert body["net_profit_change_pct"] == 100.0
+
+    comparisons = {item["label"]: item for item in body["comparisons"]}
+    last_week = comparisons["same_weekday_last_week"]
+    assert last_week["has_data"] is True
+    assert last_week["net_profit"] == 200.0 - 200.0
+    assert comparisons["same_day_last_year"]["has_data"] is False
+
+
+def test_summary_rejects_unknown_comparison(metrics_test_context: dict[str, Any]):
+    client: TestClient = metrics_test_context["client"]
+
+    response = client.get("/api/v1/metrics/summary", params={"comparisons": "fortnight"})
+
+    assert response.status_code == 400
+
+
+def test_daily_series_and_trend(metrics_test_context: dict[str, Any]):
+    client: TestClient = metrics_test_context["client"]
+
+    response = client.get(
+        "/api/v1/metrics/daily",
+        params={
+            "start_date": (TARGET_DATE - timedelta(days=7)).isoformat(),
+            "end_date": TARGET_DATE.isoformat(),
+        },
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [row["date"] for row in body["data"]] == ["2026-03-03", "2026-03-09", "2026-03-10"]
+    assert [row["net_profit"] for row in body["data"]] == [0.0, 400.0, 800.0]
+    assert body["data"][2]["cost_ads_meta"] == 100.0
+    assert body["summary"] == {"total_profit": 1200.0, "avg_daily_profit": 400.0, "trend": "up"}
+
+
+def test_daily_projection_returns_only_requested_series(metrics_test_context: dict[str, Any]):
+    client: TestClient = metrics_test_context["client"]
+    params = {"start_date": TARGET_DATE.isoformat(), "end_date": TARGET_DATE.isoformat()}
+
+    response = client.get("/api/v1/metrics/daily", params={**params, "metrics": "revenue_gross"})
+    assert response.status_code == 200
+    assert response.json() == {"data": [{"date": "2026-03-10", "revenue_gross": 1050.0}], "summary": None}
+
+    response = client.get("/api/v1/metrics/daily", params={**params, "metrics": "net_profit"})
+    assert response.json()["data"] == [{"date": "2026-03-10", "net_profit": 800.0}]
+    assert response.json()["summary"]["total_profit"] == 800.0
+
+    response = client.get("/api/v1/metrics/daily", params={**params, "metrics": "net_profit,margin"})
+    assert response.status_code == 400
+
+
+def test_daily_reads_monthly_rollup(metrics_test_context: dict[str, Any]):
+    client: TestClient = metrics_test_context["client"]
+    with metrics_test_context["session_factory"]() as db:
+        refresh_rollups(db, metrics_test_context["workspace_id"], TARGET_DATE, TARGET_DATE)
+        db.commit()
+
+    response = client.get(
+        "/api/v1/metrics/daily",
+        params={
+            "start_date": "2024-01-01",
+            "end_date": TARGET_DATE.isoformat(),
+            "granularity": "month",
+            "metrics": "net_profit,revenue_net",
+        },
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["data"] == [{"date": "2026-03-01", "net_profit": 1200.0, "revenue_net": 1800.0}]
+    assert body["summary"]["avg_daily_profit"] == 400.0
+
+
+def test_week_totals_match_day_totals_on_unaligned_range(metrics_test_context: dict[str, Any]):
+    client: TestClient = metrics_test_context["client"]
+    with metrics_test_context["session_factory"]() as db:
+        refresh_rollups(db, metrics_test_context["workspace_id"], TARGET_DATE - timedelta(days=7), TARGET_DATE)
+        db.commit()
+    # Wednesday..Monday: clips 2026-03-03 off the first week and 2026-03-10 off the second.
+    params = {"start_date": "2026-03-04", "end_date": "2026-03-09", "metrics": "revenue_net,net_profit"}
+
+    days = client.get("/api/v1/metrics/daily", params=params).json()
+    weeks = client.get("/api/v1/metrics/daily", params={**params, "granularity": "week"}).json()
+
+    assert sum(row["revenue_net"] for row in days["data"]) == 600.0
+    assert weeks["data"] == [{"date": "2026-03-09", "revenue_net": 600.0, "net_profit": 400.0}]
+    assert weeks["summary"]["total_profit"] == days["summary"]["total_profit"]
+
+    organization = client.get(
+        "/api/v1/metrics/organization",
+        params={"start_date": "2026-03-04", "end_date": "2026-03-09", "granularity": "week"},
+    ).json()
+    assert [point["revenue_net"] for point in organization["total"]["data"]] == [600.0]
+
+
+def test_default_summary_and_snapshot_are_served_from_kpi_snapshot(metrics_test_context: dict[str, Any]):
+    client: TestClient = metrics_test_context["client"]
+    yesterday = date.today() - timedelta(days=1)
+    with metrics_test_context["session_factory"]() as db:
+        workspace_id = metrics_test_context["workspace_id"]
+        user_id = metrics_test_context["user_id"]
+        db.add(_financial_row(workspace_id, user_id, yesterday, 900))
+        db.add(_financial_row(workspace_id, user_id, yesterday - timedelta(days=1), 700))
+        db.flush()
+        refresh_kpi_snapshot(db, workspace_id)
+        # Drop the source rows: anything still reported must come from the snapshot.
+        db.query(FinancialData).filter(FinancialData.date >= yesterday - timedelta(days=1)).delete()
+        db.commit()
+
+    summary = client.get("/api/v1/metrics/summary").json()
+    assert summary["date"] == yesterday.isoformat()
+    assert summary["net_profit"] == 700.0
+    assert summary["net_profit_change_pct"] == 40.0
+
+    snapshot = client.get("/api/v1/metrics/snapshot").json()
+    assert snapshot["summary"]["net_profit"] == 700.0
+    assert snapshot["windows"]["7d"]["net_profit"] == 1200.0
+    assert snapshot["windows"]["7d"]["days_with_data"] == 2
+    assert snapshot["windows"]["7d"]["top_expense"] == {"category": "Meta Ads", "amount": 200.0}
+
+
+def test_periods_compare_consecutive_weeks(metrics_test_context: dict[str, Any]):
+    client: TestClient = metrics_test_context["client"]
+
+    response = client.get(
+        "/api/v1/metrics/periods",
+        params={"preset": "last_7_days", "periods": 3, "as_of": TARGET_DATE.isoformat()},
+    )
+
+    assert response.status_code == 200
+    periods = response.json()["periods"]
+    assert [(p["start_date"], p["end_date"]) for p in periods] == [
+        ("2026-03-04", "2026-03-10"),
+        ("2026-02-25", "2026-03-03"),
+        ("2026-02-18", "2026-02-24"),
+    ]
+    assert [p["net_profit"] for p in periods] == [1200.0, 0.0, 0.0]
+    assert periods[0]["days_with_data"] == 2
+    assert periods[0]["net_profit_change_pct"] is None
+    assert periods[1]["revenue_net"] == 200.0
+    assert periods[0]["revenue_net_change_pct"] == 700.0
+
+    assert client.get("/api/v1/metrics/periods", params={"preset": "fortnight"}).status_code == 400
+
+
+def test_organization_metrics_cover_member_workspaces_only(metrics_test_context: dict[str, Any]):
+    client: TestClient = metrics_test_context["client"]
+    with metrics_test_context["session_factory"]() as db:
+        user_id = metrics_test_context["user_id"]
+        sibling = Workspace(
+            id=uuid.uuid4(),
+            organization_id=metrics_test_context["organization_id"],
+            name="Sibling",
+            slug="sibling",
+        )
+        hidden = Workspace(
+            id=uuid.uuid4(),
+            organization_id=metrics_test_context["organization_id"],
+            name="Hidden",
+            slug="hidden",
+        )
+        db.add_all([sibling, hidden])
+        db.flush()
+        db.add(WorkspaceMembership(workspace_id=sibling.id, user_id=user_id, role="viewer"))
+        db.add(_financial_row(sibling.id, user_id, TARGET_DATE, 500))
+        db.add(_financial_row(hidden.id, user_id, TARGET_DATE, 9000))
+        db.commit()
+
+    response = client.get(
+        "/api/v1/metrics/organization",
+        params={"start_date": TARGET_DATE.isoformat(), "end_date": TARGET_DATE.isoformat()},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert {series["workspace_name"]: series["totals"]["net_profit"] for series in body["workspaces"]} == {
+        "Metrics": 800.0,
+        "Sibling": 300.0,
+    }
+    assert body["total"]["data"] == [
+        {
+            "date": "2026-03-10",
+            "revenue_gross": 1600.0,
+            "revenue_net": 1500.0,
+            "total_expenses": 400.0,
+            "net_profit": 1100.0,
+            "transactions_count": 40,
+        }
+    ]
+
+    other_org = client.get(
+        "/api/v1/metrics/organization",
+        params={"start_date": "2026-03-01", "end_date": "2026-03-10", "organization_id": str(uuid.uuid4())},
+    )
+    assert other_org.status_code == 404
+
+
+def test_bootstrap_loads_selected_sections_in_one_request(metrics_test_context: dict[str, Any]):
+    client: TestClient = metrics_test_context["client"]
+
+    response = client.get(
+        "/api/v1/bootstrap/",
+        params={
+            "fields": "session,workspaces,daily,onboarding",
+            "start_date": (TARGET_DATE - timedelta(days=1)).isoformat(),
+            "end_date": TARGET_DATE.isoformat(),
+        },
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["errors"] == {}
+    assert "summary" not in body and "integrations" not in body
+    assert body["session"]["user"]["email"] == "metrics@example.com"
+    assert [workspace["name"] for workspace in body["workspaces"]] == ["Metrics"]
+    assert [row["net_profit"] for row in body["daily"]["data"]] == [400.0, 800.0]
+    assert body["onboarding"]["steps"]["integrations_connected"] is False
+
+    assert client.get("/api/v1/bootstrap/", params={"fields": "everything"}).status_code == 400
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, bytes] = {}
+
+    def get(self, key: str):
+        return self.values.get(key)
+
+    def set(self, key: str, value: bytes, ex: int | None = None) -> None:
+        self.values[key] = value
+
+
+def test_bootstrap_shares_metrics_cache_entries_and_sends_an_etag(
+    metrics_test_context: dict[str, Any],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    client: TestClient = metrics_test_context["client"]
+    redis = FakeRedis()
+    monkeypatch.setattr(metrics_cache, "get_redis", lambda: redis)
+    monkeypatch.setattr(metrics_cache, "_redis_down_until", 0.0)
+    monkeypatch.setattr(metrics_cache, "_local_cache", TTLCache(max_entries=100, default_ttl=60))
+    dates = {"start_date": (TARGET_DATE - timedelta(days=1)).isoformat(), "end_date": TARGET_DATE.isoformat()}
+
+    daily = client.get("/api/v1/metrics/daily", params=dates)
+    assert daily.status_code == 200
+
+    # Changed without a version bump: bootstrap must answer from the entry /metrics/daily stored.
+    db: Session = metrics_test_context["session_factory"]()
+    db.query(FinancialData).filter(FinancialData.date == TARGET_DATE).update({"revenue_net": Decimal(5000)})
+    db.commit()
+    db.close()
+
+    bootstrap = client.get("/api/v1/bootstrap/", params={"fields": "daily", **dates})
+    assert bootstrap.status_code == 200
+    assert bootstrap.json()["daily"] == daily.json()
+
+    etag = bootstrap.headers["etag"]
+    repeated = client.get("/api/v1/bootstrap/", params={"fields": "daily", **dates}, headers={"If-None-Match": etag})
+    assert repeated.status_code == 304
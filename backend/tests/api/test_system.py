@@ -0,0 +1,21 @@
+from fastapi.testclient import TestClient
+import pytest
+
+from app.core.config import settings
+from app.main import app
+
+
+def test_runtime_metrics_require_the_internal_token(monkeypatch: pytest.MonkeyPatch):
+    client = TestClient(app)
+
+    monkeypatch.setattr(settings, "SYSTEM_METRICS_TOKEN", None)
+    assert client.get("/api/v1/system/metrics", headers={"X-Internal-Token": "anything"}).status_code == 404
+
+    monkeypatch.setattr(settings, "SYSTEM_METRICS_TOKEN", "s3cret")
+    assert client.get("/api/v1/system/metrics").status_code == 403
+    assert client.get("/api/v1/system/metrics", headers={"X-Internal-Token": "wrong"}).status_code == 403
+
+    response = client.get("/api/v1/system/metrics", headers={"X-Internal-Token": "s3cret"})
+    assert response.status_code == 200
+    assert "db_pools" in response.json()
+    assert client.get("/api/v1/system/health").status_code == 200
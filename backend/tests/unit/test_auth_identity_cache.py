@@ -0,0 +1,73 @@
+import time
+import uuid
+
+from jose import jwt
+import pytest
+
+from app.api import deps
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+class _FakeResponse:
+    def __init__(self, payload: dict):
+        self.status_code = 200
+        self._payload = payload
+
+    def json(self) -> dict:
+        return self._payload
+
+
+def _make_token(exp_offset: int) -> str:
+    return jwt.encode(
+        {"sub": str(uuid.uuid4()), "exp": int(time.time()) + exp_offset},
+        "unit-test-secret",
+        algorithm="HS256",
+    )
+
+
+@pytest.fixture()
+def supabase_calls(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    calls: list[str] = []
+    user_id = str(uuid.uuid4())
+
+    def fake_get(url: str, headers: dict, timeout: float):
+        calls.append(headers["Authorization"])
+        return _FakeResponse({"id": user_id, "email": "cached@example.com"})
+
+    monkeypatch.setattr(settings, "SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setattr(settings, "SUPABASE_ANON_KEY", "anon-key")
+    monkeypatch.setattr(deps.httpx, "get", fake_get)
+    monkeypatch.setattr(deps, "_identity_cache", TTLCache(max_entries=2, default_ttl=300))
+    return calls
+
+
+def test_identity_is_fetched_once_per_token(supabase_calls: list[str]):
+    token = _make_token(exp_offset=600)
+
+    first = deps._resolve_identity(token)
+    second = deps._resolve_identity(token)
+
+    assert first == second
+    assert len(supabase_calls) == 1
+    assert deps.identity_cache_stats()["hits"] == 1
+
+
+def test_expired_token_is_never_cached(supabase_calls: list[str]):
+    token = _make_token(exp_offset=-5)
+
+    deps._resolve_identity(token)
+    deps._resolve_identity(token)
+
+    assert len(supabase_calls) == 2
+
+
+def test_cache_evicts_least_recently_used_token(supabase_calls: list[str]):
+    tokens = [_make_token(exp_offset=600 + i) for i in range(3)]
+    for token in tokens:
+        deps._resolve_identity(token)
+
+    deps._resolve_identity(tokens[0])
+
+    assert len(supabase_calls) == 4
+    assert deps.identity_cache_stats()["evictions"] >= 1
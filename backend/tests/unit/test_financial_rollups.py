@@ -0,0 +1,86 @@
+from datetime import date
+from decimal import Decimal
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+import app.models  # noqa: F401
+from app.models.financial_data import FinancialData
+from app.models.financial_rollup import FiscalYearFinancials, MonthlyFinancials, WeeklyFinancials
+from app.models.organization import Organization
+from app.models.user import User
+from app.models.workspace import Workspace
+from app.services.rollup_service import period_start, refresh_rollups
+
+
+@pytest.fixture()
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _workspace(db, fiscal_year_start: int) -> tuple[User, Workspace]:
+    user = User(id=uuid.uuid4(), email="rollup@example.com", hashed_password="x", fiscal_year_start=fiscal_year_start)
+    db.add(user)
+    db.flush()
+    org = Organization(id=uuid.uuid4(), name="Org", owner_user_id=user.id)
+    db.add(org)
+    db.flush()
+    workspace = Workspace(id=uuid.uuid4(), organization_id=org.id, name="WS", slug="ws")
+    db.add(workspace)
+    db.flush()
+    return user, workspace
+
+
+def test_period_start_boundaries():
+    day = date(2026, 3, 11)  # a Wednesday
+    assert period_start(day, "week") == date(2026, 3, 9)
+    assert period_start(day, "month") == date(2026, 3, 1)
+    assert period_start(day, "quarter") == date(2026, 1, 1)
+    assert period_start(day, "fiscal_year", fiscal_year_start=4) == date(2025, 4, 1)
+    assert period_start(date(2026, 4, 1), "fiscal_year", fiscal_year_start=4) == date(2026, 4, 1)
+
+
+def test_refresh_replaces_overlapping_periods(db):
+    user, workspace = _workspace(db, fiscal_year_start=3)
+    for day, revenue in ((date(2026, 2, 27), 100), (date(2026, 3, 2), 200), (date(2026, 3, 3), 300)):
+        db.add(
+            FinancialData(
+                workspace_id=workspace.id,
+                user_id=user.id,
+                date=day,
+                revenue_net=Decimal(revenue),
+                cost_ads_meta=Decimal(10),
+                transactions_count=1,
+            )
+        )
+    db.flush()
+    refresh_rollups(db, workspace.id, date(2026, 2, 27), date(2026, 3, 3))
+
+    months = {row.period_start: row for row in db.query(MonthlyFinancials).all()}
+    assert months[date(2026, 3, 1)].revenue_net == Decimal("500.00")
+    assert months[date(2026, 3, 1)].days_count == 2
+    assert months[date(2026, 2, 1)].period_end == date(2026, 2, 28)
+
+    fiscal = {row.period_start: row.revenue_net for row in db.query(FiscalYearFinancials).all()}
+    assert fiscal == {date(2025, 3, 1): Decimal("100.00"), date(2026, 3, 1): Decimal("500.00")}
+
+    # A later write to one day re-rolls only what overlaps it, without duplicating rows.
+    db.query(FinancialData).filter(FinancialData.date == date(2026, 3, 3)).update({"revenue_net": Decimal(50)})
+    refresh_rollups(db, workspace.id, date(2026, 3, 3), date(2026, 3, 3))
+
+    weeks = {row.period_start: row.revenue_net for row in db.query(WeeklyFinancials).all()}
+    assert weeks == {date(2026, 2, 23): Decimal("100.00"), date(2026, 3, 2): Decimal("250.00")}
+    assert db.query(MonthlyFinancials).count() == 2
@@ -0,0 +1,125 @@
+from datetime import date
+from decimal import Decimal
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+import app.models  # noqa: F401
+from app.models.financial_data import FinancialData
+from app.models.organization import Organization
+from app.models.user import User
+from app.models.workspace import Workspace
+from app.services import financial_upsert
+from app.services.financial_upsert import load_financial_rows, upsert_financial_rows
+
+
+@pytest.fixture()
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _workspace(db) -> tuple[User, Workspace]:
+    user = User(id=uuid.uuid4(), email="upsert@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    org = Organization(id=uuid.uuid4(), name="Org", owner_user_id=user.id)
+    db.add(org)
+    db.flush()
+    workspace = Workspace(id=uuid.uuid4(), organization_id=org.id, name="WS", slug="ws")
+    db.add(workspace)
+    db.flush()
+    return user, workspace
+
+
+def _rows_by_date(db, workspace_id):
+    return {row.date: row for row in db.query(FinancialData).filter(FinancialData.workspace_id == workspace_id)}
+
+
+def test_upsert_counts_inserts_and_updates_across_batches(db):
+    user, workspace = _workspace(db)
+    key = {"workspace_id": workspace.id, "user_id": user.id}
+    first = [
+        {**key, "date": date(2026, 3, day), "revenue_net": Decimal(day), "cost_ads_meta": Decimal(1)}
+        for day in (1, 2, 3)
+    ]
+    result = upsert_financial_rows(db, first, batch_size=2)
+    assert (result.inserted, result.updated) == (3, 0)
+
+    # Only revenue is supplied, so costs written earlier survive the update.
+    key = {"workspace_id": str(workspace.id), "user_id": str(user.id)}
+    second = [{**key, "date": date(2026, 3, day), "revenue_net": Decimal(day * 10)} for day in (2, 3, 4)]
+    result = upsert_financial_rows(db, second, batch_size=2)
+    assert (result.inserted, result.updated) == (1, 2)
+    db.commit()
+
+    rows = _rows_by_date(db, workspace.id)
+    assert len(rows) == 4
+    assert rows[date(2026, 3, 1)].revenue_net == Decimal(1)
+    assert rows[date(2026, 3, 3)].revenue_net == Decimal(30)
+    assert rows[date(2026, 3, 3)].cost_ads_meta == Decimal(1)
+    assert rows[date(2026, 3, 4)].cost_ads_meta == Decimal(0)
+
+
+def test_upsert_matches_rows_without_a_workspace(db):
+    user, _ = _workspace(db)
+    key = {"workspace_id": None, "user_id": user.id}
+    upsert_financial_rows(db, [{**key, "date": date(2026, 3, 1), "revenue_net": Decimal(5)}])
+    result = upsert_financial_rows(
+        db,
+        [
+            {**key, "date": date(2026, 3, 1), "revenue_net": Decimal(7)},
+            {**key, "date": date(2026, 3, 2), "revenue_net": Decimal(9)},
+        ],
+    )
+    db.commit()
+
+    assert (result.inserted, result.updated) == (1, 1)
+    rows = _rows_by_date(db, None)
+    assert rows[date(2026, 3, 1)].revenue_net == Decimal(7)
+    assert rows[date(2026, 3, 2)].revenue_net == Decimal(9)
+
+
+def test_upsert_rejects_mixed_column_sets(db):
+    user, workspace = _workspace(db)
+    with pytest.raises(ValueError):
+        upsert_financial_rows(
+            db,
+            [
+                {"workspace_id": workspace.id, "user_id": user.id, "date": date(2026, 3, 1), "revenue_net": 1},
+                {"workspace_id": workspace.id, "user_id": user.id, "date": date(2026, 3, 2), "refunds": 1},
+            ],
+        )
+
+
+def test_load_falls_back_to_on_conflict_without_copy_support(db, monkeypatch):
+    monkeypatch.setattr(financial_upsert.settings, "FINANCIAL_COPY_THRESHOLD_ROWS", 1)
+    monkeypatch.setattr(financial_upsert, "_copy_merge", lambda *args: pytest.fail("COPY used on SQLite"))
+    user, workspace = _workspace(db)
+    key = {"workspace_id": workspace.id, "user_id": user.id}
+
+    rows = [{**key, "date": date(2026, 3, day), "revenue_net": Decimal(day)} for day in (1, 2)]
+    result = load_financial_rows(db, rows)
+
+    assert (result.inserted, result.updated) == (2, 0)
+    assert len(_rows_by_date(db, workspace.id)) == 2
+
+
+def test_copy_csv_marks_nulls_explicitly():
+    buffer = financial_upsert._copy_csv(
+        [{"date": date(2026, 3, 1), "currency": None, "revenue_net": Decimal("1.50")}],
+        ["date", "revenue_net", "currency"],
+    )
+    assert buffer.read() == "2026-03-01,1.50,\\N\n"
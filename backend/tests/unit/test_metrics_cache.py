@@ -0,0 +1,121 @@
+import asyncio
+import uuid
+
+import pytest
+from starlette.requests import Request
+
+from app.core.cache import TTLCache
+from app.services import metrics_cache
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, bytes] = {}
+
+    def get(self, key: str):
+        return self.values.get(key)
+
+    def set(self, key: str, value: bytes, ex: int | None = None) -> None:
+        self.values[key] = value
+
+    def incr(self, key: str) -> int:
+        value = int(self.values.get(key, 0)) + 1
+        self.values[key] = str(value).encode()
+        return value
+
+
+@pytest.fixture()
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> FakeRedis:
+    client = FakeRedis()
+    monkeypatch.setattr(metrics_cache, "get_redis", lambda: client)
+    monkeypatch.setattr(metrics_cache, "_redis_down_until", 0.0)
+    monkeypatch.setattr(metrics_cache, "_local_cache", TTLCache(max_entries=100, default_ttl=60))
+    return client
+
+
+def _request(if_none_match: str | None = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_cached_until_workspace_version_bump(fake_redis: FakeRedis):
+    workspace_id = uuid.uuid4()
+    calls: list[int] = []
+
+    async def compute(session):
+        calls.append(1)
+        return {"value": len(calls)}
+
+    def fetch(request: Request):
+        return asyncio.run(
+            metrics_cache.cached_json_response(
+                request, workspace_id, "daily", {"start_date": "2026-01-01"}, compute, "replica", "primary"
+            )
+        )
+
+    first = fetch(_request())
+    second = fetch(_request())
+    assert first.body == second.body == b'{"value":1}'
+    assert len(calls) == 1
+
+    not_modified = fetch(_request(first.headers["etag"]))
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+
+    metrics_cache.bump_workspace_version(workspace_id)
+    refreshed = fetch(_request(first.headers["etag"]))
+    assert refreshed.status_code == 200
+    assert refreshed.body == b'{"value":2}'
+    assert refreshed.headers["etag"] != first.headers["etag"]
+
+
+def test_other_workspaces_keep_their_entries(fake_redis: FakeRedis):
+    kept, bumped = uuid.uuid4(), uuid.uuid4()
+
+    async def compute(session):
+        return {"ok": True}
+
+    for workspace_id in (kept, bumped):
+        asyncio.run(
+            metrics_cache.cached_json_response(_request(), workspace_id, "summary", {}, compute, "replica", "primary")
+        )
+
+    metrics_cache.bump_workspace_version(bumped)
+
+    assert metrics_cache._lookup(str(kept), metrics_cache._params_key("summary", {}))[1] is not None
+    assert metrics_cache._lookup(str(bumped), metrics_cache._params_key("summary", {}))[1] is None
+
+
+def test_misses_after_a_bump_are_not_cached_from_a_lagging_replica(fake_redis: FakeRedis):
+    workspace_id = uuid.uuid4()
+    # The replica has not replayed the sync that bumped the version yet.
+    data = {"replica": {"net_profit": 100}, "primary": {"net_profit": 250}}
+
+    async def compute(session):
+        return data[session]
+
+    def fetch():
+        return asyncio.run(
+            metrics_cache.cached_json_response(_request(), workspace_id, "summary", {}, compute, "replica", "primary")
+        )
+
+    metrics_cache.bump_workspace_version(workspace_id)
+    assert fetch().body == b'{"net_profit":250}'
+
+    # Later requests are cache hits and keep serving the primary result.
+    data["primary"] = {"net_profit": -1}
+    assert fetch().body == b'{"net_profit":250}'
+
+
+def test_bypassed_responses_read_the_replica(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(metrics_cache, "get_redis", lambda: None)
+    sessions: list[str] = []
+
+    async def compute(session):
+        sessions.append(session)
+        return {}
+
+    asyncio.run(
+        metrics_cache.cached_json_response(_request(), uuid.uuid4(), "summary", {}, compute, "replica", "primary")
+    )
+    assert sessions == ["replica"]
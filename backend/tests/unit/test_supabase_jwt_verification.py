@@ -0,0 +1,77 @@
+import time
+import uuid
+
+from fastapi import HTTPException
+from jose import jwt
+import pytest
+
+from app.api import deps
+from app.core.config import settings
+
+JWT_SECRET = "super-secret-jwt-token-with-at-least-32-characters"
+
+
+def _make_token(secret: str = JWT_SECRET, **claims) -> str:
+    payload = {
+        "sub": str(uuid.uuid4()),
+        "aud": "authenticated",
+        "exp": int(time.time()) + 600,
+        "email": "local@example.com",
+        "user_metadata": {"full_name": "Local User"},
+        **claims,
+    }
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+@pytest.fixture()
+def remote_calls(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    calls: list[str] = []
+
+    def fail_remote(token: str) -> dict:
+        calls.append(token)
+        raise deps._credentials_exception()
+
+    monkeypatch.setattr(deps, "_fetch_supabase_identity", fail_remote)
+    monkeypatch.setattr(settings, "SUPABASE_AUTH_MODE", "auto")
+    return calls
+
+
+def test_local_mode_verifies_without_remote_call(
+    monkeypatch: pytest.MonkeyPatch,
+    remote_calls: list[str],
+):
+    monkeypatch.setattr(settings, "SUPABASE_JWT_SECRET", JWT_SECRET)
+    token = _make_token()
+
+    identity = deps._verify_supabase_token(token)
+
+    assert identity["email"] == "local@example.com"
+    assert identity["user_metadata"]["full_name"] == "Local User"
+    assert remote_calls == []
+
+
+def test_bad_signature_is_rejected_without_fallback(
+    monkeypatch: pytest.MonkeyPatch,
+    remote_calls: list[str],
+):
+    monkeypatch.setattr(settings, "SUPABASE_JWT_SECRET", JWT_SECRET)
+    token = _make_token(secret="a-different-secret-that-is-also-long-enough")
+
+    with pytest.raises(HTTPException) as exc_info:
+        deps._verify_supabase_token(token)
+
+    assert exc_info.value.status_code == 401
+    assert remote_calls == []
+
+
+def test_missing_secret_falls_back_to_remote_lookup(
+    monkeypatch: pytest.MonkeyPatch,
+    remote_calls: list[str],
+):
+    monkeypatch.setattr(settings, "SUPABASE_JWT_SECRET", None)
+    token = _make_token()
+
+    with pytest.raises(HTTPException):
+        deps._verify_supabase_token(token)
+
+    assert remote_calls == [token]
@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime, timezone
+import json
+import uuid
+
+import pytest
+
+from app.models.sync_job import SyncJob
+from app.services import sync_events
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.published: list[tuple[str, str]] = []
+
+    def publish(self, channel: str, message: str) -> int:
+        self.published.append((channel, message))
+        return 1
+
+
+class FakePubSub:
+    def __init__(self, messages: list[dict]) -> None:
+        self.messages = list(messages)
+        self.closed = False
+
+    async def get_message(self, ignore_subscribe_messages: bool = False, timeout: float = 0.0):
+        return self.messages.pop(0) if self.messages else None
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+class FakeAsyncClient:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def _sync_job(workspace_id: uuid.UUID | None) -> SyncJob:
+    return SyncJob(
+        id=uuid.uuid4(),
+        integration_id=uuid.uuid4(),
+        workspace_id=workspace_id,
+        provider="stripe",
+        status="running",
+        trigger_type="webhook",
+        attempt_count=1,
+        requested_at=datetime(2026, 1, 2, tzinfo=timezone.utc),
+    )
+
+
+@pytest.fixture()
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> FakeRedis:
+    client = FakeRedis()
+    monkeypatch.setattr(sync_events, "get_redis", lambda: client)
+    monkeypatch.setattr(sync_events, "_redis_down_until", 0.0)
+    return client
+
+
+def test_publish_targets_the_workspace_channel(fake_redis: FakeRedis) -> None:
+    workspace_id = uuid.uuid4()
+    sync_job = _sync_job(workspace_id)
+
+    sync_events.publish_sync_event(sync_job)
+    asyncio.run(sync_events.publish_sync_event_async(sync_job))
+
+    assert [channel for channel, _ in fake_redis.published] == [sync_events.channel_for(workspace_id)] * 2
+    payload = json.loads(fake_redis.published[0][1])
+    assert payload["sync_job_id"] == str(sync_job.id)
+    assert payload["status"] == "running"
+    assert payload["requested_at"] == "2026-01-02T00:00:00+00:00"
+    assert payload["run"] is None
+
+
+def test_publish_skips_jobs_without_workspace(fake_redis: FakeRedis) -> None:
+    sync_events.publish_sync_event(_sync_job(None))
+    assert fake_redis.published == []
+
+
+def test_stream_sends_initial_state_live_events_and_keep_alives() -> None:
+    pubsub = FakePubSub([{"type": "message", "data": b'{"status": "succeeded"}'}])
+    client = FakeAsyncClient()
+
+    async def collect() -> list[str]:
+        frames = []
+        stream = sync_events.stream_sync_events((client, pubsub), [{"status": "queued"}])
+        async for frame in stream:
+            frames.append(frame)
+            if len(frames) == 3:
+                break
+        await stream.aclose()
+        return frames
+
+    frames = asyncio.run(collect())
+
+    assert frames == [
+        'event: sync_job\ndata: {"status": "queued"}\n\n',
+        'event: sync_job\ndata: {"status": "succeeded"}\n\n',
+        ": keep-alive\n\n",
+    ]
+    assert pubsub.closed and client.closed
@@ -0,0 +1,370 @@
+from datetime import datetime, timedelta, timezone
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+import app.models  # noqa: F401
+from app.models.integration import Integration
+from app.models.kpi_snapshot import WorkspaceKpiSnapshot
+from app.models.organization import Organization
+from app.models.sync_job import SyncJob
+from app.models.sync_job_outbox import SyncJobOutbox
+from app.models.user import User
+from app.models.webhook_event import WebhookEvent
+from app.models.workspace import Workspace
+from app.services import demo_seeder, sync_service, webhook_inbox
+from app.services.sync_service import coalesce_sync_jobs, get_latest_sync_jobs
+from app.services.webhook_inbox import process_webhook_events
+from app.workers import inbox_consumer, tasks
+from app.workers.tasks import _integration_busy
+
+
+@pytest.fixture()
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    session.statements = statements
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _workspace(db) -> tuple[User, Workspace]:
+    user = User(id=uuid.uuid4(), email="sync@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    org = Organization(id=uuid.uuid4(), name="Org", owner_user_id=user.id)
+    db.add(org)
+    db.flush()
+    workspace = Workspace(id=uuid.uuid4(), organization_id=org.id, name="WS", slug="ws")
+    db.add(workspace)
+    db.flush()
+    return user, workspace
+
+
+def test_latest_sync_job_per_integration_in_one_query(db):
+    user, workspace = _workspace(db)
+    stripe, meta, idle = (
+        Integration(id=uuid.uuid4(), workspace_id=workspace.id, user_id=user.id, platform=platform)
+        for platform in ("stripe", "meta", "google")
+    )
+    db.add_all([stripe, meta, idle])
+    db.flush()
+
+    base = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    expected = {}
+    for integration in (stripe, meta):
+        for offset, status in enumerate(("failed", "succeeded", "running")):
+            job = SyncJob(
+                workspace_id=workspace.id,
+                integration_id=integration.id,
+                provider=integration.platform,
+                status=status,
+                requested_at=base + timedelta(minutes=offset),
+            )
+            db.add(job)
+            db.flush()
+        expected[integration.id] = job.id
+    db.commit()
+    integration_ids = [stripe.id, meta.id, idle.id]
+
+    db.statements.clear()
+    latest = get_latest_sync_jobs(db, integration_ids)
+
+    assert len(db.statements) == 1
+    assert {integration_id: job.id for integration_id, job in latest.items()} == expected
+    assert get_latest_sync_jobs(db, []) == {}
+
+
+def test_webhook_triggers_fold_into_a_job_that_has_not_started(db):
+    user, workspace = _workspace(db)
+    integration, other = (
+        Integration(id=uuid.uuid4(), workspace_id=workspace.id, user_id=user.id, platform="stripe")
+        for _ in range(2)
+    )
+    db.add_all([integration, other])
+    db.commit()
+
+    created, coalesced = coalesce_sync_jobs(db, [integration])
+    assert coalesced == [] and [job.trigger_count for job in created] == [1]
+    first = created[0]
+    first.status = "queued"
+    db.commit()
+
+    created, coalesced = coalesce_sync_jobs(db, [integration, other], {integration.id: 3, other.id: 2})
+    assert [job.id for job in coalesced] == [first.id]
+    assert [(job.integration_id, job.trigger_count) for job in created] == [(other.id, 2)]
+    db.commit()
+    assert db.get(SyncJob, first.id).trigger_count == 4
+
+    # Once a worker has claimed it, the running sync may miss the new event.
+    first.status = "running"
+    db.commit()
+    created, _ = coalesce_sync_jobs(db, [integration])
+    second = created[0]
+    assert second.id != first.id
+
+    # A queued job older than the window (e.g. a lost broker message) is not reused.
+    second.status = "queued"
+    second.requested_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    db.commit()
+    created, coalesced = coalesce_sync_jobs(db, [integration])
+    assert coalesced == [] and created[0].id != second.id
+
+
+def test_inbox_batch_routes_events_and_creates_jobs_in_bulk(db, monkeypatch):
+    user, workspace = _workspace(db)
+    stripe_a, stripe_b, shop = (
+        Integration(
+            id=uuid.uuid4(),
+            workspace_id=workspace.id,
+            user_id=user.id,
+            platform=platform,
+            external_account_key=key,
+            status="active",
+        )
+        for platform, key in (("stripe", "acct_a"), ("stripe", "acct_b"), ("shopify", "demo.myshopify.com"))
+    )
+    db.add_all([stripe_a, stripe_b, shop])
+    db.add_all(
+        [
+            WebhookEvent(provider="stripe", account_key="acct_a", payload="{}"),
+            WebhookEvent(provider="stripe", account_key="acct_a", payload="{}"),
+            WebhookEvent(provider="stripe", account_key=None, payload="{}"),
+            WebhookEvent(provider="shopify", account_key="unknown.myshopify.com", payload="{}"),
+        ]
+    )
+    db.commit()
+    monkeypatch.setattr(sync_service, "_kick_dispatcher", lambda: None)
+    monkeypatch.setattr(webhook_inbox, "bump_workspace_version", lambda workspace_id: None)
+
+    db.statements.clear()
+    result = process_webhook_events(db, limit=10)
+
+    assert result == {"events": 4, "queued_jobs": 2, "coalesced_jobs": 0}
+    jobs = {job.integration_id: job for job in db.query(SyncJob).all()}
+    # acct_a: two keyed events plus the platform-wide fan-out event.
+    assert {integration_id: job.trigger_count for integration_id, job in jobs.items()} == {
+        stripe_a.id: 3,
+        stripe_b.id: 1,
+    }
+    assert {job.status for job in jobs.values()} == {"queued"}
+    assert db.query(SyncJobOutbox).filter(SyncJobOutbox.run_after.is_not(None)).count() == 2
+    assert {event.status for event in db.query(WebhookEvent).all()} == {"processed"}
+    # One multi-row INSERT for the jobs, one for their outbox rows.
+    assert len([statement for statement in db.statements if statement.lstrip().upper().startswith("INSERT")]) == 2
+    assert process_webhook_events(db, limit=10)["events"] == 0
+
+
+def test_one_running_sync_per_integration(db):
+    user, workspace = _workspace(db)
+    integration = Integration(id=uuid.uuid4(), workspace_id=workspace.id, user_id=user.id, platform="stripe")
+    db.add(integration)
+    db.flush()
+    running, queued = (
+        SyncJob(workspace_id=workspace.id, integration_id=integration.id, provider="stripe", status=status)
+        for status in ("running", "queued")
+    )
+    running.started_at = datetime.now(timezone.utc)
+    db.add_all([running, queued])
+    db.commit()
+
+    assert _integration_busy(db, queued)
+
+    queued.status = "running"
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+    running.started_at = datetime.now(timezone.utc) - timedelta(days=1)
+    db.commit()
+    assert not _integration_busy(db, queued)
+    db.expire_all()
+    assert db.get(SyncJob, running.id).status == "failed"
+
+
+class FakeProducer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def test_outbox_dispatch_publishes_a_batch_and_marks_it_in_one_update(db, monkeypatch):
+    user, workspace = _workspace(db)
+    integration = Integration(id=uuid.uuid4(), workspace_id=workspace.id, user_id=user.id, platform="stripe")
+    db.add(integration)
+    db.flush()
+    jobs = [
+        SyncJob(workspace_id=workspace.id, integration_id=integration.id, provider="stripe", status="pending")
+        for _ in range(3)
+    ]
+    db.add_all(jobs)
+    db.flush()
+    monkeypatch.setattr(sync_service, "_kick_dispatcher", lambda: None)
+    sync_service.enqueue_sync_jobs(db, jobs)
+
+    published = []
+    producer = FakeProducer()
+
+    def fake_apply_async(args, task_id, eta, producer):
+        if len(published) == 2:
+            raise ConnectionError("broker went away")
+        published.append((args[0], task_id, eta, producer))
+
+    monkeypatch.setattr(sync_service.run_sync_job.app, "producer_or_acquire", lambda: producer)
+    monkeypatch.setattr(sync_service.run_sync_job, "apply_async", fake_apply_async)
+
+    assert sync_service.dispatch_sync_outbox(db, limit=10) == 2
+    task_ids = {str(job.id): job.celery_task_id for job in db.query(SyncJob).all()}
+    assert all(task_ids[job_id] == task_id and sent_with is producer for job_id, task_id, _, sent_with in published)
+    rows = db.query(SyncJobOutbox).all()
+    assert sorted(row.dispatched_at is not None for row in rows) == [False, True, True]
+    assert [row.attempt_count for row in rows if row.dispatched_at is None] == [1]
+
+    published.clear()
+    assert sync_service.dispatch_sync_outbox(db, limit=10) == 1
+    assert sync_service.dispatch_sync_outbox(db, limit=10) == 0
+
+
+def test_legacy_ingest_refreshes_snapshot_and_invalidates_metrics_cache(db, monkeypatch):
+    user, workspace = _workspace(db)
+    integration = Integration(id=uuid.uuid4(), workspace_id=workspace.id, user_id=user.id, platform="stripe")
+    db.add(integration)
+    db.commit()
+    monkeypatch.setattr(tasks, "WorkerSessionLocal", sessionmaker(autoflush=False, bind=db.get_bind()))
+    bumped: list = []
+    monkeypatch.setattr(tasks, "bump_workspace_version", bumped.append)
+
+    result = tasks.ingest_financial_data(str(user.id), str(integration.id))
+
+    assert result.startswith("Successfully processed 31 days")
+    assert db.query(WorkspaceKpiSnapshot).filter(WorkspaceKpiSnapshot.workspace_id == workspace.id).count() == 1
+    assert bumped == [workspace.id]
+
+
+def test_failed_inbox_batch_is_retried_by_the_consumer_without_a_new_webhook(db, monkeypatch):
+    user, workspace = _workspace(db)
+    integration = Integration(
+        id=uuid.uuid4(),
+        workspace_id=workspace.id,
+        user_id=user.id,
+        platform="stripe",
+        external_account_key="acct_a",
+        status="active",
+    )
+    db.add_all([integration, WebhookEvent(provider="stripe", account_key="acct_a", payload="{}")])
+    db.commit()
+    monkeypatch.setattr(inbox_consumer, "WorkerSessionLocal", sessionmaker(autoflush=False, bind=db.get_bind()))
+    monkeypatch.setattr(sync_service, "_kick_dispatcher", lambda: None)
+    monkeypatch.setattr(webhook_inbox, "bump_workspace_version", lambda workspace_id: None)
+
+    def broken_coalesce(*args, **kwargs):
+        raise RuntimeError("database hiccup")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(webhook_inbox, "coalesce_sync_jobs", broken_coalesce)
+        assert inbox_consumer.drain_once() == 0
+
+    db.expire_all()
+    event = db.query(WebhookEvent).one()
+    assert (event.status, event.attempt_count) == ("pending", 1)
+    assert event.latest_error == "RuntimeError: database hiccup"
+    # Backing off: the next poll leaves the event alone.
+    assert inbox_consumer.drain_once() == 0
+
+    db.query(WebhookEvent).update({"next_attempt_at": datetime.now(timezone.utc) - timedelta(seconds=1)})
+    db.commit()
+    assert inbox_consumer.drain_once() == 1
+    db.expire_all()
+    assert db.query(WebhookEvent).one().status == "processed"
+    assert db.query(SyncJob).filter(SyncJob.integration_id == integration.id).count() == 1
+
+
+def test_duplicate_deliveries_of_a_job_run_it_once(db, monkeypatch):
+    user, workspace = _workspace(db)
+    integration = Integration(id=uuid.uuid4(), workspace_id=workspace.id, user_id=user.id, platform="stripe")
+    db.add(integration)
+    db.flush()
+    sync_job = SyncJob(workspace_id=workspace.id, integration_id=integration.id, provider="stripe", status="queued")
+    db.add(sync_job)
+    db.commit()
+    job_id = str(sync_job.id)
+
+    monkeypatch.setattr(tasks, "WorkerSessionLocal", sessionmaker(autoflush=False, bind=db.get_bind()))
+    monkeypatch.setattr(tasks, "publish_sync_event", lambda *args: None)
+    monkeypatch.setattr(tasks, "_refresh_kpi_snapshot", lambda *args: None)
+    monkeypatch.setattr(tasks, "bump_workspace_version", lambda workspace_id: None)
+    seeded: list[str] = []
+    monkeypatch.setattr(tasks, "seed_demo_data", lambda **kwargs: seeded.append(kwargs["workspace_id"]) or {})
+
+    # The second delivery runs to completion after the first passed the status check
+    # but before it claimed the job.
+    results: list[str] = []
+    redelivered: list[bool] = []
+    integration_busy = tasks._integration_busy
+
+    def redeliver_once(session, job):
+        if not redelivered:
+            redelivered.append(True)
+            results.append(tasks.run_sync_job(job_id))
+        return integration_busy(session, job)
+
+    monkeypatch.setattr(tasks, "_integration_busy", redeliver_once)
+    results.append(tasks.run_sync_job(job_id))
+
+    assert results == [f"Sync job {job_id} completed", f"Sync job {job_id} skipped: claimed by another delivery"]
+    assert len(seeded) == 1
+    db.expire_all()
+    job = db.get(SyncJob, sync_job.id)
+    assert (job.status, job.attempt_count) == ("succeeded", 1)
+
+
+def test_deferral_survives_a_broker_error(db, monkeypatch):
+    user, workspace = _workspace(db)
+    integration = Integration(id=uuid.uuid4(), workspace_id=workspace.id, user_id=user.id, platform="stripe")
+    db.add(integration)
+    db.flush()
+    sync_job = SyncJob(workspace_id=workspace.id, integration_id=integration.id, provider="stripe", status="queued")
+    db.add(sync_job)
+    db.commit()
+
+    def broker_down():
+        raise ConnectionError("broker went away")
+
+    monkeypatch.setattr(sync_service.dispatch_sync_job_outbox, "delay", broker_down)
+
+    assert tasks._defer_sync_job(db, sync_job).endswith("deferred: integration has a running sync")
+    assert db.get(SyncJob, sync_job.id).status == "queued"
+    assert db.query(SyncJobOutbox).filter(SyncJobOutbox.sync_job_id == sync_job.id).count() == 1
+
+
+def test_demo_seed_refreshes_the_snapshot_before_bumping_the_metrics_version(db, monkeypatch):
+    user, workspace = _workspace(db)
+    db.commit()
+    snapshots_at_bump: list[int] = []
+
+    def bump(workspace_id):
+        snapshots_at_bump.append(
+            db.query(WorkspaceKpiSnapshot).filter(WorkspaceKpiSnapshot.workspace_id == workspace.id).count()
+        )
+
+    monkeypatch.setattr(demo_seeder, "bump_workspace_version", bump)
+
+    result = demo_seeder.seed_demo_data(db, user_id=user.id, workspace_id=workspace.id)
+
+    assert result["status"] == "seeded"
+    assert snapshots_at_bump == [1]
@@ -0,0 +1,186 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
+
+from app.api import deps
+from app.api.v1.endpoints import workspaces as workspaces_endpoint
+from app.core.cache import TTLCache
+from app.core.database import Base
+import app.models  # noqa: F401
+from app.models.organization import Organization
+from app.models.user import User
+from app.models.workspace import Workspace
+from app.models.workspace_membership import WorkspaceMembership
+
+
+@pytest.fixture()
+def session_factory(monkeypatch: pytest.MonkeyPatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(deps, "_workspace_context_cache", TTLCache(max_entries=100, default_ttl=30))
+    monkeypatch.setattr(deps, "_provisioned_users", TTLCache(max_entries=100, default_ttl=30))
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    factory.statements = statements
+    yield factory
+    engine.dispose()
+
+
+def _seed(factory) -> tuple[User, Workspace]:
+    with factory() as db:
+        user = User(id=uuid.uuid4(), email="ctx@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        org = Organization(id=uuid.uuid4(), name="Org", owner_user_id=user.id)
+        db.add(org)
+        db.flush()
+        workspace = Workspace(id=uuid.uuid4(), organization_id=org.id, name="WS", slug="ws")
+        db.add(workspace)
+        db.flush()
+        db.add(WorkspaceMembership(workspace_id=workspace.id, user_id=user.id, role="admin"))
+        db.commit()
+        db.refresh(user)
+        db.refresh(workspace)
+        db.expunge_all()
+        return user, workspace
+
+
+def test_context_is_resolved_once_and_merged_on_hit(session_factory):
+    user, workspace = _seed(session_factory)
+
+    with session_factory() as db:
+        first = deps.get_workspace_context(db=db, current_user=user, x_workspace_id=None)
+
+    session_factory.statements.clear()
+    with session_factory() as db:
+        second = deps.get_workspace_context(db=db, current_user=user, x_workspace_id=None)
+        assert session_factory.statements == []
+        assert second.workspace.id == first.workspace.id
+        assert second.role == "admin"
+        assert second.membership.user.email == "ctx@example.com"
+
+
+def test_membership_change_invalidates_cached_context(session_factory):
+    user, workspace = _seed(session_factory)
+
+    with session_factory() as db:
+        deps.get_workspace_context(db=db, current_user=user, x_workspace_id=str(workspace.id))
+        db.query(WorkspaceMembership).delete()
+        db.commit()
+
+    deps.invalidate_workspace_context(user_id=user.id)
+
+    with session_factory() as db:
+        with pytest.raises(HTTPException) as exc_info:
+            deps.get_workspace_context(db=db, current_user=user, x_workspace_id=str(workspace.id))
+    assert exc_info.value.status_code == 403
+
+
+def _new_user(factory) -> User:
+    with factory() as db:
+        user = User(id=uuid.uuid4(), email="first@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        db.expunge_all()
+        return user
+
+
+def _workspace_count(factory, user: User) -> int:
+    with factory() as db:
+        return db.query(WorkspaceMembership).filter(WorkspaceMembership.user_id == user.id).count()
+
+
+def test_first_login_provisions_once_and_marker_skips_membership_check(session_factory, monkeypatch):
+    user = _new_user(session_factory)
+    with session_factory() as db:
+        deps._provision_first_login(db, user)
+    assert _workspace_count(session_factory, user) == 1
+
+    checks: list[uuid.UUID] = []
+    has_membership = deps._has_membership
+
+    def counting_has_membership(db, user_id):
+        checks.append(user_id)
+        return has_membership(db, user_id)
+
+    monkeypatch.setattr(deps, "_has_membership", counting_has_membership)
+    with session_factory() as db:
+        deps._provision_first_login(db, user)
+    assert checks == []
+
+    # Without the marker the membership is found again and nothing new is created.
+    deps.forget_provisioned_user(user.id)
+    with session_factory() as db:
+        deps._provision_first_login(db, user)
+    assert checks == [user.id]
+    assert _workspace_count(session_factory, user) == 1
+
+
+def test_stale_marker_reprovisions_user_without_memberships(session_factory):
+    user, _ = _seed(session_factory)
+    with session_factory() as db:
+        deps._provision_first_login(db, user)
+        db.query(WorkspaceMembership).delete()
+        db.commit()
+
+    with session_factory() as db:
+        context = deps.get_workspace_context(db=db, current_user=user, x_workspace_id=None)
+        assert context.role == "owner"
+    assert _workspace_count(session_factory, user) == 1
+
+
+def test_deleting_workspace_forgets_every_member(session_factory):
+    owner, workspace = _seed(session_factory)
+    member = _new_user(session_factory)
+    with session_factory() as db:
+        db.query(WorkspaceMembership).update({"role": "owner"})
+        db.add(WorkspaceMembership(workspace_id=workspace.id, user_id=member.id, role="viewer"))
+        db.commit()
+    deps._provisioned_users.set(owner.id, True)
+    deps._provisioned_users.set(member.id, True)
+
+    with session_factory() as db:
+        workspaces_endpoint.delete_workspace(str(workspace.id), db=db, current_user=owner)
+
+    assert deps._provisioned_users.get(owner.id) is None
+    assert deps._provisioned_users.get(member.id) is None
+
+
+def test_async_dependencies_create_provision_and_resolve_user(tmp_path, monkeypatch):
+    monkeypatch.setattr(deps, "_workspace_context_cache", TTLCache(max_entries=100, default_ttl=30))
+    monkeypatch.setattr(deps, "_provisioned_users", TTLCache(max_entries=100, default_ttl=30))
+    user_id = uuid.uuid4()
+    monkeypatch.setattr(deps, "_resolve_identity", lambda token: {"id": str(user_id), "email": "async@example.com"})
+    db_path = tmp_path / "auth.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    factory = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    async def resolve():
+        async with factory() as db:
+            user = await deps.get_async_current_user(db=db, token="token")
+            return await deps.get_async_workspace_context(db=db, current_user=user, x_workspace_id=None)
+
+    try:
+        first = asyncio.run(resolve())
+        second = asyncio.run(resolve())
+    finally:
+        asyncio.run(async_engine.dispose())
+        engine.dispose()
+
+    assert first.membership.user_id == user_id
+    assert first.role == "owner"
+    assert second.workspace.id == first.workspace.id